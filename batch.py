@@ -0,0 +1,142 @@
+import csv
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+import click
+
+import http_client
+import profiling
+from log import get_logger
+
+logger = get_logger("batch")
+
+
+def read_manifest(path):
+    """
+    Read a batch manifest. Both CSV (with a header row) and JSONL files are
+    accepted, each entry needs a "nodeid" and a "uuid". An optional
+    "version" (dataSetVersion) lets a copy of the same version that was
+    downloaded from another node be reused.
+    """
+    path = Path(path)
+    items = []
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.suffix.lower() in (".jsonl", ".ndjson"):
+            rows = (json.loads(line) for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+        for row in rows:
+            item = {"nodeid": row["nodeid"].strip(), "uuid": row["uuid"].strip()}
+            version = (row.get("version") or "").strip()
+            if version:
+                item["version"] = version
+            items.append(item)
+    return items
+
+
+class BatchReport:
+    def __init__(self):
+        self.done = []
+        self.failed = []
+        self.elapsed = 0.0
+
+    @property
+    def total(self):
+        return len(self.done) + len(self.failed)
+
+    @property
+    def rate(self):
+        if not self.elapsed:
+            return 0.0
+        return self.total / self.elapsed
+
+
+def node_stats_lines():
+    lines = []
+    for nodeid, stats in sorted(http_client.stats().items()):
+        line = (
+            f"{nodeid}: {stats['requests_per_s']:.1f} req/s (limit {stats['rate_limit']:.1f}), "
+            f"{stats['in_flight']} in flight, {stats['queued']} queued, "
+            f"{stats['requests']} requests, {stats['throttled']} throttled"
+        )
+        if stats["paused"]:
+            line += f", paused for {stats['paused']:.1f}s"
+        lines.append(line)
+    return lines
+
+
+def run_batch(items, fetch, handle, jobs=8, progress_every=10.0, journal=None):
+    """
+    Run fetch(item) on a pool of `jobs` threads and hand every result to
+    handle(item, fetched) in the calling thread as soon as it is ready.
+
+    At most 2 * jobs fetches are queued at any time, so a long manifest never
+    keeps more than a window of downloaded datasets in memory. A failing item
+    is recorded in the report and the run carries on. Every
+    `progress_every` seconds the progress and the request rates and queues
+    of the nodes are logged.
+
+    With a `journal` every finished item is checkpointed with the output
+    handle returned, so an interrupted run can be resumed.
+    """
+    report = BatchReport()
+    items = iter(items)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        pending = {}
+
+        def traced_fetch(item):
+            with profiling.span("fetch", nodeid=item["nodeid"], uuid=item["uuid"]):
+                return fetch(item)
+
+        def submit_next():
+            item = next(items, None)
+            if item is None:
+                return False
+            pending[pool.submit(traced_fetch, item)] = item
+            return True
+
+        for _ in range(jobs * 2):
+            if not submit_next():
+                break
+        last_progress = started
+        while pending:
+            finished, _ = wait(pending, timeout=progress_every, return_when=FIRST_COMPLETED)
+            if time.perf_counter() - last_progress >= progress_every:
+                last_progress = time.perf_counter()
+                logger.info("%d done, %d failed, %d in progress.", len(report.done), len(report.failed), len(pending))
+                for line in node_stats_lines():
+                    logger.info("  %s", line)
+            for future in finished:
+                item = pending.pop(future)
+                try:
+                    fetched = future.result()
+                    with profiling.span("handle", nodeid=item["nodeid"], uuid=item["uuid"]):
+                        result = handle(item, fetched)
+                except Exception as err:
+                    report.failed.append((item, err))
+                    logger.error('Failed %s %s: %s', item["nodeid"], item["uuid"], err, extra={"nodeid": item["nodeid"], "uuid": item["uuid"]})
+                    if journal:
+                        journal.failed(item, err)
+                else:
+                    report.done.append((item, result))
+                    if journal:
+                        journal.done(item, result)
+                submit_next()
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+def print_report(report):
+    line = "#"*90
+    click.secho(line, fg="cyan")
+    click.secho(f"Converted {len(report.done)} of {report.total} EPDs in {report.elapsed:.1f}s ({report.rate:.2f} EPDs/s).", fg="green")
+    for stats_line in node_stats_lines():
+        click.echo(f"\t{stats_line}")
+    if report.failed:
+        click.secho(f"{len(report.failed)} EPDs failed:", fg="red")
+        for item, err in report.failed:
+            click.echo(f'\t{item["nodeid"]}\t{item["uuid"]}\t{err}')
+    click.secho(line, fg="cyan")
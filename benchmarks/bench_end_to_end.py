@@ -0,0 +1,162 @@
+"""
+End-to-end benchmark and performance regression gate.
+
+Starts a fake node (see fake_node.py) in its own process and runs
+process_info -> convert_to_lcabyg -> save_stages for each of its EPDs, on
+`--jobs` threads, with fresh cache and data folders. Reports EPDs/s, p50
+and p99 latency per EPD, the peak RSS of the client and the requests and
+bytes per EPD the node served.
+
+With --baseline the run is compared to an earlier --save and the script
+exits with status 1 when it is slower, uses more memory or makes more
+requests than the baseline allows.
+
+    python benchmarks/bench_end_to_end.py [--count 200] [--jobs 8] [--latency 0.02]
+    python benchmarks/bench_end_to_end.py --save baseline.json
+    python benchmarks/bench_end_to_end.py --baseline baseline.json [--tolerance 0.2]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+NODE = "FAKE"
+
+
+def start_node(args):
+    command = [
+        sys.executable, str(ROOT / "benchmarks" / "fake_node.py"),
+        "--count", str(args.count), "--scenarios", str(args.scenarios), "--unit-groups", str(args.unit_groups),
+        "--latency", str(args.latency), "--jitter", str(args.jitter),
+        "--error-rate", str(args.error_rate), "--throttle-rate", str(args.throttle_rate),
+    ]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    return process, process.stdout.readline().strip()
+
+
+def node_stats(url):
+    with urllib.request.urlopen(url.replace("/resource/", "/_stats")) as response:
+        return json.load(response)
+
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(share * len(values)))]
+
+
+def run(url, jobs, rate):
+    # Imported here, after the user folders were pointed at a temporary one.
+    import http_client
+    import log
+    from epd_data import convert_to_lcabyg
+    from epd_search import iter_search
+    from main import process_info, save_stages
+    from output_store import clean_name
+
+    log.configure(verbosity=-1)
+    http_client.base_urls[NODE] = url
+    http_client.configure(rate=rate, max_rate=rate, max_in_flight=jobs, pool_size=jobs)
+    my_header = {"Authorization": "Bearer benchmark"}
+    result_folder = Path(os.environ["XDG_DATA_HOME"]) / "results"
+    hits = list(iter_search(NODE, {"search": "true"}, my_header))
+
+    def convert(hit):
+        started = time.perf_counter()
+        process_json, uri = process_info(NODE, hit["uuid"], my_header, False)
+        stages = convert_to_lcabyg(process_json, uri, my_header, NODE, interactive=False)
+        save_stages(stages, result_folder / clean_name(f'{stages[0][1]}_{hit["uuid"]}'))
+        return time.perf_counter() - started
+
+    latencies, failed = [], 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(convert, hit) for hit in hits]
+        for future in futures:
+            try:
+                latencies.append(future.result())
+            except Exception as err:
+                failed += 1
+                print(f"Failed: {err}", file=sys.stderr)
+    return latencies, failed, time.perf_counter() - started
+
+
+def compare(results, baseline, tolerance):
+    problems = []
+    if results["epds_per_s"] < baseline["epds_per_s"] * (1 - tolerance):
+        problems.append(f"EPDs/s {results['epds_per_s']:.1f} < {baseline['epds_per_s']:.1f}")
+    if results["p99_ms"] > baseline["p99_ms"] * (1 + tolerance):
+        problems.append(f"p99 {results['p99_ms']:.1f} ms > {baseline['p99_ms']:.1f} ms")
+    if results["peak_rss_mib"] > baseline["peak_rss_mib"] * (1 + tolerance):
+        problems.append(f"peak RSS {results['peak_rss_mib']:.1f} MiB > {baseline['peak_rss_mib']:.1f} MiB")
+    if results["requests_per_epd"] > baseline["requests_per_epd"] + 0.01:
+        problems.append(f"requests/EPD {results['requests_per_epd']:.2f} > {baseline['requests_per_epd']:.2f}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=200, help="EPDs on the fake node")
+    parser.add_argument("--jobs", type=int, default=8)
+    parser.add_argument("--scenarios", type=int, default=1, help="scenarios per C1-C4/D module")
+    parser.add_argument("--unit-groups", type=int, default=3, help="unit groups the reference units are looked up in")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds the node takes per response")
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--rate", type=float, default=1000.0, help="requests per second the client may send to the node")
+    parser.add_argument("--save", type=Path, help="write the results to this JSON file")
+    parser.add_argument("--baseline", type=Path, help="fail when worse than the results in this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed regression against the baseline")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(ROOT))
+    node, url = start_node(args)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            os.environ["XDG_DATA_HOME"] = os.path.join(tmp, "data")
+            os.environ["XDG_CACHE_HOME"] = os.path.join(tmp, "cache")
+            latencies, failed, elapsed = run(url, args.jobs, args.rate)
+            served = node_stats(url)
+    finally:
+        node.terminate()
+        node.wait()
+
+    converted = len(latencies)
+    results = {
+        "epds": converted,
+        "failed": failed,
+        "epds_per_s": converted / elapsed,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        # ru_maxrss is in KiB on Linux.
+        "peak_rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "requests_per_epd": sum(served["requests"].values()) / max(1, converted),
+        "kib_per_epd": served["bytes"] / 1024 / max(1, converted),
+    }
+    print(f"{converted} EPDs converted, {failed} failed, in {elapsed:.2f}s with {args.jobs} jobs")
+    print(f"  {results['epds_per_s']:8.1f} EPDs/s")
+    print(f"  {results['p50_ms']:8.1f} ms p50, {results['p99_ms']:.1f} ms p99 per EPD")
+    print(f"  {results['peak_rss_mib']:8.1f} MiB peak RSS")
+    print(f"  {results['requests_per_epd']:8.2f} requests/EPD, {results['kib_per_epd']:.1f} KiB/EPD")
+    print(f"  requests: {served['requests']}, responses: {served['responses']}")
+
+    if args.save:
+        args.save.write_text(json.dumps(results, indent=4))
+    if args.baseline:
+        problems = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+        for problem in problems:
+            print(f"Regression: {problem}")
+        if problems or failed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Memory held per EPD during batch work: the old pprint_indicators dicts,
+which keep the dataset's "anies" alive, against the slotted EPD model.
+
+    python benchmarks/bench_memory.py [--epds 2000] [--scenarios 3]
+"""
+import argparse
+import gc
+import json
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from epd_data import EPD  # noqa: E402
+from fixtures import legacy_indicators, synthetic_process  # noqa: E402
+
+
+def held_bytes(build, texts):
+    # Parse every dataset fresh, keep only what `build` returns.
+    gc.collect()
+    tracemalloc.start()
+    kept = [build(json.loads(text)) for text in texts]
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--epds", type=int, default=2000)
+    parser.add_argument("--scenarios", type=int, default=3, help="scenarios per C1-C4/D module")
+    parser.add_argument("--extra-indicators", type=int, default=10)
+    args = parser.parse_args()
+
+    texts = [
+        json.dumps(synthetic_process(seed=seed, scenarios=args.scenarios, extra_indicators=args.extra_indicators))
+        for seed in range(args.epds)
+    ]
+    results = {}
+    for label, build in (("legacy", legacy_indicators), ("model", EPD.from_json)):
+        results[label] = held_bytes(build, texts) / args.epds
+        print(f"{label:>6}: {results[label] / 1024:8.1f} KiB/EPD")
+    print(f" ratio: {results['legacy'] / results['model']:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
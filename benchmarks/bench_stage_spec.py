@@ -0,0 +1,67 @@
+"""
+Micro-benchmark: filling the Stage indicators of every module from the
+indicator x module matrix against the old per-module rescans of the
+pprint_indicators output.
+
+    python benchmarks/bench_stage_spec.py [--scenarios 10] [--repeat 200]
+"""
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from epd_data import EPD, indicator_matrix  # noqa: E402
+from fixtures import legacy_indicators, synthetic_process  # noqa: E402
+
+STAGE_INDICATORS = ["ADPF", "GWP", "POCP", "EP", "SER", "SENR", "PER", "PENR", "ADPE", "AP", "ODP"]
+
+
+def legacy_path(process_json):
+    # generate_stage_spec before the matrix: one scan of all emissions per indicator and module.
+    indicators = legacy_indicators(process_json)
+    modules = {str(i["module"]) for indicator in indicators.values() for i in indicator["Emissions"][0]}
+    modules.difference_update({"A1-A3", "A1", "A2", "A3"})
+    stages = {}
+    for module in ["A1to3"] + list(modules):
+        stage = {}
+        for indicator in STAGE_INDICATORS:
+            if indicator in indicators:
+                wanted = ["A1-A3", "A1", "A2", "A3"] if module == "A1to3" else [module]
+                values = [i for i in indicators[indicator]["Emissions"][0] if i["module"] in wanted]
+                stage[indicator] = sum(float(val["value"]) for val in values)
+        stages[module] = stage
+    return stages
+
+
+def matrix_path(process_json):
+    matrix = indicator_matrix(EPD.from_json(process_json))
+    stages = {}
+    for module in matrix.stage_modules:
+        column = matrix.column(module)
+        stages[module] = {indicator: column[indicator] for indicator in STAGE_INDICATORS if indicator in column}
+    return stages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenarios", type=int, default=10, help="scenarios per C1-C4/D module")
+    parser.add_argument("--extra-indicators", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    process_json = synthetic_process(scenarios=args.scenarios, extra_indicators=args.extra_indicators)
+    legacy, matrix = legacy_path(process_json), matrix_path(process_json)
+    assert legacy.keys() == matrix.keys()
+    for module in legacy:
+        for indicator, value in legacy[module].items():
+            assert abs(value - matrix[module][indicator]) <= 1e-9 * max(1.0, abs(value)), (module, indicator)
+
+    for label, func in (("legacy", legacy_path), ("matrix", matrix_path)):
+        seconds = min(timeit.repeat(lambda: func(process_json), number=args.repeat, repeat=5)) / args.repeat
+        print(f"{label:>6}: {seconds * 1e6:10.1f} us/EPD  ({len(matrix)} modules)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Cold-start budget of the CLI.
+
+Runs `main.py --help` in fresh interpreters and `python -X importtime` on
+`import main`, prints the slowest imports and exits with status 1 when the
+median start-up time is over the budget.
+
+    python benchmarks/bench_startup.py [--runs 10] [--budget-ms 250]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+# Median wall time of `main.py --help`, also checked by tests/test_startup.py.
+BUDGET_MS = 250.0
+
+
+def import_times():
+    # Lines look like "import time:  self [us] | cumulative | imported package".
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times.append((int(cumulative_us), int(self_us), name.rstrip()))
+    return times
+
+
+def startup_seconds(runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "main.py", "--no-banner", "--help"],
+            cwd=ROOT, stdout=subprocess.DEVNULL, check=True,
+        )
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS)
+    parser.add_argument("--top", type=int, default=10, help="number of slowest imports to show")
+    args = parser.parse_args()
+
+    times = import_times()
+    print("Slowest imports under 'import main' (cumulative ms):")
+    for cumulative_us, self_us, name in sorted(times, reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:10.1f} {self_us / 1000:8.1f}  {name}")
+
+    timings = startup_seconds(args.runs)
+    median_ms = statistics.median(timings) * 1000
+    print(f"\n'main.py --help' over {args.runs} runs: median {median_ms:.0f} ms, min {min(timings) * 1000:.0f} ms, budget {args.budget_ms:.0f} ms")
+    if median_ms > args.budget_ms:
+        print("Start-up budget exceeded.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
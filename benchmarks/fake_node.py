@@ -0,0 +1,232 @@
+"""
+A local stand-in for a soda4LCA node, serving synthetic datasets.
+
+    GET /resource/processes/?search=true&name=...&startIndex=0&pageSize=100
+    GET /resource/processes/<uuid>?format=json&view=extended
+    GET /resource/unitgroups/<uuid>
+    GET /_stats        requests, bytes and responses per kind so far
+
+Every response can be delayed (`latency` plus up to `jitter` seconds),
+fail with a 500 (`error_rate`) or be throttled with a 429 and a
+Retry-After (`throttle_rate`, or above `max_rps` requests per second).
+It runs in a thread of the calling process or on its own:
+
+    python benchmarks/fake_node.py [--count 200] [--port 8080] [--latency 0.05]
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fixtures import synthetic_process  # noqa: E402
+
+NAMES = ["Concrete C30/37", "Mineral wool", "Gypsum board", "Clay brick", "Cement mortar", "Aerated concrete block"]
+
+
+def unit_group(group_uuid, unit="kg"):
+    return {
+        "unitGroupInformation": {
+            "dataSetInformation": {"UUID": group_uuid, "name": [{"lang": "en", "value": f"Units of {unit}"}]},
+            "quantitativeReference": {"referenceToReferenceUnit": 0},
+        },
+        "units": {"unit": [{"dataSetInternalID": 0, "name": unit, "meanValue": 1.0}]},
+    }
+
+
+def synthetic_node(count, scenarios=1, unit_groups=0, seed=0):
+    """
+    Return ({uuid: process dataset}, {uuid: unit group}) for a node with
+    `count` EPDs. With `unit_groups` the reference units are left out of the
+    datasets and spread over that many unit groups, so every one of them
+    has to be looked up.
+    """
+    rng = random.Random(seed)
+    groups = {str(uuid.UUID(int=rng.getrandbits(128))): unit_group(None, unit) for unit in ["kg", "m2", "m3", "pcs.", "m"][:unit_groups]}
+    for group_uuid, group in groups.items():
+        group["unitGroupInformation"]["dataSetInformation"]["UUID"] = group_uuid
+    processes = {}
+    for i in range(count):
+        process = synthetic_process(name=f"{NAMES[i % len(NAMES)]} {i}", scenarios=scenarios, seed=seed + i)
+        if groups:
+            flow_property = process["exchanges"]["exchange"][0]["flowProperties"][0]
+            flow_property["uuid"] = list(groups)[i % len(groups)]
+            del flow_property["referenceUnit"]
+        processes[process["processInformation"]["dataSetInformation"]["UUID"]] = process
+    return processes, groups
+
+
+class FakeNode:
+    def __init__(self, processes, unit_groups=None, latency=0.0, jitter=0.0, error_rate=0.0,
+                 throttle_rate=0.0, max_rps=None, retry_after=1, host="127.0.0.1", port=0, seed=0):
+        self.bodies = {
+            "processes": {key: json.dumps(value, ensure_ascii=False).encode() for key, value in processes.items()},
+            "unitgroups": {key: json.dumps(value, ensure_ascii=False).encode() for key, value in (unit_groups or {}).items()},
+        }
+        self.index = [
+            {
+                "uuid": key,
+                "version": value["administrativeInformation"]["publicationAndOwnership"]["dataSetVersion"],
+                "name": value["processInformation"]["dataSetInformation"]["name"]["baseName"][0]["value"],
+            }
+            for key, value in processes.items()
+        ]
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.max_rps = max_rps
+        self.retry_after = retry_after
+        self.requests = Counter()
+        self.responses = Counter()
+        self.bytes_sent = 0
+        self.recent = deque()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/resource/"
+
+    def stats(self):
+        with self._lock:
+            return {"requests": dict(self.requests), "responses": dict(self.responses), "bytes": self.bytes_sent}
+
+    def reset_stats(self):
+        with self._lock:
+            self.requests.clear()
+            self.responses.clear()
+            self.bytes_sent = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="fake-node", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def _fault(self, kind):
+        # (status, headers) of an injected error, or None to answer normally.
+        if kind == "stats":
+            return None
+        with self._lock:
+            now = time.monotonic()
+            self.recent.append(now)
+            while self.recent and self.recent[0] < now - 1:
+                self.recent.popleft()
+            over_limit = self.max_rps is not None and len(self.recent) > self.max_rps
+            roll = self._rng.random()
+        if over_limit or roll < self.throttle_rate:
+            return 429, {"Retry-After": str(self.retry_after)}
+        if roll < self.throttle_rate + self.error_rate:
+            return 500, {}
+        return None
+
+    def _answer(self, path, query):
+        parts = [part for part in path.split("/") if part]
+        if parts == ["_stats"]:
+            return "stats", 200, json.dumps(self.stats()).encode()
+        if len(parts) < 2 or parts[0] != "resource":
+            return "other", 404, b"{}"
+        kind, rest = parts[1], parts[2:]
+        if kind == "processes" and not rest:
+            return "search", 200, self._search(query)
+        if kind in self.bodies and len(rest) == 1:
+            body = self.bodies[kind].get(rest[0])
+            return kind, (200 if body else 404), body or b"{}"
+        return "other", 404, b"{}"
+
+    def _search(self, query):
+        name = query.get("name", [""])[0].lower()
+        start = int(query.get("startIndex", ["0"])[0])
+        size = int(query.get("pageSize", ["100"])[0])
+        hits = [hit for hit in self.index if name in hit["name"].lower()]
+        page = {"startIndex": start, "pageSize": size, "totalCount": len(hits), "data": hits[start:start + size]}
+        return json.dumps(page).encode()
+
+    def _handler(self):
+        node = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                kind, status, body = node._answer(url.path, parse_qs(url.query))
+                headers = {}
+                fault = node._fault(kind)
+                if fault:
+                    status, headers = fault
+                    body = b"{}"
+                if kind != "stats" and (node.latency or node.jitter):
+                    time.sleep(node.latency + node._rng.random() * node.jitter)
+                with node._lock:
+                    if kind != "stats":
+                        node.requests[kind] += 1
+                        node.responses[status] += 1
+                        node.bytes_sent += len(body)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=200, help="number of EPDs on the node")
+    parser.add_argument("--scenarios", type=int, default=1, help="scenarios per C1-C4/D module")
+    parser.add_argument("--unit-groups", type=int, default=0, help="unit groups the reference units are looked up in")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this many seconds more")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of responses that are a 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="share of responses that are a 429")
+    parser.add_argument("--max-rps", type=int, help="answer 429 above this many requests per second")
+    parser.add_argument("--retry-after", type=int, default=1)
+    args = parser.parse_args()
+
+    processes, groups = synthetic_node(args.count, scenarios=args.scenarios, unit_groups=args.unit_groups)
+    node = FakeNode(
+        processes, groups, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate, max_rps=args.max_rps, retry_after=args.retry_after, port=args.port,
+    )
+    print(node.url, flush=True)
+    try:
+        node.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        node.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
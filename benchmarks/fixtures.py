@@ -0,0 +1,215 @@
+"""
+Synthetic ILCD process datasets for the benchmarks and tests.
+"""
+import random
+import uuid
+import xml.etree.ElementTree as ET
+import zipfile
+
+ILCD = "http://lca.jrc.it/ILCD"
+COMMON = "{http://lca.jrc.it/ILCD/Common}"
+EPD = "{http://www.iai.kit.edu/EPD/2013}"
+XML_LANG = "{http://www.w3.org/XML/1998/namespace}lang"
+
+INDICATORS = [
+    ("Abiotic depletion potential for fossil resources (ADPF)", "MJ"),
+    ("Global Warming Potential (GWP)", "kg CO2 eq."),
+    ("Formation potential of tropospheric ozone photochemical oxidants (POCP)", "kg Ethene eq."),
+    ("Eutrophication potential (EP)", "kg PO4 eq."),
+    ("Total use of renewable primary energy resources (SER)", "MJ"),
+    ("Total use of non renewable primary energy resources (SENR)", "MJ"),
+    ("Use of renewable primary energy (PER)", "MJ"),
+    ("Use of non renewable primary energy (PENR)", "MJ"),
+    ("Abiotic depletion potential for non fossil resources (ADPE)", "kg Sb eq."),
+    ("Acidification potential of land and water (AP)", "kg SO2 eq."),
+    ("Depletion potential of the stratospheric ozone layer (ODP)", "kg CFC11 eq."),
+]
+
+
+def synthetic_process(process_uuid=None, name="Concrete C30/37", scenarios=1, extra_indicators=0, seed=0):
+    """
+    Return an ILCD process dataset (extended JSON view) with the 11 LCAByg
+    indicators plus `extra_indicators` others, declared for A1-A3, A4, A5,
+    B1-B7 and `scenarios` scenarios of each C1-C4 and D module.
+    """
+    rng = random.Random(seed)
+    process_uuid = process_uuid or str(uuid.UUID(int=rng.getrandbits(128)))
+    modules = [("A1-A3", None), ("A4", None), ("A5", None)]
+    modules += [(f"B{i}", None) for i in range(1, 8)]
+    for module in ["C1", "C2", "C3", "C4", "D"]:
+        if scenarios == 1:
+            modules.append((module, None))
+        else:
+            modules += [(module, f"S{i}") for i in range(1, scenarios + 1)]
+
+    indicators = list(INDICATORS)
+    indicators += [(f"Extra indicator {i} (X{i})", "kg") for i in range(extra_indicators)]
+    results = []
+    for indicator_name, unit in indicators:
+        anies = [{
+            "name": "referenceToUnitGroupDataSet",
+            "value": {"shortDescription": [{"lang": "en", "value": unit}]},
+        }]
+        for module, scenario in modules:
+            emission = {"module": module, "value": f"{rng.uniform(-10, 100):.6E}"}
+            if scenario:
+                emission["scenario"] = scenario
+            anies.append(emission)
+        results.append({
+            "referenceToLCIAMethodDataSet": {"shortDescription": [{"lang": "en", "value": indicator_name}]},
+            "other": {"anies": anies},
+        })
+
+    return {
+        "processInformation": {
+            "dataSetInformation": {
+                "UUID": process_uuid,
+                "name": {"baseName": [{"lang": "en", "value": name}]},
+                "classificationInformation": {"classification": [{
+                    "name": "OEKOBAU.DAT",
+                    "class": [{"level": 0, "classId": "1", "value": "Mineralische Baustoffe"}],
+                }]},
+                "generalComment": [{"lang": "en", "value": "Synthetic dataset."}],
+            },
+            "time": {"referenceYear": 2022, "dataSetValidUntil": 2027},
+            "quantitativeReference": {"referenceToReferenceFlow": [0]},
+        },
+        "exchanges": {"exchange": [{
+            "dataSetInternalID": 0,
+            "flowProperties": [{
+                "uuid": "93a60a56-a3c8-10da-a746-0800200c9a66",
+                "meanValue": 1.0,
+                "referenceUnit": "kg",
+            }],
+        }]},
+        "modellingAndValidation": {"LCIMethodAndAllocation": {"other": {"anies": [
+            {"name": "subType", "value": "specific dataset"},
+        ]}}},
+        "administrativeInformation": {
+            "dataEntryBy": {"referenceToDataSetFormat": [{"shortDescription": [{"lang": "en", "value": "ILCD format"}]}]},
+            "publicationAndOwnership": {"dataSetVersion": "00.01.000"},
+        },
+        "LCIAResults": {"LCIAResult": results},
+    }
+
+
+def legacy_indicators(process_json):
+    """
+    The indicators as pprint_indicators returned them before the EPD model:
+    per indicator a dict of single-element lists, the total as a string and
+    the raw "anies" emission dicts of the dataset.
+    """
+    indicators = {}
+    for obj in process_json["LCIAResults"]["LCIAResult"]:
+        indicator_name = obj["referenceToLCIAMethodDataSet"]["shortDescription"][0]["value"]
+        unit_dict = [i for i in obj["other"]["anies"] if "name" in i]
+        unit = unit_dict[0]["value"]["shortDescription"][0]["value"]
+        emissions = [i for i in obj["other"]["anies"] if "module" in i]
+        emission_total = sum(float(emission["value"]) for emission in emissions)
+        name_code = indicator_name.rstrip("*")[indicator_name.rfind("(") + 1: -1]
+        indicators[name_code] = {
+            "Indicator": [f"{indicator_name}"],
+            "Unit": [f"{unit}"],
+            "Emissions": [emissions],
+            "Total": [f"{emission_total}"],
+        }
+    return indicators
+
+
+def _element(parent, tag, text=None, **attrib):
+    element = ET.SubElement(parent, tag, {key: str(value) for key, value in attrib.items()})
+    if text is not None:
+        element.text = str(text)
+    return element
+
+
+def _strings(parent, tag, strings):
+    for string in strings:
+        element = ET.SubElement(parent, tag, {XML_LANG: string["lang"]})
+        element.text = string["value"]
+
+
+def _process_xml(process, flow_uuid):
+    information = process["processInformation"]
+    data_set_information = information["dataSetInformation"]
+    root = ET.Element(f"{{{ILCD}/Process}}processDataSet")
+    info = _element(root, "processInformation")
+    dsi = _element(info, "dataSetInformation")
+    _element(dsi, f"{COMMON}UUID", data_set_information["UUID"])
+    _strings(_element(dsi, "name"), "baseName", data_set_information["name"]["baseName"])
+    classifications = _element(dsi, "classificationInformation")
+    for classification in data_set_information["classificationInformation"]["classification"]:
+        element = _element(classifications, f"{COMMON}classification", name=classification["name"])
+        for class_ in classification["class"]:
+            _element(element, f"{COMMON}class", class_["value"], level=class_["level"], classId=class_["classId"])
+    _strings(dsi, f"{COMMON}generalComment", data_set_information["generalComment"])
+    reference_flow = information["quantitativeReference"]["referenceToReferenceFlow"][0]
+    _element(_element(info, "quantitativeReference"), "referenceToReferenceFlow", reference_flow)
+    _element(_element(info, "time"), f"{COMMON}dataSetValidUntil", information["time"]["dataSetValidUntil"])
+
+    other = _element(_element(_element(root, "modellingAndValidation"), "LCIMethodAndAllocation"), f"{COMMON}other")
+    for any_ in process["modellingAndValidation"]["LCIMethodAndAllocation"]["other"]["anies"]:
+        _element(other, f"{EPD}{any_['name']}", any_["value"])
+
+    administrative = _element(root, "administrativeInformation")
+    data_entry_by = _element(administrative, "dataEntryBy")
+    for reference in process["administrativeInformation"]["dataEntryBy"]["referenceToDataSetFormat"]:
+        _strings(_element(data_entry_by, f"{COMMON}referenceToDataSetFormat"), f"{COMMON}shortDescription", reference["shortDescription"])
+    version = process["administrativeInformation"]["publicationAndOwnership"]["dataSetVersion"]
+    _element(_element(administrative, "publicationAndOwnership"), f"{COMMON}dataSetVersion", version)
+
+    exchanges = _element(root, "exchanges")
+    for exchange in process["exchanges"]["exchange"]:
+        element = _element(exchanges, "exchange", dataSetInternalID=exchange["dataSetInternalID"])
+        _element(element, "referenceToFlowDataSet", refObjectId=flow_uuid)
+        _element(element, "meanAmount", exchange["flowProperties"][0]["meanValue"])
+
+    results = _element(root, "LCIAResults")
+    for result in process["LCIAResults"]["LCIAResult"]:
+        element = _element(results, "LCIAResult")
+        method = _element(element, "referenceToLCIAMethodDataSet", refObjectId=str(uuid.uuid5(uuid.NAMESPACE_OID, result["referenceToLCIAMethodDataSet"]["shortDescription"][0]["value"])))
+        _strings(method, f"{COMMON}shortDescription", result["referenceToLCIAMethodDataSet"]["shortDescription"])
+        other = _element(element, f"{COMMON}other")
+        for any_ in result["other"]["anies"]:
+            if "module" in any_:
+                attrib = {f"{EPD}module": any_["module"]}
+                if "scenario" in any_:
+                    attrib[f"{EPD}scenario"] = any_["scenario"]
+                ET.SubElement(other, f"{EPD}amount", attrib).text = any_["value"]
+            else:
+                _strings(_element(other, f"{EPD}referenceToUnitGroupDataSet"), f"{COMMON}shortDescription", any_["value"]["shortDescription"])
+    return root
+
+
+def synthetic_archive(path, processes, unit="kg", with_units=True, seed=0):
+    """
+    Write the process datasets of synthetic_process() to an ILCD ZIP archive
+    at `path`, all with the same reference flow in `unit`. Without
+    `with_units` the flow property and unit group datasets are left out, so
+    the reference unit can't be found in the archive.
+    """
+    rng = random.Random(seed)
+    flow_uuid, flow_property_uuid, unit_group_uuid = (str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(3))
+    flow = ET.Element(f"{{{ILCD}/Flow}}flowDataSet")
+    _element(_element(_element(flow, "flowInformation"), "quantitativeReference"), "referenceToReferenceFlowProperty", 0)
+    flow_property = _element(_element(flow, "flowProperties"), "flowProperty", dataSetInternalID=0)
+    _element(flow_property, "referenceToFlowPropertyDataSet", refObjectId=flow_property_uuid)
+    _element(flow_property, "meanValue", 1.0)
+    datasets = {f"ILCD/flows/{flow_uuid}.xml": flow}
+    if with_units:
+        flow_property = ET.Element(f"{{{ILCD}/FlowProperty}}flowPropertyDataSet")
+        reference = _element(_element(flow_property, "flowPropertiesInformation"), "quantitativeReference")
+        _element(reference, "referenceToReferenceUnitGroup", refObjectId=unit_group_uuid)
+        unit_group = ET.Element(f"{{{ILCD}/UnitGroup}}unitGroupDataSet")
+        _element(_element(_element(unit_group, "unitGroupInformation"), "quantitativeReference"), "referenceToReferenceUnit", 0)
+        _element(_element(_element(unit_group, "units"), "unit", dataSetInternalID=0), "name", unit)
+        datasets[f"ILCD/flowproperties/{flow_property_uuid}.xml"] = flow_property
+        datasets[f"ILCD/unitgroups/{unit_group_uuid}.xml"] = unit_group
+    for process in processes:
+        version = process["administrativeInformation"]["publicationAndOwnership"]["dataSetVersion"]
+        name = f'ILCD/processes/{process["processInformation"]["dataSetInformation"]["UUID"]}_{version}.xml'
+        datasets[name] = _process_xml(process, flow_uuid)
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, root in datasets.items():
+            archive.writestr(name, ET.tostring(root, encoding="utf-8", xml_declaration=True))
+    return path
@@ -0,0 +1,59 @@
+import json
+import os
+from pathlib import Path
+
+
+def dumps(element, compact=False):
+    if compact:
+        return json.dumps(element, ensure_ascii=False, separators=(",", ":"))
+    return json.dumps(element, ensure_ascii=False, indent=4)
+
+
+class BundleWriter:
+    """
+    Streams LCAByg graph elements (nodes and edges) into a single JSON file.
+
+    Elements are written as they are added, so a bundle of thousands of EPDs
+    is never held in memory. The bundle is written to a temporary file next
+    to `path` and renamed into place on close, so readers never see a
+    half-written bundle. If the block fails, the temporary file is removed.
+
+        with BundleWriter(path, compact=True) as bundle:
+            bundle.add(generate_graph(stages))
+    """
+
+    def __init__(self, path, compact=False):
+        self.path = Path(path)
+        self.compact = compact
+        self.count = 0
+        self._tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        self._file = None
+
+    def __enter__(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self._tmp_path, "w", encoding="utf-8")
+        self._file.write("[")
+        return self
+
+    def add(self, elements):
+        self.add_serialized(dumps(element, self.compact) for element in elements)
+
+    def add_serialized(self, texts):
+        # Elements that were already serialized with dumps(), e.g. by a worker process.
+        for text in texts:
+            if not self.compact:
+                text = "\n" + text
+            self._file.write(("," if self.count else "") + text)
+            self.count += 1
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self._file.close()
+            self._tmp_path.unlink(missing_ok=True)
+            return False
+        self._file.write("\n]\n" if not self.compact else "]\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+        return False
@@ -0,0 +1,237 @@
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+
+from appdirs import AppDirs
+
+settings = {
+    "enabled": True,
+    "path": Path(AppDirs("EPDtoLCAByg").user_cache_dir) / "processes",
+    "ttl": 7 * 24 * 3600,
+    "max_size": 500 * 1024 ** 2,
+}
+
+_cache = None
+_lock = threading.Lock()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    node TEXT NOT NULL,
+    uuid TEXT NOT NULL,
+    version TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL,
+    PRIMARY KEY (node, uuid, version)
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at);
+CREATE INDEX IF NOT EXISTS entries_digest ON entries (digest);
+"""
+
+CacheEntry = namedtuple(
+    "CacheEntry",
+    ["node", "uuid", "version", "digest", "etag", "last_modified", "fetched_at", "size"],
+)
+
+
+class ProcessCache:
+    """
+    Content-addressed store of downloaded process datasets.
+
+    The body of every response is saved once under its SHA-256 digest and an
+    SQLite index maps (node, uuid, dataSetVersion) to it together with the
+    ETag/Last-Modified validators. Entries older than `ttl` seconds must be
+    revalidated with the node, and the least recently used entries are
+    evicted once the blobs take up more than `max_size` bytes.
+    """
+
+    def __init__(self, path, ttl, max_size):
+        self.path = Path(path)
+        self.blobs = self.path / "blobs"
+        self.blobs.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path / "index.sqlite3", check_same_thread=False, isolation_level=None)
+        self._db.executescript(_SCHEMA)
+
+    def _blob_path(self, digest):
+        return self.blobs / digest[:2] / f"{digest}.json"
+
+    def lookup(self, node, uuid, version=None):
+        """
+        Return the cached entry for a dataset, the newest one if no version is given.
+        """
+        query = "SELECT node, uuid, version, digest, etag, last_modified, fetched_at, size FROM entries WHERE node = ? AND uuid = ?"
+        args = [node, uuid]
+        if version:
+            query += " AND version = ?"
+            args.append(version)
+        query += " ORDER BY fetched_at DESC LIMIT 1"
+        with self._lock:
+            row = self._db.execute(query, args).fetchone()
+        if row is None:
+            return None
+        entry = CacheEntry(*row)
+        if not self._blob_path(entry.digest).exists():
+            self.discard(entry)
+            return None
+        return entry
+
+    def is_fresh(self, entry):
+        return time.time() - entry.fetched_at < self.ttl
+
+    def read(self, entry):
+        with self._lock:
+            self._db.execute(
+                "UPDATE entries SET accessed_at = ? WHERE node = ? AND uuid = ? AND version = ?",
+                (time.time(), entry.node, entry.uuid, entry.version),
+            )
+        return self._blob_path(entry.digest).read_bytes()
+
+    def read_digest(self, digest):
+        # Content shared by another entry, e.g. the same dataset on another node.
+        try:
+            return self._blob_path(digest).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def peek(self, entry):
+        # Like read(), but doesn't count as a use for the LRU eviction.
+        return self._blob_path(entry.digest).read_bytes()
+
+    def entries(self):
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT node, uuid, version, digest, etag, last_modified, fetched_at, size FROM entries"
+            ).fetchall()
+        return [CacheEntry(*row) for row in rows if self._blob_path(row[3]).exists()]
+
+    def revalidated(self, entry):
+        # The node answered 304 Not Modified, so the entry is fresh again.
+        with self._lock:
+            now = time.time()
+            self._db.execute(
+                "UPDATE entries SET fetched_at = ?, accessed_at = ? WHERE node = ? AND uuid = ? AND version = ?",
+                (now, now, entry.node, entry.uuid, entry.version),
+            )
+
+    def put(self, node, uuid, version, body, etag=None, last_modified=None):
+        digest = hashlib.sha256(body).hexdigest()
+        blob_path = self._blob_path(digest)
+        if not blob_path.exists():
+            blob_path.parent.mkdir(exist_ok=True)
+            tmp_path = blob_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(body)
+            os.replace(tmp_path, blob_path)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (node, uuid, version or "", digest, etag, last_modified, now, now, len(body)),
+            )
+        self.evict()
+        return digest
+
+    def discard(self, entry):
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM entries WHERE node = ? AND uuid = ? AND version = ?",
+                (entry.node, entry.uuid, entry.version),
+            )
+            self._remove_unreferenced(entry.digest)
+
+    def _remove_unreferenced(self, digest):
+        # Blobs are shared between entries with identical content.
+        if self._db.execute("SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,)).fetchone() is None:
+            self._blob_path(digest).unlink(missing_ok=True)
+            return True
+        return False
+
+    def total_size(self):
+        with self._lock:
+            return self._total_size()
+
+    def _total_size(self):
+        row = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT MAX(size) AS size FROM entries GROUP BY digest)"
+        ).fetchone()
+        return row[0]
+
+    def evict(self):
+        """
+        Drop least recently used entries until the cache fits in max_size.
+        """
+        with self._lock:
+            total = self._total_size()
+            if total <= self.max_size:
+                return
+            rows = self._db.execute(
+                "SELECT node, uuid, version, digest, size FROM entries ORDER BY accessed_at"
+            ).fetchall()
+            for node, uuid, version, digest, size in rows:
+                if total <= self.max_size:
+                    break
+                self._db.execute(
+                    "DELETE FROM entries WHERE node = ? AND uuid = ? AND version = ?",
+                    (node, uuid, version),
+                )
+                if self._remove_unreferenced(digest):
+                    total -= size
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM entries")
+            shutil.rmtree(self.blobs, ignore_errors=True)
+            self.blobs.mkdir(parents=True, exist_ok=True)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def configure(**kwargs):
+    """
+    Change the cache settings (enabled, path, ttl, max_size).
+    """
+    global _cache
+    unknown = set(kwargs) - set(settings)
+    if unknown:
+        raise TypeError(f"Unknown cache settings: {', '.join(sorted(unknown))}")
+    with _lock:
+        settings.update({key: value for key, value in kwargs.items() if value is not None})
+        if _cache is not None:
+            _cache.close()
+            _cache = None
+
+
+def get_cache():
+    """
+    Return the shared process cache, or None if caching is turned off.
+    """
+    global _cache
+    if not settings["enabled"]:
+        return None
+    with _lock:
+        if _cache is None:
+            _cache = ProcessCache(settings["path"], settings["ttl"], settings["max_size"])
+        return _cache
+
+
+def clear_cache():
+    if _cache is not None:
+        _cache.clear()
+        return
+    if not Path(settings["path"]).exists():
+        return
+    cache = ProcessCache(settings["path"], settings["ttl"], settings["max_size"])
+    cache.clear()
+    cache.close()
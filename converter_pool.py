@@ -0,0 +1,60 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import log
+from bundle import dumps
+from epd_data import MappingError, convert_to_lcabyg, generate_graph
+
+_my_header = {}
+
+
+def _init_worker(my_header):
+    global _my_header
+    _my_header = my_header
+    log.quiet_worker()
+
+
+def convert_file(task):
+    """
+    Convert one saved process JSON file in a worker process.
+
+    Returns a dict with the EPD's name, UUID and version and the serialized
+    output: the Stage.json text per module, or the bundle elements. Errors
+    are returned, not raised, so one bad file doesn't stop the pool.
+    """
+    path, nodeid, base_url, bundle, compact = task
+    result = {"path": path, "nodeid": nodeid, "error": None, "mapping": None}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            process_json = json.load(f)
+        information = process_json["processInformation"]["dataSetInformation"]
+        result["uuid"] = information["UUID"]
+        result["name"] = information["name"]["baseName"][0]["value"]
+        result["version"] = process_json["administrativeInformation"]["publicationAndOwnership"].get("dataSetVersion", "")
+        uri = base_url + "processes/" + result["uuid"]
+        result["url"] = uri
+        stages = convert_to_lcabyg(process_json, uri, _my_header, nodeid, interactive=False)
+        if bundle:
+            result["graph"] = [dumps(element, compact) for element in generate_graph(stages)]
+        else:
+            result["stages"] = [(stage[2], json.dumps(stage[0], ensure_ascii=False, indent=4)) for stage in stages]
+    except MappingError as err:
+        result["error"] = err.message
+        result["mapping"] = {"field": err.field, "found": err.found}
+    except Exception as err:
+        result["error"] = f"{type(err).__name__}: {err}"
+    return result
+
+
+def convert_files(paths, nodeid, base_url, my_header, jobs=None, bundle=False, compact=False):
+    """
+    Convert saved process JSON files on a pool of `jobs` processes (default:
+    one per CPU). Results are yielded in the order of `paths`, so the output
+    doesn't depend on which worker finishes first.
+    """
+    tasks = [(str(path), nodeid, base_url, bundle, compact) for path in paths]
+    jobs = jobs or os.cpu_count() or 1
+    chunksize = max(1, min(32, len(tasks) // (jobs * 4)))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(my_header,)) as pool:
+        yield from pool.map(convert_file, tasks, chunksize=chunksize)
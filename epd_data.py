@@ -1,166 +1,270 @@
-from operator import mod
-from unittest import result
-import requests
+import hashlib
 import json
+import logging
+import sys
 import click
-from nested_lookup import nested_lookup, get_occurrences_and_values
-# from ndicts.ndicts import DataDict, NestedDict
-import pandas as pd
-import xmltodict
-from pprint import pprint
-import copy
 import uuid
+from array import array
+import mapping
+import profiling
+import unit_groups
+from lcabygJSON_templates import new_product, new_product_to_stage, new_stage
+from log import get_logger
 try:
     from termcolor import colored
 except ImportError:
     colored = None
-def find_modules(modules):
-    module_list = ["A1to3"]
-    modules.difference_update({"A1-A3", "A1", "A2", "A3"})
-    for module in modules:
-        module_list.append(module)
-    return module_list
 
+logger = get_logger("epd_data")
 
-def generate_stage_spec(stage, name, module, indicators):
-    module_stage = copy.deepcopy(stage)
+
+class ConversionError(click.ClickException):
+    """Raised when an EPD cannot be converted without asking the user."""
+
+
+class ConversionCancelled(ConversionError):
+    """Raised when the user quits at a prompt during a conversion."""
+
+    exit_code = 0
+
+    def __init__(self):
+        super().__init__("Conversion cancelled.")
+
+    def show(self, file=None):
+        click.echo("Goodbye", file=file)
+
+
+class MappingError(ConversionError):
+    """Raised when a field of an EPD has no match in the mapping table."""
+
+    def __init__(self, field, found, message):
+        super().__init__(message)
+        self.field = field
+        self.found = found
+
+
+A1TO3_MODULES = ("A1-A3", "A1", "A2", "A3")
+
+
+class Indicator:
+    """
+    The declared values of one LCIA indicator of an EPD.
+
+    `modules` and `scenarios` are tuples of interned strings ("" for no
+    scenario), `values` the matching float64 values in an array.
+    """
+
+    __slots__ = ("code", "name", "unit", "modules", "scenarios", "values")
+
+    def __init__(self, code, name, unit, modules, scenarios, values):
+        self.code = code
+        self.name = name
+        self.unit = unit
+        self.modules = modules
+        self.scenarios = scenarios
+        self.values = values
+
+    @property
+    def total(self):
+        return sum(self.values)
+
+    def __repr__(self):
+        return f"Indicator({self.code!r}, unit={self.unit!r}, modules={len(self.values)})"
+
+
+class EPD:
+    """
+    What the conversion needs of a process dataset, without the dataset.
+
+    Built once with EPD.from_json(); the raw JSON can be dropped right
+    after, so holding thousands of EPDs for a batch only costs their
+    indicator values and a few strings each.
+    """
+
+    __slots__ = (
+        "uuid", "version", "name", "comment", "valid_until", "classes",
+        "mean_value", "reference_unit", "flow_property_uuid", "data_set_format",
+        "subtype", "indicators",
+    )
+
+    def __init__(self, uuid, version, name, comment, valid_until, classes, mean_value,
+                 reference_unit, flow_property_uuid, data_set_format, subtype, indicators):
+        self.uuid = uuid
+        self.version = version
+        self.name = name
+        self.comment = comment
+        self.valid_until = valid_until
+        self.classes = classes
+        self.mean_value = mean_value
+        self.reference_unit = reference_unit
+        self.flow_property_uuid = flow_property_uuid
+        self.data_set_format = data_set_format
+        self.subtype = subtype
+        self.indicators = indicators
+
+    @classmethod
+    def from_json(cls, process_json):
+        information = process_json["processInformation"]["dataSetInformation"]
+        administrative = process_json["administrativeInformation"]
+
+        reference_flow = process_json["processInformation"]["quantitativeReference"]["referenceToReferenceFlow"][0]
+        exchange = [i for i in process_json["exchanges"]["exchange"] if i["dataSetInternalID"] == reference_flow][0]
+        flow_properties = exchange["flowProperties"]
+        reference_units = [i["referenceUnit"] for i in flow_properties if "referenceUnit" in i]
+
+        subtypes = [i for i in process_json["modellingAndValidation"]["LCIMethodAndAllocation"]["other"]["anies"] if i["name"] == "subType"]
+
+        return cls(
+            uuid=information["UUID"],
+            version=administrative["publicationAndOwnership"]["dataSetVersion"],
+            name=str(information["name"]["baseName"][0]["value"]),
+            comment=information["generalComment"][0]["value"],
+            valid_until=process_json["processInformation"]["time"]["dataSetValidUntil"],
+            classes=tuple((system, {key: class_[key] for key in ("level", "classId", "value") if key in class_})
+                          for system, class_ in mapping.classes(process_json)),
+            mean_value=float(flow_properties[0]["meanValue"]),
+            reference_unit=reference_units[0] if reference_units else None,
+            flow_property_uuid=flow_properties[0].get("uuid"),
+            data_set_format=administrative["dataEntryBy"]["referenceToDataSetFormat"][0]["shortDescription"][0]["value"],
+            subtype=subtypes[0]["value"].lower(),
+            indicators=indicators_from_json(process_json),
+        )
+
+    def __repr__(self):
+        return f"EPD({self.uuid!r}, {self.name!r}, indicators={len(self.indicators)})"
+
+
+def indicators_from_json(process_json):
+    """
+    Return the Indicators of a process dataset's LCIA results. Needs nothing
+    else of the dataset, unlike EPD.from_json().
+    """
+    # A repeated indicator replaces the earlier one.
+    indicators = {}
+    for obj in process_json["LCIAResults"]["LCIAResult"]:
+        try:
+            indicator_name = obj["referenceToLCIAMethodDataSet"]["shortDescription"][0]["value"]
+        except KeyError:
+            raise ConversionError("Couldn't find indicator name. Check the file manually.")
+        unit = ""
+        modules, scenarios, values = [], [], array("d")
+        for i in obj["other"]["anies"]:
+            if "module" in i:
+                modules.append(sys.intern(str(i["module"])))
+                scenarios.append(sys.intern(str(i.get("scenario", ""))))
+                values.append(float(i["value"]))
+            elif "name" in i and not unit:
+                unit = i["value"]["shortDescription"][0]["value"]
+        code = sys.intern(indicator_code(indicator_name))
+        indicators[code] = Indicator(code, indicator_name, sys.intern(unit), tuple(modules), tuple(scenarios), values)
+    return tuple(indicators.values())
+
+
+def generate_stage_spec(stage, name, module, matrix):
+    module_stage = new_stage()
+    fields = module_stage[0]["Node"]["Stage"]
+    indicators = fields["indicators"]
+    fields.update(stage[0]["Node"]["Stage"])
+    fields["name"] = dict(fields["name"])
+    fields["indicators"] = indicators
     stage_uuid = module_stage[0]["Node"]["Stage"]["id"] = str(uuid.uuid4())
     module_stage[0]["Node"]["Stage"]["stage"] = module
 
-    # click.echo(f"\n {module}")
-
+    column = matrix.column(module)
     for indicator in module_stage[0]["Node"]["Stage"]["indicators"]:
-        click.echo(f"\n {indicator}")
-        if indicator in indicators:
-            # for dict in indicators[indicator]["Emissions"][0]:
-            #     click.echo(dict)
-            #     click.echo(dict["module"])
-            tot_val = 0
-            if module == "A1to3":
-                values = [i for i in indicators[indicator]["Emissions"][0] if i["module"] in ["A1-A3", "A1", "A2", "A3"]]
-                # click.echo(f"\n {values}")
-                for val in values:
-                    tot_val += float(val["value"])
-            elif module != "A1to3":
-                # click.echo(f"not a1to3: {module}")
-                values = [i for i in indicators[indicator]["Emissions"][0] if i["module"] in [f"{module}"]]
-                # click.echo(f"\n elif {values}")
-                # click.echo(indicators[indicator]["Emissions"][0])
-                # tot_val = indicators[indicator]["Emissions"][module]
-                for val in values:
-                    tot_val += float(val["value"])
-            click.echo(f"{module}: {tot_val}")
-
-            module_stage[0]["Node"]["Stage"]["indicators"][f"{indicator}"] = tot_val
+        if indicator in column:
+            module_stage[0]["Node"]["Stage"]["indicators"][f"{indicator}"] = column[indicator]
     return module_stage, name, module
 
-def generate_stage_gen(process_json, uri, my_header, nodeid):
-    indicators, _, modules = pprint_indicators(process_json, module_flag='y')
-    print(indicators)
-    with open('lcabygJSON_templates/Stage.json', 'r') as f:
-        stage = json.load(f)
+def reference_unit(epd, uri, my_header, nodeid, offline=False):
+    # The unit is in the dataset, or in the unit group of its reference flow property.
+    if epd.reference_unit is not None:
+        return epd.reference_unit
+    unit_uri = uri.split("processes")[0] + "unitgroups/" + epd.flow_property_uuid
+    headers = None if "oekobaudat" in unit_uri else my_header
+    return unit_groups.resolve(nodeid, unit_uri, headers, offline=offline)
 
-    name = stage[0]["Node"]["Stage"]["name"]["English"] = str(process_json["processInformation"]["dataSetInformation"]["name"]["baseName"][0]["value"])
+def generate_stage_gen(epd, uri, my_header, nodeid, interactive=True, offline=False):
+    matrix = indicator_matrix(epd)
+    logger.debug("%r of %s", matrix, epd.uuid)
+    stage = new_stage()
+
+    name = stage[0]["Node"]["Stage"]["name"]["English"] = epd.name
     name_danish = stage[0]["Node"]["Stage"]["name"]["Danish"] = name +"_DK"
     # try:
     #     name = [i for i in process_json["processInformation"]["dataSetInformation"]["name"]["baseName"] if i["lang"]=="en"][0]["value"]
     # except KeyError or IndexError:
     #     pass
-    lcabyg_hyper_categories = ["Mineralske_byggematerialer", "Isoleringsmaterialer", "Træ", "Metaller","Overfladebehandlinger","Plast","Komponenter_til_vinduer_og_glasfacader","Bygningsinstallationer","Andet","Kompositter","Endt_levetid"]
-    if nodeid == "OEKOBAU.DAT":
-        class_ = [i for i in process_json["processInformation"]["dataSetInformation"]["classificationInformation"]["classification"][0]["class"] if i["level"] == 0]
-        print("classId: ", class_)
-        print(class_[0]["classId"], class_[0]["value"])
-        classId = class_[0]["classId"]
-        className = class_[0]["value"]
-        lcabyg_class = lcabyg_hyper_categories[int(classId)-1]
-        click.secho(f'Matched ökobau category: "{classId, className} to LcaByg hyper category: "{lcabyg_class}"', fg="green")
-        stage[0]["Node"]["Stage"]["hyper_category"] = lcabyg_class
+    table = mapping.get_table()
+    lcabyg_hyper_categories = table.hyper_categories
+    lcabyg_class, class_ = table.hyper_category(epd.classes, nodeid)
+    if lcabyg_class:
+        logger.info('Matched category: "%s" to LcaByg hyper category: "%s"', (class_.get("classId"), class_.get("value")), lcabyg_class, extra={"uuid": epd.uuid})
+    elif not interactive:
+        found = [class_.get("value") for _, class_ in epd.classes]
+        raise MappingError("hyper_category", found, f"Cannot match classification type {found} to a LcaByg hyper category. See more about the EPD here: {uri}")
     else:
-        choices = ["0", "1", "2", "3", "4", "5", "6", "7", "8", "9", "10"]
+        choices = [str(i) for i in range(len(lcabyg_hyper_categories))]
         lcabyg_hyper_categories_prompt = list(zip(choices, lcabyg_hyper_categories))
-        try:
-            classificationInformation = [i for i in process_json["processInformation"]["dataSetInformation"]["classificationInformation"]["classification"] if "value" in i["class"][0]][0]
-        except KeyError:
-            choice = click.prompt(
-            click.style(f'Cannot find any classification information. Do you want do try to match a LcaByg classification category anyway?\nSee more about the EPD here: {uri}', fg='red'),
-            type=click.Choice(['y', 'n']), 
-            default = 'y',
-            show_choices=True
-        )
+        classificationInformation = [class_ for _, class_ in epd.classes if "value" in class_]
+        if not classificationInformation:
+            with profiling.span("prompt"):
+                choice = click.prompt(
+                click.style(f'Cannot find any classification information. Do you want do try to match a LcaByg classification category anyway?\nSee more about the EPD here: {uri}', fg='red'),
+                type=click.Choice(['y', 'n']), 
+                default = 'y',
+                show_choices=True
+            )
             if choice == "n":
-                click.echo("Goodbye")
-                exit()
-            else:
+                raise ConversionCancelled()
+            with profiling.span("prompt"):
                 class_choice = click.prompt(
                 click.style(f'\nWhich LcaByg classification category does it match? \n{lcabyg_hyper_categories_prompt}'),
                 type=click.Choice(choices+ ["q"]),
                 show_choices=True
             )
-        classificationInformation = json.dumps(classificationInformation, indent=4, ensure_ascii=False)
-        
-        class_choice = click.prompt(
-        click.style(f'Cannot match classification type. Found this classification information: \n{classificationInformation}. \nWhich LcaByg classification category does it match? \n{lcabyg_hyper_categories_prompt}', fg='red'),
-        type=click.Choice(choices+ ["q"]),
-        show_choices=True
-    )
+        else:
+            with profiling.span("prompt"):
+                class_choice = click.prompt(
+                click.style(f'Cannot match classification type. Found this classification information: \n{json.dumps(classificationInformation, indent=4, ensure_ascii=False)}. \nWhich LcaByg classification category does it match? \n{lcabyg_hyper_categories_prompt}', fg='red'),
+                type=click.Choice(choices+ ["q"]),
+                show_choices=True
+            )
         if class_choice == "q":
-            click.echo("Goodbye")
-            exit()
+            raise ConversionCancelled()
         lcabyg_class = lcabyg_hyper_categories[int(class_choice)]
         click.secho(f'You chose LcaByg category: "{lcabyg_class}".', fg='green')
-        stage[0]["Node"]["Stage"]["hyper_category"] = lcabyg_class
+        if classificationInformation:
+            # Remember the answer for the most specific class of the EPD.
+            table.learn("class_names", classificationInformation[0]["value"], lcabyg_class)
+    stage[0]["Node"]["Stage"]["hyper_category"] = lcabyg_class
     
-    stage[0]["Node"]["Stage"]["comment"] = process_json["processInformation"]["dataSetInformation"]["generalComment"][0]["value"]
-    valid_to = process_json["processInformation"]["time"]["dataSetValidUntil"]
+    stage[0]["Node"]["Stage"]["comment"] = epd.comment
+    valid_to = epd.valid_until
     if len(str(valid_to)) == 4 and str(valid_to).isdigit():
         valid_to = str(valid_to) + "-01-01"
     stage[0]["Node"]["Stage"]["valid_to"] = valid_to
     
-    referenceToReferenceFlow = process_json["processInformation"]["quantitativeReference"]["referenceToReferenceFlow"][0]
-    referenceToFlowDataSet = [i for i in process_json["exchanges"]["exchange"] if i["dataSetInternalID"]==referenceToReferenceFlow]
-    meanValue = referenceToFlowDataSet[0]["flowProperties"][0]["meanValue"]
+    meanValue = epd.mean_value
     try:
-        flowProperties = [i for i in referenceToFlowDataSet[0]["flowProperties"] if "referenceUnit" in i]
-        if flowProperties:
-            referenceUnit = flowProperties[0]["referenceUnit"]
-        else:
-            raise KeyError
-    except KeyError:
-        try:
-            flowProperties_unitgroup = referenceToFlowDataSet[0]["flowProperties"][0]["uuid"]
-            unit_uri = uri.split("processes")[0] + "unitgroups/" + flowProperties_unitgroup
-            flow_params = {"format": "JSON"}
-            if "oekobaudat" in unit_uri:
-                response = requests.get(
-                    unit_uri, params=flow_params
-                )
-            else:
-                response = requests.get(
-                unit_uri, params=flow_params, headers=my_header
-            )
-                print(response)
-            unitGroup = json.loads(response.text)
-            print(json.dumps(unitGroup, indent=4))
-            referenceToReferenceUnit = unitGroup["unitGroupInformation"]["quantitativeReference"]["referenceToReferenceUnit"]
-            referenceUnit = unitGroup["units"]["unit"][referenceToReferenceUnit]["name"]
-        except Exception as e:
-            print(e)
-            click.secho("Couldn't find 'Reference Unit'", fg="red")
-    if referenceUnit in ["qm", "QM"]:
-        referenceUnit = "M2"
-    if referenceUnit in ["pcs", "pcs.", "PCS", "PCS."]:
-        referenceUnit = "STK"
-    if referenceUnit in ["ton", "TON", "Ton", "t", "tonne", "Tonne", "TONNE", "Mg"]:
-        referenceUnit = "TON"
-    accepted_units = ["KG", "M", "M2", "M3", "STK", "L", "TON"]
-    if referenceUnit.upper() not in accepted_units:
-        referenceUnit = click.prompt(
-        click.style(f"Cannot match unit. Found unit: {referenceUnit.upper()}. Which of the accepted units does it match?", fg='red'),
-        type=click.Choice(accepted_units, case_sensitive=False),
-        show_choices=True
-    )
-        click.secho(f"You chose {referenceUnit.upper()}.", fg='green')
+        referenceUnit = reference_unit(epd, uri, my_header, nodeid, offline=offline)
+    except Exception as e:
+        logger.warning("Couldn't find 'Reference Unit': %s", e, extra={"uuid": epd.uuid})
+        referenceUnit = ""
+    unit = table.unit(referenceUnit)
+    if unit is None:
+        if not interactive:
+            raise MappingError("unit", referenceUnit, f"Cannot match unit. Found unit: {referenceUnit.upper()}.")
+        with profiling.span("prompt"):
+            unit = click.prompt(
+            click.style(f"Cannot match unit. Found unit: {referenceUnit.upper()}. Which of the accepted units does it match?", fg='red'),
+            type=click.Choice(table.units, case_sensitive=False),
+            show_choices=True
+        )
+        click.secho(f"You chose {unit.upper()}.", fg='green')
+        if referenceUnit:
+            table.learn("unit_aliases", referenceUnit, unit.upper())
+    referenceUnit = unit.upper()
     stage[0]["Node"]["Stage"]["stage_unit"] = referenceUnit.upper()
     stage[0]["Node"]["Stage"]["indicator_unit"] = referenceUnit.upper()
 
@@ -170,106 +274,178 @@ def generate_stage_gen(process_json, uri, my_header, nodeid):
         stage[0]["Node"]["Stage"]["indicator_unit"] = "KG"
         stage[0]["Node"]["Stage"]["indicator_factor"] = meanValue * 1000
 
-    stage[0]["Node"]["Stage"]["external_source"] = process_json["administrativeInformation"]["dataEntryBy"]["referenceToDataSetFormat"][0]["shortDescription"][0]["value"]
-    stage[0]["Node"]["Stage"]["external_id"] = process_json["processInformation"]["dataSetInformation"]["UUID"]
-    stage[0]["Node"]["Stage"]["external_version"] = process_json["administrativeInformation"]["publicationAndOwnership"]["dataSetVersion"]
+    stage[0]["Node"]["Stage"]["external_source"] = epd.data_set_format
+    stage[0]["Node"]["Stage"]["external_id"] = epd.uuid
+    stage[0]["Node"]["Stage"]["external_version"] = epd.version
     stage[0]["Node"]["Stage"]["external_url"] = uri
-    data_type = [i for i in process_json["modellingAndValidation"]["LCIMethodAndAllocation"]["other"]["anies"] if i["name"]=="subType"]
-    data_type = data_type[0]["value"].lower()
-    accepted_data_types = ["Generic", "Specific", "Skabelon", "Repræsentativt", "Gennemsnitligt"]
-    if "specific" in data_type:
-        data_type = "Specific"
-    elif "generic" in data_type:
-        data_type = "Generic"
-    elif "average" in data_type:
-        data_type = "Gennemsnitligt"
-    elif "representative" in data_type:
-        data_type = "Repræsentativt"
-    elif "template" in data_type:
-        data_type = "Skabelon"
-    else:
-        data_type_index = click.prompt(
-        click.style(f'Cannot match dataset type. Found dataset type: {data_type}. Which of the accepted dataset types does it match? \n{accepted_data_types}', fg='red'),
-        type=click.Choice(["0", "1", "2", "3", "4"]),
-        show_choices=True
-    )
+    subtype = epd.subtype
+    accepted_data_types = table.data_types
+    data_type = table.data_type(subtype)
+    if data_type is None and not interactive:
+        raise MappingError("data_type", subtype, f"Cannot match dataset type. Found dataset type: {subtype}.")
+    elif data_type is None:
+        with profiling.span("prompt"):
+            data_type_index = click.prompt(
+            click.style(f'Cannot match dataset type. Found dataset type: {subtype}. Which of the accepted dataset types does it match? \n{accepted_data_types}', fg='red'),
+            type=click.Choice([str(i) for i in range(len(accepted_data_types))]),
+            show_choices=True
+        )
         data_type = accepted_data_types[int(data_type_index)]
         click.secho(f"You chose {data_type}.", fg='green')
+        table.learn("data_type_keywords", subtype, data_type)
     stage[0]["Node"]["Stage"]["data_type"] = data_type
 
 
-    modules = find_modules(modules)
     results = []
-    for module in modules:
-        # module_stage, module_name = 
-        results.append(generate_stage_spec(stage, name, module, indicators))
-    for i in results:
-        print("\n\n######\n")
-        print(i[1])
-        print(json.dumps(i[0], indent=4, ensure_ascii=False))
+    with profiling.span("generate_stage_spec", uuid=epd.uuid):
+        for module in matrix.stage_modules:
+            results.append(generate_stage_spec(stage, name, module, matrix))
+    # Serializing every stage is only worth it if someone reads it.
+    if logger.isEnabledFor(logging.DEBUG):
+        for i in results:
+            logger.debug("Stage %s of %s:\n%s", i[2], i[1], json.dumps(i[0], indent=4, ensure_ascii=False))
 
     return results
 
-def generate_product():
-    with open('lcabygJSON_templates/Product.json', 'r') as f:
-        product = json.load(f)
+def generate_product(name, comment=""):
+    product = new_product()
+    product[0]["Node"]["Product"]["id"] = str(uuid.uuid4())
+    product[0]["Node"]["Product"]["name"]["English"] = name
+    product[0]["Node"]["Product"]["name"]["Danish"] = name +"_DK"
+    product[0]["Node"]["Product"]["comment"] = comment
+    return product
 
-def convert_to_lcabyg(process_json, uri, my_header, nodeid):
-    
-    
-    with open('lcabygJSON_templates/ProductToStage.json', 'r') as f:
-        product_to_stage = json.load(f)
-    
-    results = generate_stage_gen(process_json, uri, my_header, nodeid)
+def generate_product_to_stage(product_id, stage_id):
+    edge = new_product_to_stage()
+    edge[0]["Edge"][0]["ProductToStage"]["id"] = str(uuid.uuid4())
+    edge[0]["Edge"][1] = product_id
+    edge[0]["Edge"][2] = stage_id
+    return edge
+
+def generate_graph(stages):
+    """
+    Return the LCAByg graph of a converted EPD: a Product node, its Stage
+    nodes and a ProductToStage edge from the Product to every Stage.
+    """
+    first_stage = stages[0][0][0]["Node"]["Stage"]
+    product = generate_product(stages[0][1], comment=first_stage["comment"])
+    product_id = product[0]["Node"]["Product"]["id"]
+    graph = product + [stage[0][0] for stage in stages]
+    for stage in stages:
+        graph += generate_product_to_stage(product_id, stage[0][0]["Node"]["Stage"]["id"])
+    return graph
+
+def conversion_fingerprint():
+    """
+    Digest of what a conversion depends on besides the EPD: the mapping
+    table, with the answers learned so far, and the LCAByg templates.
+    """
+    fingerprint = hashlib.sha256(json.dumps(mapping.get_table().table, sort_keys=True).encode())
+    for template in (new_stage, new_product, new_product_to_stage):
+        fingerprint.update(json.dumps(template(), sort_keys=True).encode())
+    return fingerprint.hexdigest()
+
+def convert_to_lcabyg(process_json, uri, my_header, nodeid, interactive=True, offline=False):
+    # Accepts a process dataset or an EPD built from one. With `offline`
+    # nothing is downloaded: unknown unit groups fail to match.
+    with profiling.span("convert", nodeid=nodeid), profiling.hot_path():
+        epd = process_json if isinstance(process_json, EPD) else EPD.from_json(process_json)
+        results = generate_stage_gen(epd, uri, my_header, nodeid, interactive=interactive, offline=offline)
 
     
     return results
 
 def pprint_indicators(process_json, module_flag=False):
-    
+    """
+    Return ({indicator code: Indicator}, pager lines, declared modules).
+    Modules are only collected with module_flag 'y'.
+    """
+    # Only the LCIA results: the info view also shows datasets that can't be converted.
+    epd_indicators = process_json.indicators if isinstance(process_json, EPD) else indicators_from_json(process_json)
     indicators = {}
     lines = []
     modules = set()
-    for obj in process_json["LCIAResults"]["LCIAResult"]:
-        indicator = {"Indicator": [], "Unit": [], "Emissions": [], "Total": []}
-    
-        # indicator_name = obj["referenceToLCIAMethodDataSet"]["shortDescription"][1][
-        #     "value"
-        # ]
-        try:
-            indicator_name = obj["referenceToLCIAMethodDataSet"]["shortDescription"][0][
-                "value"
-            ]
-        except KeyError:
-            click.secho("Couldn't find indicator name. Check the file manually.", fg="red")
-            exit()
-        unit_dict = [i for i in obj["other"]["anies"] if "name" in i]
-        unit = unit_dict[0]["value"]["shortDescription"][0]["value"]
+    for indicator in epd_indicators:
         line = click.style("#" * 60, fg='cyan')
-        title = click.style(f"Indicator: {indicator_name}\nUnit: {unit} \n \nEmissions: ", fg='cyan', bold=True)
+        title = click.style(f"Indicator: {indicator.name}\nUnit: {indicator.unit} \n \nEmissions: ", fg='cyan', bold=True)
         lines.append(line+"\n\n"+title)
-        emission_total = 0
-        emissions = [i for i in obj["other"]["anies"] if "module" in i]
-        for emission in emissions:
-            emission_total += float(emission["value"])
-            if module_flag == 'y':
-                lines.append(f"\n\tModule: {emission['module']}\n\tValue: {float(emission['value'])}")
-                module = emission['module']
-                # print(module)
-                modules.add(str(module))
-                try:
-                    lines.append(f"\tScenario: {emission['scenario']}")
-                except KeyError:
-                    continue
-
-        total = f"Total: {round(emission_total, 4)} {unit}"
+        if module_flag == 'y':
+            for module, scenario, value in zip(indicator.modules, indicator.scenarios, indicator.values):
+                lines.append(f"\n\tModule: {module}\n\tValue: {value}")
+                modules.add(module)
+                if scenario:
+                    lines.append(f"\tScenario: {scenario}")
+
+        total = f"Total: {round(indicator.total, 4)} {indicator.unit}"
         lines.append("\n"+click.style(str(total)+"\n", fg='cyan', bold=True))
-        indicator["Indicator"].append(f"{indicator_name}")
-        indicator["Unit"].append(f"{unit}")
-        indicator["Emissions"].append(emissions)
-        indicator["Total"].append(f"{emission_total}")
-        name_code = indicator_name.rstrip("*")[indicator_name.rfind("(") + 1: -1]
+        indicators[indicator.code] = indicator
+
+    return indicators, lines, modules
+
+def indicator_code(indicator_name):
+    # "Global Warming Potential total (GWP-total)" -> "GWP-total"
+    return indicator_name.rstrip("*")[indicator_name.rfind("(") + 1: -1]
+
 
-        indicators[f"{name_code}"] = indicator
+class IndicatorMatrix:
+    """
+    Dense indicator x module matrix of an EPD's LCIA results.
+
+    `values[i, j]` is the sum of all declared values of indicator `codes[i]`
+    in module `modules[j]` (scenarios of a module are summed). The last
+    column is the A1to3 roll-up of "A1-A3", "A1", "A2" and "A3".
+    """
+
+    def __init__(self, codes, modules, values):
+        self.codes = codes
+        self.modules = modules
+        self.values = values
+        self.rows = {code: i for i, code in enumerate(codes)}
+        self.cols = {module: j for j, module in enumerate(modules)}
+
+    @property
+    def stage_modules(self):
+        return ["A1to3"] + [module for module in self.modules if module not in A1TO3_MODULES and module != "A1to3"]
+
+    def column(self, module):
+        """
+        Return {indicator code: value} for one module. Indicators that are
+        declared, but not for this module, are 0.0.
+        """
+        j = self.cols.get(module)
+        if j is None:
+            return dict.fromkeys(self.codes, 0.0)
+        return dict(zip(self.codes, self.values[:, j].tolist()))
+
+    def __repr__(self):
+        return f"IndicatorMatrix(codes={self.codes}, modules={self.modules})"
+
+
+def indicator_matrix(epd):
+    """
+    Build the IndicatorMatrix of an EPD (or a process dataset) in a single
+    pass over its indicators.
+    """
+    import numpy as np
+
+    if not isinstance(epd, EPD):
+        epd = EPD.from_json(epd)
+    cols = {}
+    col_index = []
+    for indicator in epd.indicators:
+        col_index.extend([cols.setdefault(module, len(cols)) for module in indicator.modules])
+    cols.setdefault("A1to3", len(cols))
+
+    # Scenarios of a module land in the same cell: bincount over the flat
+    # cell index sums them, much faster than np.add.at.
+    shape = (len(epd.indicators), len(cols))
+    if epd.indicators:
+        rows = np.repeat(np.arange(shape[0]), [len(indicator.values) for indicator in epd.indicators])
+        data = np.concatenate([np.frombuffer(indicator.values) for indicator in epd.indicators])
+        values = np.bincount(rows * shape[1] + np.array(col_index, dtype=np.intp), weights=data, minlength=shape[0] * shape[1]).reshape(shape)
+    else:
+        values = np.zeros(shape)
 
-    return indicators, lines, modules
\ No newline at end of file
+    a1to3 = [cols[module] for module in A1TO3_MODULES if module in cols]
+    values[:, cols["A1to3"]] = values[:, a1to3].sum(axis=1)
+    return IndicatorMatrix([indicator.code for indicator in epd.indicators], list(cols), values)
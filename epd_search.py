@@ -0,0 +1,151 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import http_client
+from http_client import base_urls
+
+SEARCH_PARAMS = {
+    "search": "true",
+    "metaDataOnly": "false",
+    "distributed": "true",
+    "virtual": "true",
+    "format": "JSON",
+    "view": "extended",
+}
+
+
+def fetch_page(nodeid, params, headers, start_index, page_size, deadline=None):
+    page_params = dict(params, startIndex=str(start_index), pageSize=str(page_size))
+    response = http_client.get(
+        nodeid, base_urls[nodeid] + "processes/", params=page_params, headers=headers, deadline=deadline
+    )
+    response.raise_for_status()
+    return json.loads(response.text)
+
+
+def iter_search(nodeid, params, headers=None, page_size=100, limit=None):
+    """
+    Yield every process found by a search on `nodeid`, one page at a time.
+
+    The next page is requested in the background while the current one is
+    consumed, and no more than two pages are held in memory, so the whole
+    result set of a broad query can be walked lazily. Stops after `limit`
+    hits if given.
+    """
+    start_index = 0
+    yielded = 0
+    pool = ThreadPoolExecutor(max_workers=1)
+    try:
+        future = pool.submit(fetch_page, nodeid, params, headers, start_index, page_size)
+        while future is not None:
+            page = future.result()
+            hits = page.get("data", [])
+            start_index += len(hits)
+            total = page.get("totalCount")
+            if total is not None:
+                more = bool(hits) and start_index < int(total)
+            else:
+                more = len(hits) >= page_size
+            if limit is not None and yielded + len(hits) >= limit:
+                more = False
+            future = pool.submit(fetch_page, nodeid, params, headers, start_index, page_size) if more else None
+            for hit in hits:
+                if limit is not None and yielded >= limit:
+                    return
+                yield hit
+                yielded += 1
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def version_key(version):
+    # "01.02.003" -> (1, 2, 3); dataSetVersions compare field by field.
+    try:
+        return tuple(int(part) for part in str(version or "0").split("."))
+    except ValueError:
+        return (0,)
+
+
+class MergedHits:
+    """
+    Search hits of several nodes, one per UUID: the one with the highest
+    dataSetVersion, or the first one seen on a tie.
+    """
+
+    def __init__(self):
+        self.by_uuid = {}
+
+    def add(self, hit):
+        """
+        Return True if the hit is new or replaces an older version.
+        """
+        current = self.by_uuid.get(hit["uuid"])
+        if current is not None and version_key(hit.get("version")) <= version_key(current.get("version")):
+            return False
+        self.by_uuid[hit["uuid"]] = hit
+        return True
+
+    def hits(self):
+        return list(self.by_uuid.values())
+
+
+async def _search_node(nodeid, params, headers, page_size, limit, timeout, pool, on_hit):
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    deadline = time.monotonic() + timeout
+    start_index = 0
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise asyncio.TimeoutError()
+        # requests can't be cancelled: the search stops waiting at the
+        # deadline, and the request, its retries and limiter waits give
+        # up at the same deadline.
+        page = await asyncio.wait_for(
+            loop.run_in_executor(pool, fetch_page, nodeid, params, headers, start_index, page_size, deadline),
+            remaining,
+        )
+        hits = page.get("data", [])
+        for hit in hits[:None if limit is None else limit - start_index]:
+            hit.setdefault("nodeid", nodeid)
+            on_hit(nodeid, hit)
+        start_index += len(hits)
+        total = page.get("totalCount")
+        more = bool(hits) and (start_index < int(total) if total is not None else len(hits) >= page_size)
+        if not more or (limit is not None and start_index >= limit):
+            return start_index
+
+
+async def fan_out_search(nodes, params, headers_for, page_size=100, limit=None, timeout=20, on_hit=None):
+    """
+    Search `nodes` in parallel and merge the hits by UUID.
+
+    Every node gets its own non-distributed search with up to `limit` hits
+    and `timeout` seconds; headers_for(nodeid) returns its request headers.
+    on_hit(nodeid, hit, merged) is called as hits arrive, merged is True
+    when the hit is new or a newer version. Returns (MergedHits, {nodeid:
+    error}) where error is the exception of a node that failed or timed out.
+    """
+    # Imported here, like requests, to keep it out of the CLI start-up.
+    import asyncio
+
+    params = dict(params, distributed="false")
+    merged = MergedHits()
+
+    def handle(nodeid, hit):
+        added = merged.add(hit)
+        if on_hit is not None:
+            on_hit(nodeid, hit, added)
+
+    pool = ThreadPoolExecutor(max_workers=len(nodes) or 1, thread_name_prefix="fan-out")
+    try:
+        results = await asyncio.gather(
+            *(_search_node(nodeid, params, headers_for(nodeid), page_size, limit, timeout, pool, handle) for nodeid in nodes),
+            return_exceptions=True,
+        )
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    failures = {nodeid: result for nodeid, result in zip(nodes, results) if isinstance(result, BaseException)}
+    return merged, failures
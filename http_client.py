@@ -0,0 +1,175 @@
+import threading
+import time
+
+import profiling
+from rate_limit import THROTTLE_STATUSES, NodeLimiter, retry_after_seconds
+
+base_urls = {
+                "ECOPLATFORM" : "https://data.eco-platform.org/resource/",
+                "ECOSMDP": "https://ecosmdp.eco-platform.org/resource/",
+                "IBU_DATA" : "https://ibudata.lca-data.com/resource/",
+                "EPD-NORWAY_DIGI" : "https://epdnorway.lca-data.com/resource/",
+                "ENVIRONDEC": "https://data.environdec.com/resource/",
+                "EPD_ITALY" : "https://node.epditaly.it/Node/resource/",
+                "MRPI": "https://data.mrpi.nl/resource/",
+                "EPD_IRELAND": "https://epdireland.lca-data.com/resource/",
+                "ITBPOLAND": "https://itb.lca-data.com/resource/",
+                "BRE_EPD_Hub": "https://soda4lca.bregroup.com/resource/",
+                "OEKOBAU.DAT" : "https://oekobaudat.de/OEKOBAU.DAT/resource/datastocks/cd2bda71-760b-4fcc-8a0b-3877c10000a8/"
+                }
+
+settings = {
+    "timeout": (10, 60),
+    "retries": 3,
+    "backoff": 0.5,
+    "pool_size": 16,
+    # Per node: requests per second to start with and to grow up to, and
+    # requests at a time. See rate_limit.NodeLimiter.
+    "rate": 4.0,
+    "max_rate": 20.0,
+    "max_in_flight": 4,
+}
+
+# Retried with backoff, by the session or, with a deadline, by get().
+RETRY_STATUSES = (500, 502, 504)
+
+_sessions = {}
+_limiters = {}
+_lock = threading.Lock()
+
+
+def configure(**kwargs):
+    """
+    Change the client settings (timeout, retries, backoff, pool_size,
+    rate, max_rate, max_in_flight). Sessions already opened are closed, so
+    the next request picks up the new settings.
+    """
+    unknown = set(kwargs) - set(settings)
+    if unknown:
+        raise TypeError(f"Unknown client settings: {', '.join(sorted(unknown))}")
+    with _lock:
+        settings.update({key: value for key, value in kwargs.items() if value is not None})
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+        _limiters.clear()
+
+
+def _new_session(retries):
+    # requests is imported here so that commands that never talk to a node
+    # do not pay for importing it.
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        backoff_factor=settings["backoff"],
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        # Otherwise urllib3 retries a 429 or 503 with a Retry-After itself
+        # and the node's limiter never sees it: get() retries those.
+        respect_retry_after_header=False,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=settings["pool_size"],
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Accept-Encoding": "gzip, deflate"})
+    return session
+
+
+def session_for(nodeid, retry=True):
+    """
+    Return the keep-alive session of a node in base_urls, creating it on
+    first use. Without `retry` the session leaves retrying to the caller.
+    """
+    with _lock:
+        session = _sessions.get((nodeid, retry))
+        if session is None:
+            session = _sessions[(nodeid, retry)] = _new_session(settings["retries"] if retry else 0)
+        return session
+
+
+def limiter_for(nodeid):
+    with _lock:
+        limiter = _limiters.get(nodeid)
+        if limiter is None:
+            limiter = _limiters[nodeid] = NodeLimiter(
+                rate=settings["rate"],
+                burst=max(1, settings["max_in_flight"]),
+                max_in_flight=settings["max_in_flight"],
+                max_rate=settings["max_rate"],
+            )
+        return limiter
+
+
+def get(nodeid, url, params=None, headers=None, timeout=None, deadline=None):
+    """
+    GET `url` through the pooled session of `nodeid`. Transient errors
+    (connection errors, timeouts and 5xx responses) are retried with
+    exponential backoff before the response is returned.
+
+    Requests wait for the node's limiter. A 429 or 503 slows the node down,
+    waits for its Retry-After and is retried.
+
+    With a `deadline` (a time.monotonic() value) no request, limiter wait
+    or retry goes past it: TimeoutError is raised instead.
+    """
+    from requests import RequestException
+
+    session = session_for(nodeid, retry=deadline is None)
+    limiter = limiter_for(nodeid)
+    for attempt in range(settings["retries"] + 1):
+        request_timeout = timeout or settings["timeout"]
+        if deadline is None:
+            limiter.acquire()
+        else:
+            if not limiter.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                raise TimeoutError(f"{nodeid} didn't answer in time.")
+            request_timeout = max(0.001, deadline - time.monotonic())
+        status = retry_after = None
+        try:
+            with profiling.span("http", nodeid=nodeid):
+                response = session.get(
+                    url,
+                    params=params,
+                    headers=headers,
+                    timeout=request_timeout,
+                )
+            if profiling.enabled():
+                profiling.count_request(nodeid, len(response.content))
+            status = response.status_code
+            retry_after = retry_after_seconds(response.headers.get("Retry-After"))
+        except RequestException:
+            # Without a deadline the session has retried this already.
+            if deadline is None or attempt == settings["retries"]:
+                raise
+        finally:
+            limiter.release(status, retry_after)
+        retryable = THROTTLE_STATUSES if deadline is None else THROTTLE_STATUSES + RETRY_STATUSES
+        if status is not None and (attempt == settings["retries"] or status not in retryable):
+            return response
+        if status is not None:
+            response.close()
+        if deadline is not None and status not in THROTTLE_STATUSES:
+            pause = settings["backoff"] * 2 ** attempt
+            if time.monotonic() + pause >= deadline:
+                raise TimeoutError(f"{nodeid} didn't answer in time.")
+            time.sleep(pause)
+
+
+def stats():
+    """
+    Return {nodeid: limiter stats} of the nodes that were requested.
+    """
+    with _lock:
+        limiters = dict(_limiters)
+    return {nodeid: limiter.stats() for nodeid, limiter in limiters.items()}
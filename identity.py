@@ -0,0 +1,124 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from appdirs import AppDirs
+
+settings = {
+    "path": Path(AppDirs("EPDtoLCAByg").user_data_dir) / "identity.sqlite3",
+}
+
+_index = None
+_lock = threading.Lock()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS datasets (
+    uuid TEXT NOT NULL,
+    version TEXT NOT NULL,
+    node TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    seen_at REAL NOT NULL,
+    PRIMARY KEY (uuid, version, node)
+);
+CREATE INDEX IF NOT EXISTS datasets_digest ON datasets (digest);
+CREATE TABLE IF NOT EXISTS converted (
+    digest TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    output TEXT NOT NULL,
+    converted_at REAL NOT NULL,
+    PRIMARY KEY (digest, fingerprint)
+);
+"""
+
+
+class IdentityIndex:
+    """
+    Which dataset (UUID and dataSetVersion) was seen on which node, with
+    the SHA-256 digest of its content, and where a dataset with a given
+    digest was converted to with a given mapping table and templates (see
+    epd_data.conversion_fingerprint).
+
+    The same EPD is often published on several nodes. With this index a
+    copy that was downloaded from one node is reused for the others, and
+    an identical dataset is converted only once.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.executescript(_SCHEMA)
+
+    def record(self, node, uuid, version, digest):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO datasets VALUES (?, ?, ?, ?, ?)",
+                (uuid, version or "", node, digest, time.time()),
+            )
+
+    def digest(self, node, uuid, version):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT digest FROM datasets WHERE uuid = ? AND version = ? AND node = ?",
+                (uuid, version or "", node),
+            ).fetchone()
+        return row[0] if row else None
+
+    def copies(self, uuid, version):
+        """
+        Return [(node, digest)] of every node the dataset was seen on, most recent first.
+        """
+        with self._lock:
+            return self._db.execute(
+                "SELECT node, digest FROM datasets WHERE uuid = ? AND version = ? ORDER BY seen_at DESC",
+                (uuid, version or ""),
+            ).fetchall()
+
+    def conversion(self, digest, fingerprint, root):
+        """
+        Return the output of an earlier conversion of the dataset with the
+        same fingerprint, if it's still there and inside the folder `root`.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT output FROM converted WHERE digest = ? AND fingerprint = ?", (digest, fingerprint)
+            ).fetchone()
+        if row is None:
+            return None
+        output = Path(row[0])
+        if not output.exists() or not output.resolve().is_relative_to(Path(root).resolve()):
+            return None
+        return output
+
+    def record_conversion(self, digest, fingerprint, output):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO converted VALUES (?, ?, ?, ?)",
+                (digest, fingerprint, str(output), time.time()),
+            )
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def configure(**kwargs):
+    global _index
+    unknown = set(kwargs) - set(settings)
+    if unknown:
+        raise TypeError(f"Unknown identity index settings: {', '.join(sorted(unknown))}")
+    with _lock:
+        settings.update({key: value for key, value in kwargs.items() if value is not None})
+        if _index is not None:
+            _index.close()
+            _index = None
+
+
+def get_index():
+    global _index
+    with _lock:
+        if _index is None:
+            _index = IdentityIndex(settings["path"])
+        return _index
@@ -0,0 +1,254 @@
+import mmap
+import zipfile
+import xml.etree.ElementTree as ET
+from pathlib import PurePosixPath
+
+from unit_groups import ILCD_UNIT_GROUPS
+
+XML_LANG = "{http://www.w3.org/XML/1998/namespace}lang"
+
+# Dataset folders of an ILCD archive, e.g. ILCD/processes/<uuid>_<version>.xml
+FOLDERS = ("processes", "flows", "flowproperties", "unitgroups")
+
+
+def _local(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def _children(element, name):
+    # ILCD files mix the ILCD, common and EPD extension namespaces (and two
+    # versions of the latter), so elements are matched by local name.
+    if element is None:
+        return []
+    return [child for child in element if _local(child.tag) == name]
+
+
+def _elements(element):
+    return list(element) if element is not None else []
+
+
+def _find(element, *path):
+    for name in path:
+        children = _children(element, name)
+        if not children:
+            return None
+        element = children[0]
+    return element
+
+
+def _text(element, default=""):
+    if element is None or element.text is None:
+        return default
+    return element.text.strip()
+
+
+def _attr(element, name, default=None):
+    for key, value in element.attrib.items():
+        if _local(key) == name:
+            return value
+    return default
+
+
+def _strings(elements):
+    # Multi-language strings as {"lang", "value"} dicts, English first like
+    # the node's JSON view picks them.
+    strings = [{"lang": element.get(XML_LANG, ""), "value": _text(element)} for element in elements]
+    return sorted(strings, key=lambda string: string["lang"] != "en")
+
+
+class _MappedFile:
+    # zipfile wants a seekable file object, mmap only got seekable() in 3.13.
+    def __init__(self, mapped):
+        self._mapped = mapped
+
+    def seekable(self):
+        return True
+
+    def __getattr__(self, name):
+        return getattr(self._mapped, name)
+
+
+def _uuid_of(name):
+    # "<uuid>.xml" or "<uuid>_<version>.xml"
+    return PurePosixPath(name).stem.split("_")[0]
+
+
+class ILCDArchive:
+    """
+    Reads process datasets straight out of an ILCD ZIP archive.
+
+    The archive is memory-mapped and entries are decompressed one at a time
+    when they are needed, nothing is extracted to disk. process_json()
+    returns a process in the same structure as the JSON "extended" view of
+    a node, with the reference unit of the reference flow resolved from the
+    flow, flow property and unit group datasets in the archive.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._zip = zipfile.ZipFile(_MappedFile(self._mmap))
+        self.entries = {folder: {} for folder in FOLDERS}
+        for name in self._zip.namelist():
+            parts = PurePosixPath(name).parts
+            if len(parts) >= 2 and parts[-2] in self.entries and name.endswith(".xml"):
+                self.entries[parts[-2]][_uuid_of(name)] = name
+        self._units = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        self._zip.close()
+        self._mmap.close()
+        self._file.close()
+
+    def process_uuids(self):
+        return sorted(self.entries["processes"])
+
+    def _parse(self, folder, uuid):
+        name = self.entries[folder].get(uuid)
+        if name is None:
+            return None
+        with self._zip.open(name) as f:
+            return ET.parse(f).getroot()
+
+    def reference_unit(self, flow_property_uuid):
+        """
+        Return the reference unit of a flow property, looked up in the
+        archive and memoized per flow property.
+        """
+        if flow_property_uuid in self._units:
+            return self._units[flow_property_uuid]
+        unit = ILCD_UNIT_GROUPS.get(flow_property_uuid)
+        flow_property = self._parse("flowproperties", flow_property_uuid)
+        if flow_property is not None:
+            reference = _find(flow_property, "flowPropertiesInformation", "quantitativeReference", "referenceToReferenceUnitGroup")
+            unit_group_uuid = reference.get("refObjectId") if reference is not None else None
+            unit = self._unit_group_reference_unit(unit_group_uuid) or ILCD_UNIT_GROUPS.get(unit_group_uuid) or unit
+        self._units[flow_property_uuid] = unit
+        return unit
+
+    def _unit_group_reference_unit(self, unit_group_uuid):
+        unit_group = self._parse("unitgroups", unit_group_uuid) if unit_group_uuid else None
+        if unit_group is None:
+            return None
+        reference = _text(_find(unit_group, "unitGroupInformation", "quantitativeReference", "referenceToReferenceUnit"))
+        for unit in _children(_find(unit_group, "units"), "unit"):
+            if unit.get("dataSetInternalID") == reference:
+                return _text(_find(unit, "name"))
+        return None
+
+    def _flow_properties(self, flow_uuid, amount=1.0):
+        # meanValue is the declared amount of the reference exchange in each
+        # flow property, as in the extended JSON view of a node: the
+        # exchange amount times the flow's conversion factor.
+        flow = self._parse("flows", flow_uuid)
+        if flow is None:
+            return []
+        reference = _text(_find(flow, "flowInformation", "quantitativeReference", "referenceToReferenceFlowProperty"))
+        flow_properties = []
+        for flow_property in _children(_find(flow, "flowProperties"), "flowProperty"):
+            flow_property_reference = _find(flow_property, "referenceToFlowPropertyDataSet")
+            if flow_property_reference is None:
+                continue
+            flow_property_uuid = flow_property_reference.get("refObjectId")
+            entry = {
+                "uuid": flow_property_uuid,
+                "meanValue": amount * float(_text(_find(flow_property, "meanValue"), "1")),
+            }
+            unit = self.reference_unit(flow_property_uuid)
+            if unit:
+                entry["referenceUnit"] = unit
+            # The reference flow property goes first.
+            if flow_property.get("dataSetInternalID") == reference:
+                flow_properties.insert(0, entry)
+            else:
+                flow_properties.append(entry)
+        return flow_properties
+
+    def process_json(self, uuid):
+        root = self._parse("processes", uuid)
+        if root is None:
+            raise KeyError(f"No process {uuid} in {self.path}.")
+        info = _find(root, "processInformation")
+        data_set_information = _find(info, "dataSetInformation")
+        classifications = [
+            {
+                "name": classification.get("name", ""),
+                "class": [
+                    {"level": int(class_.get("level", 0)), "classId": class_.get("classId"), "value": _text(class_)}
+                    for class_ in _children(classification, "class")
+                ],
+            }
+            for classification in _children(_find(data_set_information, "classificationInformation"), "classification")
+        ]
+
+        reference_flow = int(_text(_find(info, "quantitativeReference", "referenceToReferenceFlow"), "0"))
+        exchanges = []
+        for exchange in _children(_find(root, "exchanges"), "exchange"):
+            internal_id = int(exchange.get("dataSetInternalID"))
+            entry = {"dataSetInternalID": internal_id}
+            # Only the reference flow is needed for the conversion.
+            if internal_id == reference_flow:
+                flow = _find(exchange, "referenceToFlowDataSet")
+                amount = float(_text(_find(exchange, "resultingAmount")) or _text(_find(exchange, "meanAmount"), "1"))
+                entry["flowProperties"] = self._flow_properties(flow.get("refObjectId"), amount)
+            exchanges.append(entry)
+
+        modelling_other = _find(root, "modellingAndValidation", "LCIMethodAndAllocation", "other")
+        lcia_results = []
+        for result in _children(_find(root, "LCIAResults"), "LCIAResult"):
+            method = _find(result, "referenceToLCIAMethodDataSet")
+            anies = []
+            for element in _elements(_find(result, "other")):
+                if _local(element.tag) == "referenceToUnitGroupDataSet":
+                    anies.append({
+                        "name": "referenceToUnitGroupDataSet",
+                        "value": {"shortDescription": _strings(_children(element, "shortDescription"))},
+                    })
+                elif _local(element.tag) == "amount" and _attr(element, "module"):
+                    emission = {"module": _attr(element, "module"), "value": _text(element)}
+                    if _attr(element, "scenario"):
+                        emission["scenario"] = _attr(element, "scenario")
+                    anies.append(emission)
+            lcia_results.append({
+                "referenceToLCIAMethodDataSet": {
+                    "refObjectId": method.get("refObjectId"),
+                    "shortDescription": _strings(_children(method, "shortDescription")),
+                },
+                "other": {"anies": anies},
+            })
+
+        administrative = _find(root, "administrativeInformation")
+        return {
+            "processInformation": {
+                "dataSetInformation": {
+                    "UUID": _text(_find(data_set_information, "UUID")),
+                    "name": {"baseName": _strings(_children(_find(data_set_information, "name"), "baseName"))},
+                    "classificationInformation": {"classification": classifications},
+                    "generalComment": _strings(_children(data_set_information, "generalComment")),
+                },
+                "time": {"dataSetValidUntil": _text(_find(info, "time", "dataSetValidUntil"))},
+                "quantitativeReference": {"referenceToReferenceFlow": [reference_flow]},
+            },
+            "exchanges": {"exchange": exchanges},
+            "modellingAndValidation": {"LCIMethodAndAllocation": {"other": {"anies": [
+                {"name": _local(element.tag), "value": _text(element)} for element in _elements(modelling_other)
+            ]}}},
+            "administrativeInformation": {
+                "dataEntryBy": {"referenceToDataSetFormat": [
+                    {"shortDescription": _strings(_children(reference, "shortDescription"))}
+                    for reference in _children(_find(administrative, "dataEntryBy"), "referenceToDataSetFormat")
+                ]},
+                "publicationAndOwnership": {
+                    "dataSetVersion": _text(_find(administrative, "publicationAndOwnership", "dataSetVersion")),
+                },
+            },
+            "LCIAResults": {"LCIAResult": lcia_results},
+        }
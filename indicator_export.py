@@ -0,0 +1,86 @@
+from epd_data import ConversionError, indicator_code
+
+COLUMNS = ("uuid", "indicator", "unit", "module", "scenario", "value")
+FORMATS = ("parquet", "csv")
+
+
+class IndicatorColumns:
+    """
+    Collects the LCIA results of many EPDs as columns of a long-format
+    table: one row per (uuid, indicator, unit, module, scenario, value).
+
+    Every EPD only appends to flat per-column lists; the UUIDs are stored
+    once per EPD and repeated when the DataFrame is built, and the
+    repetitive text columns become categoricals.
+    """
+
+    def __init__(self):
+        self.uuids = []
+        self.counts = []
+        self.indicators = []
+        self.units = []
+        self.modules = []
+        self.scenarios = []
+        self.values = []
+
+    def add(self, process_json):
+        count = 0
+        for obj in process_json["LCIAResults"]["LCIAResult"]:
+            try:
+                indicator_name = obj["referenceToLCIAMethodDataSet"]["shortDescription"][0]["value"]
+            except KeyError:
+                raise ConversionError("Couldn't find indicator name. Check the file manually.")
+            anies = obj["other"]["anies"]
+            unit_dict = [i for i in anies if "name" in i]
+            unit = unit_dict[0]["value"]["shortDescription"][0]["value"] if unit_dict else ""
+            code = indicator_code(indicator_name)
+            for emission in anies:
+                if "module" not in emission:
+                    continue
+                self.indicators.append(code)
+                self.units.append(unit)
+                self.modules.append(str(emission["module"]))
+                self.scenarios.append(emission.get("scenario", ""))
+                self.values.append(emission["value"])
+                count += 1
+        self.uuids.append(process_json["processInformation"]["dataSetInformation"]["UUID"])
+        self.counts.append(count)
+        return count
+
+    def __len__(self):
+        return len(self.values)
+
+    def to_frame(self):
+        import numpy as np
+        import pandas as pd
+
+        return pd.DataFrame({
+            "uuid": pd.Categorical(np.repeat(np.array(self.uuids, dtype=object), self.counts)),
+            "indicator": pd.Categorical(self.indicators),
+            "unit": pd.Categorical(self.units),
+            "module": pd.Categorical(self.modules),
+            "scenario": pd.Categorical(self.scenarios),
+            "value": pd.to_numeric(pd.Series(self.values, dtype=object), errors="coerce").astype("float64"),
+        }, columns=list(COLUMNS))
+
+
+def resolve_format(path, format=None):
+    """
+    Return the output format, by default picked from the file extension.
+    Fails before any work is done if Parquet is asked for, but neither
+    pyarrow nor fastparquet is installed.
+    """
+    format = format or ("csv" if str(path).lower().endswith(".csv") else "parquet")
+    if format == "parquet":
+        import importlib.util
+
+        if not any(importlib.util.find_spec(engine) for engine in ("pyarrow", "fastparquet")):
+            raise ConversionError("Writing Parquet needs pyarrow or fastparquet. Install one of them or export to .csv.")
+    return format
+
+
+def write_frame(frame, path, format):
+    if format == "csv":
+        frame.to_csv(path, index=False)
+    else:
+        frame.to_parquet(path, index=False)
@@ -0,0 +1,117 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+
+def item_key(item):
+    return f'{item["nodeid"]}/{item["uuid"]}'
+
+
+class BatchJournal:
+    """
+    Append-only JSONL checkpoint of a batch run: one line per finished item
+    with its status ("done" or "failed"), output path, content digest or
+    error and the attempt number.
+
+    Lines are written as items finish but only fsynced every `sync_every`
+    lines or `sync_interval` seconds, so a crash loses at most that much.
+    A torn last line from a crash is ignored when the journal is read.
+    A journal with entries is only ever appended to: without `resume` it
+    raises FileExistsError rather than starting over.
+    """
+
+    def __init__(self, path, resume=False, sync_every=100, sync_interval=5.0):
+        self.path = Path(path)
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        if not resume and self.path.exists() and self.path.stat().st_size:
+            raise FileExistsError(f'"{self.path}" has the journal of an earlier run.')
+        self.entries = self.read(self.path) if resume else {}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._unsynced = 0
+        self._synced_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def read(path):
+        """
+        Return {item key: last entry} of a journal, with the number of
+        failed attempts so far in "failures".
+        """
+        entries = {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    failures = entries.get(entry["key"], {}).get("failures", 0)
+                    entry["failures"] = failures + (entry["status"] == "failed")
+                    entries[entry["key"]] = entry
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def plan(self, items, retry_budget):
+        """
+        Split items into (to run, skipped). Done items are skipped, failed
+        ones are run again while they have failed fewer than `retry_budget`
+        times.
+        """
+        todo, skipped = [], []
+        for item in items:
+            entry = self.entries.get(item_key(item))
+            if entry is None:
+                todo.append(item)
+            elif entry["status"] == "done" or entry["failures"] >= retry_budget:
+                skipped.append((item, entry))
+            else:
+                todo.append(item)
+        return todo, skipped
+
+    def _write(self, entry):
+        with self._lock:
+            previous = self.entries.get(entry["key"], {})
+            entry["attempt"] = previous.get("attempt", 0) + 1
+            self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            entry["failures"] = previous.get("failures", 0) + (entry["status"] == "failed")
+            self.entries[entry["key"]] = entry
+            self._unsynced += 1
+            if self._unsynced >= self.sync_every or time.monotonic() - self._synced_at >= self.sync_interval:
+                self._sync()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._synced_at = time.monotonic()
+
+    def done(self, item, output=None):
+        self._write({
+            "key": item_key(item), "nodeid": item["nodeid"], "uuid": item["uuid"], "status": "done",
+            "output": str(output) if output else None, "digest": item.get("digest"),
+            "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        })
+
+    def failed(self, item, err):
+        self._write({
+            "key": item_key(item), "nodeid": item["nodeid"], "uuid": item["uuid"], "status": "failed",
+            "error": f"{type(err).__name__}: {err}", "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        })
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._sync()
+                self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
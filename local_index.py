@@ -0,0 +1,288 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from appdirs import AppDirs
+
+from epd_data import A1TO3_MODULES, indicator_code
+from mapping import classes
+import unit_groups
+
+settings = {
+    "path": Path(AppDirs("EPDtoLCAByg").user_data_dir) / "index.sqlite3",
+}
+
+_index = None
+_lock = threading.Lock()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS epds (
+    node TEXT NOT NULL,
+    uuid TEXT NOT NULL,
+    version TEXT NOT NULL,
+    name TEXT NOT NULL,
+    classification TEXT NOT NULL,
+    reference_unit TEXT,
+    modules TEXT NOT NULL,
+    gwp_a1a3 REAL,
+    valid_until INTEGER,
+    source TEXT,
+    indexed_at REAL NOT NULL,
+    PRIMARY KEY (node, uuid, version)
+);
+CREATE INDEX IF NOT EXISTS epds_valid_until ON epds (valid_until);
+"""
+
+# Only searched columns go into the full-text table, its rowid is the one of epds.
+_FTS_SCHEMA = "CREATE VIRTUAL TABLE IF NOT EXISTS epds_fts USING fts5(name, classification, tokenize = 'unicode61 remove_diacritics 2')"
+
+# The GWP indicator is called GWP-total in EN 15804+A2 EPDs and GWP before.
+GWP_CODES = ("GWP-total", "GWP")
+
+
+def _reference_unit(process_json):
+    try:
+        reference_flow = process_json["processInformation"]["quantitativeReference"]["referenceToReferenceFlow"][0]
+        exchange = next(i for i in process_json["exchanges"]["exchange"] if i["dataSetInternalID"] == reference_flow)
+        flow_properties = exchange["flowProperties"]
+    except (KeyError, IndexError, StopIteration):
+        return None
+    for flow_property in flow_properties:
+        if "referenceUnit" in flow_property:
+            return flow_property["referenceUnit"]
+    # Only unit groups that are known already, indexing never goes online.
+    if flow_properties:
+        return unit_groups.get_resolver().memo.get(flow_properties[0].get("uuid"))
+    return None
+
+
+def _modules_and_gwp(process_json):
+    modules = set()
+    gwp = {}
+    for result in process_json.get("LCIAResults", {}).get("LCIAResult", []):
+        try:
+            code = indicator_code(result["referenceToLCIAMethodDataSet"]["shortDescription"][0]["value"])
+        except (KeyError, IndexError):
+            continue
+        for emission in result.get("other", {}).get("anies", []):
+            if "module" not in emission:
+                continue
+            modules.add(str(emission["module"]))
+            if code in GWP_CODES and str(emission["module"]) in A1TO3_MODULES:
+                try:
+                    gwp[code] = gwp.get(code, 0.0) + float(emission["value"])
+                except (TypeError, ValueError):
+                    pass
+    gwp_a1a3 = next((gwp[code] for code in GWP_CODES if code in gwp), None)
+    return sorted(modules), gwp_a1a3
+
+
+def _valid_until(process_json):
+    # dataSetValidUntil is a year, sometimes a full date.
+    valid_to = str(process_json.get("processInformation", {}).get("time", {}).get("dataSetValidUntil", ""))
+    match = re.match(r"\s*(\d{4})", valid_to)
+    return int(match.group(1)) if match else None
+
+
+def index_record(process_json):
+    """
+    Return the indexed fields of a process dataset.
+    """
+    information = process_json["processInformation"]["dataSetInformation"]
+    modules, gwp_a1a3 = _modules_and_gwp(process_json)
+    classification = " / ".join(
+        str(class_.get("value", "")) for _, class_ in sorted(classes(process_json), key=lambda c: c[1].get("level", 0))
+    )
+    try:
+        version = process_json["administrativeInformation"]["publicationAndOwnership"]["dataSetVersion"]
+    except KeyError:
+        version = ""
+    return {
+        "uuid": information["UUID"],
+        "version": version,
+        "name": information["name"]["baseName"][0]["value"],
+        "classification": classification,
+        "reference_unit": _reference_unit(process_json),
+        "modules": modules,
+        "gwp_a1a3": gwp_a1a3,
+        "valid_until": _valid_until(process_json),
+    }
+
+
+def fts_query(text):
+    # Every word of the query has to match the start of a word, e.g.
+    # "gips plat" finds "Gips, Platte" and "Platten aus Gips".
+    words = re.findall(r"\w+", text)
+    return " ".join(f'"{word}"*' for word in words)
+
+
+class LocalIndex:
+    """
+    SQLite index of the process datasets that are on disk already, in the
+    process cache or in a sync mirror.
+
+    One row per (node, uuid, dataSetVersion) with the name, classification,
+    reference unit, declared modules, A1-A3 GWP and the year the dataset is
+    valid until. Names and classifications are searched through an FTS5
+    table; on an SQLite without FTS5 search falls back to LIKE.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        try:
+            self._db.execute(_FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError:
+            self.fts = False
+
+    def sources(self):
+        """
+        Return {source: indexed_at} of everything indexed.
+        """
+        with self._lock:
+            return dict(self._db.execute("SELECT source, indexed_at FROM epds WHERE source IS NOT NULL"))
+
+    def add(self, node, process_json, source=None):
+        record = index_record(process_json)
+        with self._lock, self._db:
+            # A mirrored file is replaced by the next version of the dataset.
+            rows = self._db.execute(
+                "SELECT rowid FROM epds WHERE (node = ? AND uuid = ? AND version = ?) OR source = ?",
+                (node, record["uuid"], record["version"], source),
+            ).fetchall()
+            self._db.executemany("DELETE FROM epds WHERE rowid = ?", rows)
+            if self.fts:
+                self._db.executemany("DELETE FROM epds_fts WHERE rowid = ?", rows)
+            cursor = self._db.execute(
+                "INSERT INTO epds VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    node, record["uuid"], record["version"], record["name"], record["classification"],
+                    record["reference_unit"], " ".join(record["modules"]), record["gwp_a1a3"],
+                    record["valid_until"], source, time.time(),
+                ),
+            )
+            if self.fts:
+                self._db.execute(
+                    "INSERT INTO epds_fts (rowid, name, classification) VALUES (?, ?, ?)",
+                    (cursor.lastrowid, record["name"], record["classification"]),
+                )
+        return record
+
+    def search(self, text=None, node=None, modules=(), valid_in=None, unit=None, limit=None):
+        """
+        Return the matching EPDs as dicts, best full-text matches first.
+
+        `modules` must all be declared, `valid_in` is a year the dataset has
+        to be valid in and `unit` its reference unit.
+        """
+        query = "SELECT epds.node, uuid, version, epds.name, epds.classification, reference_unit, modules, gwp_a1a3, valid_until FROM epds"
+        where, args = [], []
+        order = "epds.name"
+        if text and self.fts and fts_query(text):
+            query += " JOIN epds_fts ON epds_fts.rowid = epds.rowid"
+            where.append("epds_fts MATCH ?")
+            args.append(fts_query(text))
+            order = "epds_fts.rank"
+        elif text:
+            where.append("(epds.name LIKE ? OR epds.classification LIKE ?)")
+            args += [f"%{text}%"] * 2
+        if node:
+            where.append("epds.node = ?")
+            args.append(node)
+        for module in modules:
+            where.append("(' ' || modules || ' ') LIKE ?")
+            args.append(f"% {module} %")
+        if valid_in:
+            where.append("valid_until >= ?")
+            args.append(valid_in)
+        if unit:
+            where.append("reference_unit = ?")
+            args.append(unit)
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += f" ORDER BY {order}"
+        if limit:
+            query += " LIMIT ?"
+            args.append(limit)
+        with self._lock:
+            rows = self._db.execute(query, args).fetchall()
+        return [
+            {
+                "nodeid": node, "uuid": uuid, "version": version, "name": name,
+                "classification": classification, "referenceUnit": reference_unit,
+                "modules": modules.split(), "gwpA1A3": gwp_a1a3, "validUntil": valid_until,
+            }
+            for node, uuid, version, name, classification, reference_unit, modules, gwp_a1a3, valid_until in rows
+        ]
+
+    def count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM epds").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def configure(**kwargs):
+    global _index
+    unknown = set(kwargs) - set(settings)
+    if unknown:
+        raise TypeError(f"Unknown index settings: {', '.join(sorted(unknown))}")
+    with _lock:
+        settings.update({key: value for key, value in kwargs.items() if value is not None})
+        if _index is not None:
+            _index.close()
+            _index = None
+
+
+def get_index():
+    global _index
+    with _lock:
+        if _index is None:
+            _index = LocalIndex(settings["path"])
+        return _index
+
+
+def update_index(index, process_cache=None, mirror_dir=None):
+    """
+    Add the datasets of the process cache and of the node mirrors in
+    `mirror_dir` that aren't indexed yet. Returns (added, failed).
+    """
+    known = index.sources()
+    added, failed = 0, 0
+
+    def add(node, load, source):
+        nonlocal added, failed
+        try:
+            index.add(node, load(), source)
+        except (KeyError, IndexError, TypeError, ValueError):
+            failed += 1
+        else:
+            added += 1
+
+    if process_cache is not None:
+        for entry in process_cache.entries():
+            source = f"cache:{entry.node}:{entry.digest}"
+            if source not in known:
+                add(entry.node, lambda: json.loads(process_cache.peek(entry)), source)
+    if mirror_dir is not None and Path(mirror_dir).exists():
+        for path in sorted(Path(mirror_dir).glob("*/processes/*.json")):
+            node = path.parent.parent.name
+            source = str(path)
+            if source in known and path.stat().st_mtime <= known[source]:
+                continue
+
+            def load(path=path):
+                with open(path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+
+            add(node, load, source)
+    return added, failed
@@ -0,0 +1,96 @@
+import json
+import logging
+import time
+
+import click
+
+# Every module logs to a child of this logger, e.g. logging.getLogger("EPDtoLCAByg.epd_data").
+ROOT = "EPDtoLCAByg"
+
+# -q, default, -v, -vv
+LEVELS = {-1: logging.WARNING, 0: logging.INFO, 1: logging.DEBUG, 2: logging.DEBUG}
+# Third-party loggers that -vv also shows: every request and retry.
+VERBOSE_LOGGERS = ("urllib3",)
+
+COLORS = {logging.DEBUG: "bright_black", logging.INFO: "green", logging.WARNING: "yellow", logging.ERROR: "red"}
+
+# Attributes every LogRecord has, anything else was passed with extra={...}.
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def get_logger(name):
+    return logging.getLogger(f"{ROOT}.{name}")
+
+
+class ConsoleHandler(logging.Handler):
+    """
+    Writes records to stderr in the colors the CLI used for its messages.
+    """
+
+    def emit(self, record):
+        try:
+            click.secho(self.format(record), fg=COLORS.get(record.levelno, "red"), err=True)
+        except Exception:
+            self.handleError(record)
+
+
+class JSONLinesFormatter(logging.Formatter):
+    """
+    One JSON object per record, with the fields given with extra={...}
+    next to time, level, logger and message.
+    """
+
+    def format(self, record):
+        entry = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created)) + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure(verbosity=0, json_path=None):
+    """
+    Log at INFO, at WARNING with verbosity -1 or DEBUG with 1 and more, to
+    stderr and, if given, as JSON lines to `json_path`. The JSON sink gets
+    at least the INFO records. With verbosity 2 the HTTP requests are
+    logged to stderr as well.
+    """
+    logger = logging.getLogger(ROOT)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    verbosity = max(-1, min(2, verbosity))
+    level = LEVELS[verbosity]
+    console = ConsoleHandler(level)
+    console.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(console)
+    for name in VERBOSE_LOGGERS:
+        other = logging.getLogger(name)
+        for handler in [handler for handler in other.handlers if isinstance(handler, ConsoleHandler)]:
+            other.removeHandler(handler)
+        if verbosity >= 2:
+            other.addHandler(console)
+        other.setLevel(logging.DEBUG if verbosity >= 2 else logging.NOTSET)
+    if json_path:
+        sink = logging.FileHandler(json_path, mode="a", encoding="utf-8")
+        sink.setLevel(min(level, logging.INFO))
+        sink.setFormatter(JSONLinesFormatter())
+        logger.addHandler(sink)
+        level = min(level, logging.INFO)
+    logger.setLevel(level)
+    logger.propagate = False
+    return logger
+
+
+def quiet_worker():
+    # Worker processes only report problems; the parent logs the results.
+    logger = logging.getLogger(ROOT)
+    logger.setLevel(max(logger.level, logging.WARNING))
+    for handler in list(logger.handlers):
+        if isinstance(handler, logging.FileHandler):
+            logger.removeHandler(handler)
@@ -1,41 +1,50 @@
 #!/usr/bin/env python3
-from random import choices
-from pydoc import pager
 import re
 import os
-import pathlib
+import hashlib
+import shutil
+import sys
+import time
 from pathlib import Path
-import readline
-from socket import NI_NAMEREQD
-from typing_extensions import Required
 import click
-import requests
-from pyfiglet import Figlet, figlet_format
-from appdirs import AppDirs
 # import colorama
 import json
 try:
     from termcolor import colored
 except ImportError:
     colored = None
-from epd_data import pprint_indicators, convert_to_lcabyg
-
-base_urls = {
-                "ECOPLATFORM" : "https://data.eco-platform.org/resource/",
-                "ECOSMDP": "https://ecosmdp.eco-platform.org/resource/",
-                "IBU_DATA" : "https://ibudata.lca-data.com/resource/",
-                "EPD-NORWAY_DIGI" : "https://epdnorway.lca-data.com/resource/",
-                "ENVIRONDEC": "https://data.environdec.com/resource/",
-                "EPD_ITALY" : "https://node.epditaly.it/Node/resource/",
-                "MRPI": "https://data.mrpi.nl/resource/",
-                "EPD_IRELAND": "https://epdireland.lca-data.com/resource/",
-                "ITBPOLAND": "https://itb.lca-data.com/resource/",
-                "BRE_EPD_Hub": "https://soda4lca.bregroup.com/resource/",
-                "OEKOBAU.DAT" : "https://oekobaudat.de/OEKOBAU.DAT/resource/datastocks/cd2bda71-760b-4fcc-8a0b-3877c10000a8/"
-                }
+from epd_data import EPD, pprint_indicators, convert_to_lcabyg, generate_graph, reference_unit, conversion_fingerprint, ConversionCancelled, MappingError
+from bundle import BundleWriter
+from ilcd_archive import ILCDArchive
+from output_store import OutputStore, POLICIES, clean_name
+from batch import read_manifest, run_batch, print_report, BatchReport
+from journal import BatchJournal
+from converter_pool import convert_files
+from indicator_export import FORMATS, IndicatorColumns, resolve_format, write_frame
+import http_client
+from http_client import base_urls
+from epd_search import SEARCH_PARAMS, MergedHits, fan_out_search, iter_search
+import cache
+import mapping
+import mirror
+import local_index
+import log
+import prefetch
+import profiling
+import identity
+from mirror import MirrorManifest, list_datastock, write_json
 
 CONTEXT_SETTINGS = dict(help_option_names=['-h', '--help'])
 
+logger = log.get_logger("main")
+
+NO_API_KEY = "No API key found. Please set your API key using the 'set-api-key' command or by placing it directly in the config file."
+# Commands that don't need a node, so they run without an API key.
+OFFLINE_COMMANDS = (
+    "import-archive", "convert-dir", "update-index", "export-indicators",
+    "set-api-key", "set-result-folder", "read-config-file", "clear-cache",
+)
+
 class ApiKey(click.ParamType):
     name = 'api-key'
 
@@ -53,6 +62,7 @@ class ApiKey(click.ParamType):
 def display_title_bar():
     # Clears the terminal screen, and displays a title bar.
     # click.clear
+    from pyfiglet import Figlet
     f = Figlet(font='slant')
 
     # while True:
@@ -62,6 +72,10 @@ def display_title_bar():
     click.secho(f.renderText('EPD to LCAByg'), fg='cyan')
     click.secho("*"* 75, fg='cyan')
 
+def enable_line_editing():
+    # Importing readline gives click.prompt line editing and history.
+    import readline  # noqa: F401
+
 def get_user_choice_node(base_urls):
     for i, name in enumerate(base_urls):
         print(f"[{i}] \t {name}")
@@ -100,39 +114,37 @@ def get_incremental_path(ctx, name, dir=False):
     default_path = f'{name}.json'
     if dir:
         default_path = name
-    default_path = re.sub('[^a-zA-Z0-9 \n\.]', '', default_path).replace(' ', '_')
+    default_path = clean_name(default_path)
     full_path = os.path.join(os.getcwd(), default_path)
     if dir:
         result_folder = ctx.obj['result_folder']
         result_folder = Path(result_folder).resolve()
         full_path = Path.joinpath(result_folder, default_path)
 
-    path = click.prompt(
-    "Path: ",
-    type=click.Path(dir_okay=True, writable=True, path_type=Path),
-    default= full_path,
-    )
+    with profiling.span("prompt"):
+        path = click.prompt(
+        "Path: ",
+        type=click.Path(dir_okay=True, writable=True, path_type=Path),
+        default= full_path,
+        )
     if not dir:
         if path.is_dir():
             path = Path.joinpath(path, default_path)
         if not Path(path).suffix == '.json':
             click.secho("Seems like you're missing a JSON file extention. Add '.json' at the end of your path.", fg='red')
             path = get_incremental_path(name)
-    if os.path.exists(path):
-        i = 1
-        if not dir:
-            while os.path.exists(f"{str(path).split('.')[:-1][0]}_{i}.{str(path).split('.')[-1]}"):
-                i += 1
-            path_incr = os.path.join(os.getcwd(), f"{str(path).split('.')[:-1][0]}_{i}.{str(path).split('.')[-1]}")
-            type = "file"
-        elif dir:
-            while os.path.exists(f"{path}_{i}"):
-                i += 1
-            path_incr = pathlib.Path(f"{path}_{i}")
-            print(path_incr)
+    if path.exists():
+        # The next free "<name>_<i>" next to it, from one listing of the folder.
+        store = OutputStore(path.parent)
+        if dir:
+            path_incr, _ = store.allocate(path.name, clean=False)
             type = "folder"
+        else:
+            path_incr, _ = store.allocate(path.stem, ext=path.suffix, clean=False)
+            type = "file"
 
-        save = click.prompt(click.style(f'{type} with name: "{path}" already exists. \nDo you want to save {type} as "{path_incr}"?', fg="red"), type=click.Choice(['y', 'n']), default = 'y')
+        with profiling.span("prompt"):
+            save = click.prompt(click.style(f'{type} with name: "{path}" already exists. \nDo you want to save {type} as "{path_incr}"?', fg="red"), type=click.Choice(['y', 'n']), default = 'y')
         if save == 'y':
             path = path_incr
         elif save == 'n':
@@ -140,32 +152,125 @@ def get_incremental_path(ctx, name, dir=False):
     return Path(path)
 
 
-def process_info(nodeid, uuid, my_header, okobau, pprint=False):
+def dataset_version(process_json):
+    try:
+        return process_json["administrativeInformation"]["publicationAndOwnership"]["dataSetVersion"]
+    except KeyError:
+        return ""
+
+
+def offline_process(nodeid, uuid, entry=None):
+    if entry is not None:
+        return json.loads(cache.get_cache().read(entry))
+    path = Path(mirror.settings["path"]) / nodeid / "processes" / f"{uuid}.json"
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return None
+
+
+def reuse_copy(nodeid, uuid, version, process_cache):
+    # The same UUID and version was downloaded from another node before.
+    index = identity.get_index()
+    for node, digest in index.copies(uuid, version):
+        body = process_cache.read_digest(digest)
+        if body is None:
+            continue
+        process_cache.put(nodeid, uuid, version, body)
+        index.record(nodeid, uuid, version, digest)
+        logger.debug("Reusing the copy of %s %s from %s for %s.", uuid, version, node, nodeid)
+        return body
+    return None
+
+
+def decode(body):
+    with profiling.span("json_decode"):
+        return json.loads(body)
+
+
+def fetch_process(nodeid, uuid, my_header, okobau, version=None):
     choice_url = base_urls[nodeid] + "processes/" + uuid
     request_params_process = {"format": "json", "view": "extended"}
+    process_cache = cache.get_cache()
+    entry = process_cache.lookup(nodeid, uuid, version) if process_cache else None
+    if entry and process_cache.is_fresh(entry):
+        profiling.count_cache("processes", True)
+        return decode(process_cache.read(entry)), choice_url
+    if version and entry is None and process_cache:
+        body = reuse_copy(nodeid, uuid, version, process_cache)
+        if body is not None:
+            profiling.count_cache("processes", True)
+            return decode(body), choice_url
+
+    headers = {} if okobau else dict(my_header)
+    if entry and entry.etag:
+        headers["If-None-Match"] = entry.etag
+    if entry and entry.last_modified:
+        headers["If-Modified-Since"] = entry.last_modified
     try:
-        if okobau:
-            response = requests.get(
-                choice_url, params=request_params_process
-            )
-        elif not okobau:
-            response = requests.get(
-                choice_url, params=request_params_process, headers=my_header
-            )
-        response.raise_for_status()
+        response = http_client.get(
+            nodeid, choice_url, params=request_params_process, headers=headers
+        )
+    except Exception:
+        # Node unreachable: a stale copy or the mirror is better than nothing.
+        process_json = offline_process(nodeid, uuid, entry)
+        if process_json is None:
+            raise
+        logger.warning("%s is unreachable, using the local copy of %s.", nodeid, uuid)
+        return process_json, choice_url
+    if entry and response.status_code == 304:
+        process_cache.revalidated(entry)
+        profiling.count_cache("processes", True)
+        return decode(process_cache.read(entry)), choice_url
+    response.raise_for_status()
+    profiling.count_cache("processes", False)
+    process_json = decode(response.text)
+    if process_cache:
+        digest = process_cache.put(
+            nodeid, uuid, dataset_version(process_json), response.content,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+    else:
+        digest = hashlib.sha256(response.content).hexdigest()
+    identity.get_index().record(nodeid, uuid, dataset_version(process_json), digest)
+    return process_json, choice_url
+
+
+def prefetch_process(hit, my_header, okobau):
+    # Runs in the background for the top results of an overview.
+    process_json, uri = fetch_process(hit["nodeid"], hit["uuid"], my_header, okobau, version=hit.get("version"))
+    try:
+        reference_unit(EPD.from_json(process_json), uri, my_header, hit["nodeid"])
+    except Exception as err:
+        logger.debug("No unit group prefetched for %s: %s", hit["uuid"], err)
+    return process_json, uri
+
+
+def process_info(nodeid, uuid, my_header, okobau, pprint=False, version=None):
+    import requests
+    try:
+        with profiling.span("fetch", nodeid=nodeid, uuid=uuid):
+            prefetched = prefetch.lookup(nodeid, uuid, version)
+            profiling.count_cache("prefetch", prefetched is not None)
+            if prefetched:
+                process_json, choice_url = prefetched
+            else:
+                process_json, choice_url = fetch_process(nodeid, uuid, my_header, okobau, version=version)
     except requests.exceptions.HTTPError as err:
-        if response.status_code == 403:
+        if err.response.status_code == 403:
             click.secho("403 Forbidden: Possibly due to an invalid or expired API token.", fg="red")
-        raise SystemExit(click.secho(err, fg="red"))
-    process_json = json.loads(response.text)
+        raise click.ClickException(str(err))
     
     if pprint:
-        module_flag = click.prompt(
-            "Show indicators pr. module?",
-            type=click.Choice(['y', 'n'], case_sensitive=False),
-            default='n'
-            )
-        _, lines, _ = pprint_indicators(process_json, module_flag=module_flag)
+        with profiling.span("prompt"):
+            module_flag = click.prompt(
+                "Show indicators pr. module?",
+                type=click.Choice(['y', 'n'], case_sensitive=False),
+                default='n'
+                )
+        with profiling.span("pprint_indicators", uuid=uuid):
+            _, lines, _ = pprint_indicators(process_json, module_flag=module_flag)
         click.echo_via_pager("\n".join(lines), color=True)
 
     return process_json, choice_url
@@ -178,11 +283,11 @@ def save_to_file(process_json, name=None, stage=None, incremental_path=None, con
     
     if not convert:
         file_path = get_incremental_path(name)
-        print("######: ", file_path)
         if not file_path.parent.absolute().exists():
             file_path.parent.absolute().mkdir(parents=True)
-        with open(file_path, "x") as f:
+        with profiling.span("write"), open(file_path, "x") as f:
             f.write(json.dumps(process_json, ensure_ascii=False, indent=4))
+        logger.info('File was saved to "%s"', file_path)
     elif convert and incremental_path:
         if not os.path.exists(incremental_path):
             incremental_path.mkdir(parents=True)
@@ -191,61 +296,155 @@ def save_to_file(process_json, name=None, stage=None, incremental_path=None, con
         file_path = Path.joinpath(stage_path, "Stage.json")
         with open(file_path, "x") as f:
             f.write(json.dumps(process_json, ensure_ascii=False, indent=4))
-    click.secho(f'File was saved to "{file_path}"', fg="green")
+        logger.debug('File was saved to "%s"', file_path)
     return
 
 
+def save_stages(stages, incremental_path):
+    with profiling.span("write"):
+        for stage in stages:
+            save_to_file(process_json = stage[0], name = stage[1], stage = stage[2], incremental_path=incremental_path, convert=True)
+    logger.info('%d stages were saved to "%s"', len(stages), incremental_path)
+
+
+def allocate_output(store, name, uuid, version):
+    # Non-interactive counterpart of get_incremental_path(name, dir=True).
+    incremental_path, status = store.allocate(name, uuid=uuid, version=version)
+    if status == "skip":
+        logger.info('Skipped "%s", it was converted before.', name, extra={"uuid": uuid})
+        return None
+    if status == "overwrite":
+        shutil.rmtree(incremental_path, ignore_errors=True)
+    return incremental_path
+
+
+def save_converted(store, stages, process_json):
+    incremental_path = allocate_output(
+        store,
+        stages[0][1],
+        process_json["processInformation"]["dataSetInformation"]["UUID"],
+        dataset_version(process_json),
+    )
+    if incremental_path:
+        save_stages(stages, incremental_path)
+    return incremental_path
+
+
+def save_stage_texts(stage_texts, incremental_path):
+    # Stages that were already serialized, see converter_pool.
+    with profiling.span("write"):
+        for module, text in stage_texts:
+            stage_path = incremental_path / module
+            stage_path.mkdir(parents=True)
+            with open(stage_path / "Stage.json", "x", encoding="utf-8") as f:
+                f.write(text)
+    logger.info('%d stages were saved to "%s"', len(stage_texts), incremental_path)
+
+
+def fetch_item(item, my_header):
+    # Fetch one {"nodeid", "uuid"[, "version"]} entry of a batch or sync run.
+    if item["nodeid"] not in base_urls:
+        raise click.BadParameter(f'Unknown node "{item["nodeid"]}".')
+    return fetch_process(item["nodeid"], item["uuid"], my_header, item["nodeid"] == "OEKOBAU.DAT", version=item.get("version"))
+
+
+def converted_copy(item, process_json, root):
+    """
+    Return (digest, output) of a downloaded dataset. output is the result
+    of an earlier conversion of identical content, e.g. from another node,
+    with the current mapping table and templates and inside `root`, or None.
+    """
+    index = identity.get_index()
+    digest = index.digest(item["nodeid"], item["uuid"], dataset_version(process_json))
+    output = index.conversion(digest, conversion_fingerprint(), root) if digest else None
+    profiling.count_cache("conversions", output is not None)
+    return digest, output
+
+
+def convert_item(item, process_json, uri, my_header, offline=False):
+    # Convert without prompts. EPDs that don't match the mapping table are
+    # put in the review queue, see the 'review' command.
+    try:
+        return convert_to_lcabyg(process_json, uri, my_header, item["nodeid"], interactive=False, offline=offline)
+    except MappingError as err:
+        mapping.queue_for_review({
+            "nodeid": item["nodeid"],
+            "uuid": item["uuid"],
+            "version": dataset_version(process_json),
+            "name": process_json["processInformation"]["dataSetInformation"]["name"]["baseName"][0]["value"],
+            "field": err.field,
+            "found": err.found,
+            "url": uri,
+        })
+        raise
+
+
+def goodbye():
+    click.echo("Goodbye")
+    click.get_current_context().exit()
+
 def back(my_header, json_result=None, nodeid=None, uuid=None, search_flag=False):
-    choice_back = click.prompt(
-            "Go back?",
-            type=click.Choice(['y','q'], case_sensitive=False),
-            default='y'
-        )
+    with profiling.span("prompt"):
+        choice_back = click.prompt(
+                "Go back?",
+                type=click.Choice(['y','q'], case_sensitive=False),
+                default='y'
+            )
     if choice_back == "y":
         info_or_convert(my_header, json_result=json_result, nodeid=nodeid, uuid=uuid, search_flag=search_flag)
     if choice_back == "q":
-        click.echo("Goodbye")
-        exit()
+        goodbye()
     return
 
-def info_or_convert(my_header,search_flag, json_result=None, okobau=None, nodeid=None, uuid=None):
+def info_or_convert(my_header,search_flag, json_result=None, okobau=None, nodeid=None, uuid=None, version=None):
     if search_flag:
         results = show_overview(json_result)
-    choice_ICS = click.prompt(
-        click.style("Get more info[i], convert[c] to LCAByg JSON or save[s] process to file?", fg = "cyan"),
-        type=click.Choice(['i', 'c', 's', 'q'], case_sensitive=False),
-        default='c'
-    )
+        prefetcher = prefetch.get_prefetcher(lambda hit: prefetch_process(hit, my_header, okobau))
+        if prefetcher:
+            prefetcher.start(results)
+    with profiling.span("prompt"):
+        choice_ICS = click.prompt(
+            click.style("Get more info[i], convert[c] to LCAByg JSON or save[s] process to file?", fg = "cyan"),
+            type=click.Choice(['i', 'c', 's', 'q'], case_sensitive=False),
+            default='c'
+        )
     if choice_ICS == "q":
-        click.echo("Goodbye")
-        exit()
+        goodbye()
     if search_flag:
         choices = [str(i) for i in range(len(results))]
         choices.append("q")
-        choice = click.prompt(
-                "Pick result",
-                type=click.Choice(choices, case_sensitive=False),
-                show_choices=False
-            )
+        with profiling.span("prompt"):
+            choice = click.prompt(
+                    "Pick result",
+                    type=click.Choice(choices, case_sensitive=False),
+                    show_choices=False
+                )
         if choice == "q":
-            click.echo("Goodbye")
-            exit()
+            goodbye()
         choice = results[int(choice)]
         nodeid = choice["nodeid"]
         uuid = choice["uuid"]
+        version = choice.get("version")
     
     if choice_ICS == "i":
-        process_info(nodeid, uuid, my_header, okobau, pprint=True)
+        process_info(nodeid, uuid, my_header, okobau, pprint=True, version=version)
         back(my_header, json_result=json_result, nodeid=nodeid, uuid=uuid, search_flag=search_flag)
     elif choice_ICS == "c":
-        process_json, uri = process_info(nodeid, uuid, my_header, okobau, pprint=False)
-        stages = convert_to_lcabyg(process_json, uri, my_header, nodeid)
+        process_json, uri = process_info(nodeid, uuid, my_header, okobau, pprint=False, version=version)
+        if click.get_current_context().obj.get('strict'):
+            try:
+                stages = convert_item({"nodeid": nodeid, "uuid": uuid}, process_json, uri, my_header)
+            except MappingError as err:
+                click.secho(f"{err.message} The EPD was added to the review queue.", fg="red")
+                back(my_header, json_result=json_result, nodeid=nodeid, uuid=uuid, search_flag=search_flag)
+                return
+        else:
+            stages = convert_to_lcabyg(process_json, uri, my_header, nodeid)
         incremental_path = get_incremental_path(stages[0][1], dir=True)
-        for stage in stages:
-            save_to_file(process_json = stage[0], name = stage[1], stage = stage[2], incremental_path=incremental_path, convert=True)
+        save_stages(stages, incremental_path)
         back(my_header, json_result=json_result, nodeid=nodeid, uuid=uuid, search_flag=search_flag)
     elif choice_ICS == "s":
-        process_json,_ = process_info(nodeid, uuid, my_header,okobau , pprint=False)
+        process_json,_ = process_info(nodeid, uuid, my_header,okobau , pprint=False, version=version)
         save_to_file(process_json)
         back(my_header, json_result=json_result, nodeid=nodeid, uuid=uuid, search_flag=search_flag)
     return choice
@@ -268,59 +467,126 @@ def get_node_origin():
         show_choices=False
     )
     if node_choice == "q":
-        click.echo("Goodbye")
-        exit()
+        goodbye()
     node_choice = list(base_urls)[int(node_choice)]
     return node_choice
 
 
-def search_EPDs(api_key, params, okobau, search_keyword):
+def search_EPDs(api_key, params, okobau, search_keyword, jsonl=False, limit=None, page_size=None):
+    import requests
 
     my_header = {"Authorization": "Bearer " + api_key}
 
     # NODE BASE URLs
     # base_url = get_user_choice_node(base_urls)
-    request_params = {
-                "search": "true",
-                "metaDataOnly": "false",
-                "distributed": "true",
-                "virtual": "true",
-                "format": "JSON",
-                "view": "extended",
-            }
-    params = {"name": "plaster","pageSize": "10"}
+    request_params = dict(SEARCH_PARAMS)
     request_params.update(params)
-    print("search_keyword: ", search_keyword)
 
     if search_keyword:
         request_params["name"] = search_keyword
+    page_size = page_size or int(request_params.pop("pageSize", 10))
+    request_params.pop("pageSize", None)
+    if not jsonl:
+        limit = limit or page_size
+    if okobau:
+        hits = iter_search("OEKOBAU.DAT", request_params, page_size=page_size, limit=limit)
+    elif not okobau:
+        hits = iter_search("ECOPLATFORM", request_params, headers=my_header, page_size=page_size, limit=limit)
     try:
-        if okobau:
-            process_url = base_urls["OEKOBAU.DAT"] + "processes/"
-            response = requests.get(process_url, params=request_params)
-        elif not okobau:
-            process_url = base_urls["ECOPLATFORM"] + "processes/"
-            response = requests.get(
-                process_url, params=request_params, headers=my_header
-            )
-        response.raise_for_status()
+        if jsonl:
+            for hit in hits:
+                click.echo(json.dumps(hit, ensure_ascii=False))
+            return
+        # The distributed search lists an EPD once per node that publishes it.
+        merged = MergedHits()
+        for hit in hits:
+            merged.add(hit)
+        json_result = {"data": merged.hits()}
     except requests.exceptions.HTTPError as err:
-        if response.status_code == 403:
+        if err.response.status_code == 403:
             click.secho("403 Forbidden: Possibly due to an invalid or expired API token.", fg="red")
-        raise SystemExit(click.secho(err, fg="red"))
-    json_result = json.loads(response.text)
+        raise click.ClickException(str(err))
+    finally:
+        hits.close()
 
+    show_results(my_header, json_result, okobau)
+    
+    return
+
+
+def show_results(my_header, json_result, okobau):
     results = []
     for i, result in enumerate(json_result["data"]):
         title = "#"*24+ f" RESULT {i} "+ "#"*24
         results.append(click.style(title, fg="cyan"))
         results.append(json.dumps(result, indent=4))
     click.echo_via_pager("\n".join(results), color=True)
-    click.secho("\n".join(results))
 
-    info_or_convert(my_header, json_result=json_result, okobau=okobau, search_flag=True)
-    
-    return
+    try:
+        info_or_convert(my_header, json_result=json_result, okobau=okobau, search_flag=True)
+    finally:
+        prefetch.cancel()
+
+
+def search_nodes(api_key, nodes, params, search_keyword, jsonl=False, limit=None, page_size=None, node_timeout=20):
+    # Search every node on its own, in parallel, instead of one distributed search.
+    import asyncio
+
+    my_header = {"Authorization": "Bearer " + api_key}
+    request_params = dict(SEARCH_PARAMS)
+    request_params.update(params)
+    if search_keyword:
+        request_params["name"] = search_keyword
+    page_size = page_size or int(request_params.pop("pageSize", 10))
+    request_params.pop("pageSize", None)
+    if not jsonl:
+        limit = limit or page_size
+
+    def headers_for(nodeid):
+        return None if nodeid == "OEKOBAU.DAT" else my_header
+
+    def on_hit(nodeid, hit, merged):
+        # A UUID is streamed again when a node has a newer version of it.
+        if jsonl and merged:
+            click.echo(json.dumps(hit, ensure_ascii=False))
+
+    logger.info("Searching %s.", ", ".join(nodes))
+    merged, failures = asyncio.run(fan_out_search(
+        nodes, request_params, headers_for, page_size=min(page_size, limit or page_size),
+        limit=limit, timeout=node_timeout, on_hit=on_hit,
+    ))
+    for nodeid, err in failures.items():
+        reason = f"no answer within {node_timeout:g}s" if isinstance(err, (asyncio.TimeoutError, TimeoutError)) else err
+        logger.warning("%s was skipped: %s", nodeid, reason)
+    if jsonl:
+        return
+    hits = merged.hits()
+    if not hits:
+        click.secho("No EPDs found.", fg="yellow")
+        return
+    show_results(my_header, {"data": hits}, okobau=False)
+
+
+def search_offline(api_key, okobau, search_keyword, modules=(), valid_in=None, unit=None, jsonl=False, limit=None):
+    my_header = {"Authorization": "Bearer " + api_key}
+    index = local_index.get_index()
+    if not index.count():
+        raise SystemExit(click.secho("The local index is empty. Fill it from the cache and the mirrors with 'update-index'.", fg="red"))
+    hits = index.search(
+        search_keyword, node="OEKOBAU.DAT" if okobau else None,
+        modules=modules, valid_in=valid_in, unit=unit, limit=limit,
+    )
+    if jsonl:
+        for hit in hits:
+            click.echo(json.dumps(hit, ensure_ascii=False))
+        return
+    if not hits:
+        click.secho("No EPDs found in the local index.", fg="yellow")
+        return
+    try:
+        info_or_convert(my_header, json_result={"data": hits}, okobau=okobau, search_flag=True)
+    finally:
+        prefetch.cancel()
 
 
 # @click.option(
@@ -348,8 +614,97 @@ def search_EPDs(api_key, params, okobau, search_keyword):
     prompt_required=False,
     default=Path.joinpath(Path(click.get_app_dir("EPDtoLCAByg")), Path(".config.cfg")),
 )
+@click.option(
+    '--timeout',
+    type=click.FloatRange(min=0, min_open=True),
+    default=60,
+    show_default=True,
+    help="Seconds to wait for a node to respond.",
+)
+@click.option(
+    '--retries',
+    type=click.IntRange(min=0),
+    default=3,
+    show_default=True,
+    help="Retries with backoff on connection errors, timeouts and 5xx responses.",
+)
+@click.option(
+    '--rate',
+    type=click.FloatRange(min=0, min_open=True),
+    default=4,
+    show_default=True,
+    help="Requests per second to start with on each node. It grows while the node keeps up and halves on 429/503.",
+)
+@click.option(
+    '--max-in-flight',
+    type=click.IntRange(min=1),
+    default=4,
+    show_default=True,
+    help="Requests at a time per node.",
+)
+@click.option(
+    '--no-cache',
+    is_flag=True,
+    default=False,
+    help="Always download process datasets instead of using the local cache.",
+)
+@click.option(
+    '--cache-ttl',
+    type=click.FloatRange(min=0),
+    default=168,
+    show_default=True,
+    help="Hours before a cached process dataset is revalidated with its node.",
+)
+@click.option(
+    '--no-banner',
+    is_flag=True,
+    default=False,
+    envvar="EPD_TO_LCABYG_NO_BANNER",
+    help="Don't clear the screen and show the title bar. Also skipped when output is not a terminal.",
+)
+@click.option(
+    '--strict',
+    is_flag=True,
+    default=False,
+    help="Never prompt for unmatched categories, units or dataset types. Such EPDs go to the review queue instead.",
+)
+@click.option(
+    '--verbose', '-v',
+    count=True,
+    help="Also log details of every conversion, e.g. the generated stages. -vv also logs every HTTP request.",
+)
+@click.option(
+    '--quiet', '-q',
+    is_flag=True,
+    default=False,
+    help="Only log warnings and errors.",
+)
+@click.option(
+    '--log-json',
+    type=click.Path(dir_okay=False, writable=True, path_type=Path),
+    envvar="EPD_TO_LCABYG_LOG_JSON",
+    help="Also append the log as JSON lines to this file.",
+)
+@click.option(
+    '--profile',
+    is_flag=True,
+    default=False,
+    help="Time every phase (requests, JSON decoding, conversion, prompts, writes) per EPD and print a summary at the end.",
+)
+@click.option(
+    '--profile-trace',
+    type=click.Path(dir_okay=False, writable=True, path_type=Path),
+    default="profile.trace.json",
+    show_default=True,
+    help="With --profile, where to write the spans as a Chrome trace (chrome://tracing, ui.perfetto.dev).",
+)
+@click.option(
+    '--profile-cprofile',
+    type=click.Path(dir_okay=False, writable=True, path_type=Path),
+    help="With --profile, also run the conversions under cProfile and save the stats to this file.",
+)
 @click.pass_context
-def main(ctx, config_file):
+def main(ctx, config_file, timeout, retries, rate, max_in_flight, no_cache, cache_ttl, no_banner, strict, verbose, quiet, log_json, profile, profile_trace, profile_cprofile):
     """
     A little tool that converts EPDs from either ECO PORTAL or OKOBAUDAT to LCAByg compatible JSON files.
     You can either:
@@ -360,15 +715,25 @@ def main(ctx, config_file):
     You need a valid API key from ECO Platform for the tool to work. You can
     sign up for a free account at https://data.eco-platform.org/registration.xhtml.
     """
-    display_title_bar()
+    if not no_banner and sys.stdout.isatty():
+        display_title_bar()
+    log.configure(-1 if quiet else verbose, log_json)
+    if profile:
+        profiling.enable(profile_cprofile)
+        ctx.call_on_close(lambda: profiling.finish(profile_trace))
+    http_client.configure(
+        timeout=(min(timeout, 10), timeout), retries=retries,
+        rate=rate, max_rate=max(rate, http_client.settings["max_rate"]), max_in_flight=max_in_flight,
+    )
+    cache.configure(enabled=not no_cache, ttl=cache_ttl * 3600)
     config_file = create_config(config_file)
     if os.path.exists(config_file):
         with open(config_file, "r+") as cfg:
             config = json.loads(cfg.read())
             api_key = config["api_key"]
             result_folder = config["result_folder"]
-        if not api_key:
-            raise SystemExit(click.secho("No API key found. Please set your API key using the 'set-api-key' command or by placing it directly in the config file.", fg="red"))
+        if not api_key and ctx.invoked_subcommand not in OFFLINE_COMMANDS:
+            raise click.ClickException(NO_API_KEY)
     choice = ''
     # while choice != 'q':    
         
@@ -379,7 +744,8 @@ def main(ctx, config_file):
     ctx.obj = {
             'api_key': api_key,
             'config_file': config_file,
-            'result_folder': result_folder
+            'result_folder': result_folder,
+            'strict': strict,
         }
 
 
@@ -415,6 +781,16 @@ def read_config_file(ctx):
     click.secho(f"Your config file is: {config_file}!", fg='green')
 
 
+@main.command()
+@click.confirmation_option(prompt="Delete all cached process datasets?")
+def clear_cache():
+    """
+    Delete all cached process datasets.
+    """
+    cache.clear_cache()
+    click.secho("Cache cleared.", fg="green")
+
+
 def create_config(user_config):
     config = dict.fromkeys(['api_key', 'result_folder'])
     user_config_dir = user_config.parent.absolute()
@@ -446,10 +822,9 @@ def set_api_key(ctx, api_key):
     Save your API key for Eco PORTAL.
     """
     config_file = ctx.obj['config_file']
-    print("config_file API: ", config_file)
+    logger.debug("Updating the API key in %s", config_file)
     with open(config_file, 'r+') as cfg:
         config = json.loads(cfg.read())
-        print("READ CONFIG: ", config)
         result_folder = config['result_folder']
     with open(config_file, 'w+') as cfg:
         config["api_key"] = api_key
@@ -473,10 +848,9 @@ def set_result_folder(ctx, result_folder):
     Set folder path for saving converted files.
     """
     config_file = ctx.obj['config_file']
-    print("config_file  result folder: ", config_file)
+    logger.debug("Updating the result folder in %s", config_file)
     with open(config_file, 'r+') as cfg:
         config = json.loads(cfg.read())
-        print("READ CONFIG: ", config)
         # result_folder = config['result_folder']
     with open(config_file, 'w+') as cfg:
         config["result_folder"] = result_folder
@@ -494,8 +868,8 @@ def set_result_folder(ctx, result_folder):
 @click.option(
     '--params', '-p',
     type=dict,
-    help='Search parameters as a dict. \n"name" is the search term.\n"pagesize" is the number of (top) results returned.',
-    default = {"name": "plaster", "sortBy": "referenceYear","sortOrder": "false","pageSize": "10","location": "RER"},
+    help='Search parameters as a dict. \n"name" is the search term.\n"pagesize" is the number of (top) results returned.\nOther soda4LCA search parameters, e.g. "sortBy", "sortOrder" or "location", are sent as given.',
+    default = {"name": "plaster", "pageSize": "10"},
     show_default = True,
     )
 @click.option(
@@ -503,16 +877,87 @@ def set_result_folder(ctx, result_folder):
     type=str,
     help="search keyword"
 )
+@click.option(
+    "--jsonl",
+    is_flag=True,
+    default=False,
+    help="Stream every hit as one JSON line to stdout instead of picking a result.",
+)
+@click.option(
+    "--limit", "-l",
+    type=click.IntRange(min=1),
+    help="Stop after this many hits. With --jsonl all hits are streamed by default.",
+)
+@click.option(
+    "--page-size",
+    type=click.IntRange(min=1),
+    help='Hits requested per page. Defaults to "pageSize" in the search parameters.',
+)
+@click.option(
+    "--offline",
+    is_flag=True,
+    default=False,
+    help="Search the local index of cached and mirrored EPDs instead of the node.",
+)
+@click.option(
+    "--module", "-m", "modules",
+    multiple=True,
+    help="Offline only: the EPD has to declare this module, e.g. -m A1-A3 -m C3.",
+)
+@click.option(
+    "--valid-in",
+    type=click.IntRange(1900, 2200),
+    help="Offline only: the EPD has to be valid in this year.",
+)
+@click.option(
+    "--unit",
+    help="Offline only: reference unit of the EPD, e.g. kg or m2.",
+)
+@click.option(
+    "--prefetch", "prefetch_top",
+    type=click.IntRange(min=0),
+    default=prefetch.settings["top_n"],
+    show_default=True,
+    help="Download this many of the top results in the background while you pick one. 0 turns it off.",
+)
+@click.option(
+    "--node", "-n", "nodes",
+    type=click.Choice(list(base_urls) + ["all"]),
+    multiple=True,
+    help="Search these nodes directly and in parallel instead of the distributed ECO Platform search. Repeat it or use 'all'.",
+)
+@click.option(
+    "--node-timeout",
+    type=click.FloatRange(min=0, min_open=True),
+    default=20,
+    show_default=True,
+    help="Seconds after which a node that hasn't answered is left out (with --node).",
+)
 @click.pass_context
-def search(ctx, okobau, params, search_keyword):
+def search(ctx, okobau, params, search_keyword, jsonl, limit, page_size, offline, modules, valid_in, unit, prefetch_top, nodes, node_timeout):
     """
     Search for EPDs. Save it as a LCAByg compatible JSON file.
     """
     api_key = ctx.obj['api_key']
+    prefetch.configure(top_n=prefetch_top)
+    if nodes and not offline:
+        nodes = list(base_urls) if "all" in nodes else list(dict.fromkeys(nodes))
+        if not jsonl:
+            enable_line_editing()
+        search_nodes(api_key, nodes, params, search_keyword, jsonl=jsonl, limit=limit, page_size=page_size, node_timeout=node_timeout)
+        return
+    if offline:
+        if not jsonl:
+            enable_line_editing()
+        search_offline(api_key, okobau, search_keyword or params.get("name"), modules, valid_in, unit, jsonl=jsonl, limit=limit)
+        return
+    if jsonl:
+        search_EPDs(api_key, params, okobau, search_keyword, jsonl=True, limit=limit, page_size=page_size or 100)
+        return
+    enable_line_editing()
     #if not (okobau, params, search_keyword):
     
-    response = search_EPDs(api_key, params, okobau, search_keyword)
-    print(f"Response: {response}.")
+    search_EPDs(api_key, params, okobau, search_keyword, limit=limit, page_size=page_size)
 
 @main.command()
 @click.argument('UUID')
@@ -523,12 +968,505 @@ def existing(ctx, uuid):
     """
     api_key = ctx.obj['api_key']
 
+    enable_line_editing()
     print(colored(f"\nThe existing UUID is {uuid}.", "green"))
     nodeid = get_node_origin()
     api_key = ctx.obj['api_key']
     my_header = {"Authorization": "Bearer " + api_key}
     info_or_convert(my_header, search_flag=False, nodeid=nodeid, uuid=uuid)
 
+@main.command()
+@click.argument(
+    'manifest',
+    type=click.Path(exists=True, dir_okay=False, readable=True, path_type=Path),
+)
+@click.option(
+    '--jobs', '-j',
+    type=click.IntRange(1, 64),
+    default=8,
+    show_default=True,
+    help="Number of EPDs downloaded concurrently.",
+)
+@click.option(
+    '--bundle', '-b',
+    type=click.Path(dir_okay=False, writable=True, path_type=Path),
+    help="Write all EPDs as one LCAByg project file (Product, Stages and ProductToStage edges) instead of a folder per EPD.",
+)
+@click.option(
+    '--compact',
+    is_flag=True,
+    default=False,
+    help="Write the bundle without indentation.",
+)
+@click.option(
+    '--on-exists',
+    type=click.Choice(POLICIES),
+    default="suffix",
+    show_default=True,
+    help='What to do when the result folder already has the EPD: save with a "_<n>" suffix, overwrite it if it has the same version, or skip it. With skip, an identical dataset from another node that was converted to the result folder before is skipped too.',
+)
+@click.option(
+    '--journal',
+    type=click.Path(dir_okay=False, writable=True, path_type=Path),
+    help='Checkpoint journal of the run. Defaults to "<MANIFEST>.journal" next to the manifest.',
+)
+@click.option(
+    '--resume',
+    is_flag=True,
+    default=False,
+    help="Continue an interrupted run: skip the EPDs the journal has as done and retry the failed ones.",
+)
+@click.option(
+    '--retry-budget',
+    type=click.IntRange(1),
+    default=3,
+    show_default=True,
+    help="With --resume, how many times an EPD may fail before it is no longer retried.",
+)
+@click.pass_context
+def batch(ctx, manifest, jobs, bundle, compact, on_exists, journal, resume, retry_budget):
+    """
+    Convert every EPD in a manifest without any prompts.
+
+    MANIFEST is a CSV or JSONL file with a "nodeid" and a "uuid" per EPD,
+    and optionally its "version": a dataset of that version that was
+    already downloaded from another node is then reused. The output of
+    'search --jsonl' is a manifest. Converted files are saved to the result folder. EPDs that fail are
+    reported at the end and do not stop the run. Every finished EPD is
+    recorded in a journal, so an interrupted run can be picked up again
+    with --resume.
+    """
+    if resume and bundle:
+        raise click.UsageError("--resume can't be used with --bundle, the bundle is written in one go.")
+    api_key = ctx.obj['api_key']
+    result_folder = ctx.obj['result_folder']
+    my_header = {"Authorization": "Bearer " + api_key}
+    items = read_manifest(manifest)
+    try:
+        journal = BatchJournal(journal or manifest.with_name(manifest.name + ".journal"), resume=resume)
+    except FileExistsError as err:
+        raise click.UsageError(f"{err} Continue it with --resume, or remove it or pass another --journal to start over.")
+    if resume:
+        items, skipped = journal.plan(items, retry_budget)
+        done = sum(entry["status"] == "done" for _, entry in skipped)
+        logger.info("Resuming: %d EPDs are already done, %d failed %d times and are skipped.", done, len(skipped) - done, retry_budget)
+    http_client.configure(pool_size=max(jobs, http_client.settings["pool_size"]))
+    logger.info("Converting %d EPDs with %d workers.", len(items), jobs)
+
+    def fetch(item):
+        return fetch_item(item, my_header)
+
+    bundled = set()
+
+    def handle(item, fetched):
+        process_json, uri = fetched
+        digest, output = converted_copy(item, process_json, result_folder)
+        item["digest"] = digest
+        if writer and digest and digest in bundled:
+            logger.info("%s %s is already in the bundle.", item["nodeid"], item["uuid"])
+            return bundle
+        if output and not writer and on_exists == "skip":
+            logger.info('%s %s is identical to the conversion in "%s".', item["nodeid"], item["uuid"], output)
+            return output
+        stages = convert_item(item, process_json, uri, my_header)
+        if writer:
+            with profiling.span("write"):
+                writer.add(generate_graph(stages))
+            if digest:
+                bundled.add(digest)
+            return bundle
+        output = save_converted(store, stages, process_json)
+        if digest and output:
+            identity.get_index().record_conversion(digest, conversion_fingerprint(), output)
+        return output
+
+    with journal:
+        if bundle:
+            with BundleWriter(bundle, compact=compact) as writer:
+                report = run_batch(items, fetch, handle, jobs=jobs, journal=journal)
+            logger.info('Bundle with %d nodes and edges was saved to "%s"', writer.count, bundle)
+        else:
+            writer = None
+            with OutputStore(result_folder, policy=on_exists) as store:
+                report = run_batch(items, fetch, handle, jobs=jobs, journal=journal)
+    print_report(report)
+
+@main.command()
+@click.argument('nodes', nargs=-1, type=click.Choice(list(base_urls)))
+@click.option(
+    '--mirror-dir',
+    type=click.Path(file_okay=False, writable=True, path_type=Path),
+    default=mirror.settings["path"],
+    show_default=True,
+    help="Folder holding one mirror per node.",
+)
+@click.option(
+    '--jobs', '-j',
+    type=click.IntRange(1, 64),
+    default=8,
+    show_default=True,
+    help="Number of EPDs downloaded concurrently.",
+)
+@click.option(
+    '--no-convert',
+    is_flag=True,
+    default=False,
+    help="Only mirror the process datasets, don't convert them.",
+)
+@click.pass_context
+def sync(ctx, nodes, mirror_dir, jobs, no_convert):
+    """
+    Mirror the datastock of one or more nodes (default: OEKOBAU.DAT).
+
+    Lists every process on the node and compares UUID and dataSetVersion
+    with the local mirror. Only new or changed datasets are downloaded and
+    converted; datasets that are no longer listed are marked as removed.
+    """
+    api_key = ctx.obj['api_key']
+    my_header = {"Authorization": "Bearer " + api_key}
+    http_client.configure(pool_size=max(jobs, http_client.settings["pool_size"]))
+    index = local_index.get_index()
+    for nodeid in nodes or ("OEKOBAU.DAT",):
+        node_dir = Path(mirror_dir).resolve() / nodeid
+        manifest = MirrorManifest(node_dir / "manifest.json")
+        headers = None if nodeid == "OEKOBAU.DAT" else my_header
+        logger.info("Listing the processes on %s.", nodeid)
+        listing = list_datastock(nodeid, headers)
+        new, changed, removed, unconverted = manifest.plan(listing, convert=not no_convert)
+        for uuid in removed:
+            manifest.tombstone(uuid)
+        logger.info(
+            "%s: %d processes, %d new, %d changed, %d removed, %d not converted yet.",
+            nodeid, len(listing), len(new), len(changed), len(removed), len(unconverted),
+        )
+        items = [{"nodeid": nodeid, "uuid": uuid, "version": listing[uuid]} for uuid in new + changed]
+        # Mirrored with --no-convert before: converted from the mirror.
+        items += [{"nodeid": nodeid, "uuid": uuid, "version": listing[uuid], "mirrored": True} for uuid in unconverted]
+
+        def fetch(item):
+            process_path = node_dir / "processes" / f'{item["uuid"]}.json'
+            if not item.get("mirrored") or not process_path.exists():
+                item.pop("mirrored", None)
+                return fetch_item(item, my_header)
+            with open(process_path, "r", encoding="utf-8") as f:
+                return json.load(f), base_urls[nodeid] + "processes/" + item["uuid"]
+
+        def handle(item, fetched):
+            process_json, uri = fetched
+            process_path = node_dir / "processes" / f'{item["uuid"]}.json'
+            if not item.get("mirrored"):
+                write_json(process_path, process_json)
+                index.add(nodeid, process_json, str(process_path))
+            output = None
+            if not no_convert:
+                digest, output = converted_copy(item, process_json, Path(mirror_dir).resolve())
+            if not no_convert and output is None:
+                stages = convert_item(item, process_json, uri, my_header)
+                output = node_dir / "converted" / item["uuid"]
+                shutil.rmtree(output, ignore_errors=True)
+                save_stages(stages, output)
+                if digest:
+                    identity.get_index().record_conversion(digest, conversion_fingerprint(), output)
+            manifest.record(item["uuid"], dataset_version(process_json), "ok", output, converted=not no_convert)
+            return output
+
+        report = run_batch(items, fetch, handle, jobs=jobs)
+        for item, _ in report.failed:
+            manifest.record(item["uuid"], item["version"], "failed")
+        manifest.save()
+        print_report(report)
+
+@main.command()
+@click.argument(
+    'archive',
+    type=click.Path(exists=True, dir_okay=False, readable=True, path_type=Path),
+)
+@click.option(
+    '--node', '-n',
+    type=click.Choice(list(base_urls)),
+    default="OEKOBAU.DAT",
+    show_default=True,
+    help="Node the archive was exported from. Used for the EPD links and category matching.",
+)
+@click.option(
+    '--bundle', '-b',
+    type=click.Path(dir_okay=False, writable=True, path_type=Path),
+    help="Write all EPDs as one LCAByg project file instead of a folder per EPD.",
+)
+@click.option(
+    '--compact',
+    is_flag=True,
+    default=False,
+    help="Write the bundle without indentation.",
+)
+@click.option(
+    '--on-exists',
+    type=click.Choice(POLICIES),
+    default="suffix",
+    show_default=True,
+    help='What to do when the result folder already has the EPD.',
+)
+@click.pass_context
+def import_archive(ctx, archive, node, bundle, compact, on_exists):
+    """
+    Convert every process in an ILCD ZIP archive, without any API calls.
+
+    ARCHIVE is an ILCD export (e.g. of a soda4LCA datastock). Processes are
+    read from the ZIP one at a time, and reference units are resolved from
+    the flows and unit groups in the archive. EPDs whose unit isn't in the
+    archive fail and are put in the review queue. Needs no API key.
+    """
+    result_folder = ctx.obj['result_folder']
+
+    with ILCDArchive(archive) as ilcd:
+        items = [{"nodeid": node, "uuid": uuid} for uuid in ilcd.process_uuids()]
+        logger.info("Converting %d EPDs from %s.", len(items), archive)
+
+        def read(item):
+            uri = base_urls[node] + "processes/" + item["uuid"]
+            return ilcd.process_json(item["uuid"]), uri
+
+        def handle(item, fetched):
+            process_json, uri = fetched
+            stages = convert_item(item, process_json, uri, my_header={}, offline=True)
+            if writer:
+                with profiling.span("write"):
+                    writer.add(generate_graph(stages))
+                return bundle
+            return save_converted(store, stages, process_json)
+
+        # ZIP entries are read one at a time, conversion is CPU bound anyway.
+        if bundle:
+            with BundleWriter(bundle, compact=compact) as writer:
+                report = run_batch(items, read, handle, jobs=1)
+        else:
+            writer = None
+            with OutputStore(result_folder, policy=on_exists) as store:
+                report = run_batch(items, read, handle, jobs=1)
+    print_report(report)
+    if report.failed:
+        ctx.exit(1)
+
+
+@main.command()
+@click.argument(
+    'folder',
+    type=click.Path(exists=True, file_okay=False, readable=True, path_type=Path),
+)
+@click.option(
+    '--node', '-n',
+    type=click.Choice(list(base_urls)),
+    default="OEKOBAU.DAT",
+    show_default=True,
+    help="Node the EPDs were downloaded from. Used for the EPD links and category matching.",
+)
+@click.option(
+    '--jobs', '-j',
+    type=click.IntRange(1, 64),
+    default=None,
+    help="Number of worker processes.  [default: number of CPUs]",
+)
+@click.option(
+    '--bundle', '-b',
+    type=click.Path(dir_okay=False, writable=True, path_type=Path),
+    help="Write all EPDs as one LCAByg project file instead of a folder per EPD.",
+)
+@click.option(
+    '--compact',
+    is_flag=True,
+    default=False,
+    help="Write the bundle without indentation.",
+)
+@click.option(
+    '--on-exists',
+    type=click.Choice(POLICIES),
+    default="suffix",
+    show_default=True,
+    help='What to do when the result folder already has the EPD.',
+)
+@click.pass_context
+def convert_dir(ctx, folder, node, jobs, bundle, compact, on_exists):
+    """
+    Convert a folder of saved process JSON files on all CPU cores.
+
+    FOLDER holds process datasets as saved by the "s" action or by 'sync'
+    (the "processes" folder of a node mirror). Files are converted in
+    worker processes and written in file name order, so the output is the
+    same for any number of jobs.
+    """
+    result_folder = ctx.obj['result_folder']
+    # Only unit groups missing from the datasets are downloaded.
+    my_header = {"Authorization": "Bearer " + ctx.obj['api_key']} if ctx.obj['api_key'] else {}
+    paths = sorted(path for path in Path(folder).glob("*.json") if not path.name.startswith("."))
+    logger.info("Converting %d EPDs from %s with %d processes.", len(paths), folder, jobs or os.cpu_count())
+
+    report = BatchReport()
+    started = time.perf_counter()
+
+    def handle(result):
+        item = {"nodeid": node, "uuid": result.get("uuid", Path(result["path"]).name)}
+        if result["error"]:
+            if result["mapping"]:
+                mapping.queue_for_review(dict(
+                    item, version=result["version"], name=result["name"], url=result["url"], **result["mapping"]
+                ))
+            report.failed.append((item, result["error"]))
+            logger.error('Failed %s: %s', result["path"], result["error"], extra=item)
+        elif writer:
+            with profiling.span("write"):
+                writer.add_serialized(result["graph"])
+            report.done.append((item, bundle))
+        else:
+            incremental_path = allocate_output(store, result["name"], result["uuid"], result["version"])
+            if incremental_path:
+                save_stage_texts(result["stages"], incremental_path)
+            report.done.append((item, incremental_path))
+
+    results = convert_files(paths, node, base_urls[node], my_header, jobs=jobs, bundle=bool(bundle), compact=compact)
+    if bundle:
+        with BundleWriter(bundle, compact=compact) as writer:
+            for result in results:
+                handle(result)
+        logger.info('Bundle with %d nodes and edges was saved to "%s"', writer.count, bundle)
+    else:
+        writer = None
+        with OutputStore(result_folder, policy=on_exists) as store:
+            for result in results:
+                handle(result)
+    report.elapsed = time.perf_counter() - started
+    print_report(report)
+
+
+@main.command()
+@click.option(
+    '--mirror-dir',
+    type=click.Path(file_okay=False, path_type=Path),
+    default=mirror.settings["path"],
+    show_default=True,
+    help="Folder holding the node mirrors made by 'sync'.",
+)
+def update_index(mirror_dir):
+    """
+    Add the cached and mirrored EPDs to the local index for 'search --offline'.
+
+    Only datasets that are new or changed since the last update are read.
+    """
+    index = local_index.get_index()
+    added, failed = local_index.update_index(index, cache.get_cache(), mirror_dir)
+    click.secho(f"Indexed {added} EPDs, the index holds {index.count()}.", fg="green")
+    if failed:
+        click.secho(f"{failed} datasets could not be read.", fg="yellow")
+
+
+@main.command()
+@click.argument(
+    'source',
+    type=click.Path(exists=True, readable=True, path_type=Path),
+)
+@click.argument(
+    'output',
+    type=click.Path(dir_okay=False, writable=True, path_type=Path),
+)
+@click.option(
+    '--format', '-f', 'output_format',
+    type=click.Choice(FORMATS),
+    help="Output format.  [default: from the OUTPUT extension, Parquet unless .csv]",
+)
+@click.option(
+    '--jobs', '-j',
+    type=click.IntRange(1, 64),
+    default=8,
+    show_default=True,
+    help="Number of EPDs downloaded concurrently, for a manifest.",
+)
+@click.pass_context
+def export_indicators(ctx, source, output, output_format, jobs):
+    """
+    Export the indicators of many EPDs to one Parquet or CSV table.
+
+    SOURCE is a folder of saved process JSON files or a batch manifest
+    (CSV or JSONL with "nodeid" and "uuid"). The table has one row per
+    uuid, indicator, unit, module, scenario and value.
+    """
+    output_format = resolve_format(output, output_format)
+    columns = IndicatorColumns()
+    if source.is_dir():
+        paths = sorted(path for path in source.glob("*.json") if not path.name.startswith("."))
+        items = [{"nodeid": str(source), "uuid": path.name, "path": path} for path in paths]
+
+        def fetch(item):
+            with open(item["path"], "r", encoding="utf-8") as f:
+                return json.load(f), None
+
+        jobs = 1
+    else:
+        if not ctx.obj['api_key']:
+            raise click.ClickException(NO_API_KEY)
+        my_header = {"Authorization": "Bearer " + ctx.obj['api_key']}
+        items = read_manifest(source)
+        http_client.configure(pool_size=max(jobs, http_client.settings["pool_size"]))
+
+        def fetch(item):
+            return fetch_item(item, my_header)
+
+    def handle(item, fetched):
+        process_json, _ = fetched
+        return columns.add(process_json)
+
+    logger.info("Reading the indicators of %d EPDs.", len(items))
+    report = run_batch(items, fetch, handle, jobs=jobs)
+    write_frame(columns.to_frame(), output, output_format)
+    click.secho(f'{len(columns)} indicator values were saved to "{output}" ({output_format}).', fg="green")
+    print_report(report)
+
+
+@main.command()
+@click.pass_context
+def review(ctx):
+    """
+    Convert the EPDs in the review queue, asking for the missing matches.
+
+    EPDs end up in the review queue when a batch, sync or --strict
+    conversion can't match their category, unit or dataset type. Answers
+    are saved to the mapping table, so similar EPDs convert on their own
+    next time.
+    """
+    enable_line_editing()
+    result_folder = ctx.obj['result_folder']
+    my_header = {"Authorization": "Bearer " + ctx.obj['api_key']}
+    entries = mapping.read_review_queue()
+    if not entries:
+        click.secho("The review queue is empty.", fg="green")
+        return
+    remaining = []
+    converted = 0
+    # Entries from here on weren't looked at yet and stay in the queue,
+    # also when the review is interrupted.
+    next_entry = 0
+    store = OutputStore(result_folder)
+    try:
+        for i, entry in enumerate(entries):
+            click.secho(f'[{i + 1}/{len(entries)}] {entry["name"]} ({entry["nodeid"]} {entry["uuid"]})', fg="cyan")
+            try:
+                process_json, uri = fetch_item(entry, my_header)
+                stages = convert_to_lcabyg(process_json, uri, my_header, entry["nodeid"])
+            except ConversionCancelled:
+                remaining.extend(entries[i:])
+                next_entry = len(entries)
+                break
+            except Exception as err:
+                click.secho(f"Failed: {err}", fg="red")
+                remaining.append(entry)
+                next_entry = i + 1
+                continue
+            save_converted(store, stages, process_json)
+            converted += 1
+            next_entry = i + 1
+    finally:
+        store.save()
+        mapping.write_review_queue(remaining + entries[next_entry:])
+    click.secho(f"{converted} of {len(entries)} EPDs converted.", fg="green")
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,176 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from appdirs import AppDirs
+
+DEFAULT_TABLE = Path(__file__).resolve().parent / "mapping_table.json"
+
+settings = {
+    # Answers given at the prompts are saved here, on top of the default table.
+    "path": Path(AppDirs("EPDtoLCAByg").user_data_dir) / "mappings.json",
+    "review_queue": Path(AppDirs("EPDtoLCAByg").user_data_dir) / "review_queue.jsonl",
+}
+
+# Sections of the table that can be extended by the user.
+LEARNED_SECTIONS = ("class_names", "unit_aliases", "data_type_keywords")
+
+_table = None
+_lock = threading.Lock()
+
+
+def _read_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def classes(process_json):
+    """
+    Yield (classification system, class) of an EPD, most specific class first.
+    """
+    try:
+        classifications = process_json["processInformation"]["dataSetInformation"]["classificationInformation"]["classification"]
+    except KeyError:
+        return
+    for classification in classifications:
+        for class_ in sorted(classification.get("class", []), key=lambda c: c.get("level", 0), reverse=True):
+            yield classification.get("name", ""), class_
+
+
+class MappingTable:
+    """
+    Maps classifications, reference units and dataset subtypes of an EPD to
+    their LCAByg values.
+
+    The default table ships with the tool, answers learned at the prompts
+    are kept in a user table. Both are compiled into plain dict lookups
+    once, when the table is loaded.
+    """
+
+    def __init__(self, default_path, user_path):
+        self.user_path = Path(user_path)
+        self.table = _read_json(default_path)
+        self.user_table = _read_json(self.user_path)
+        for section in LEARNED_SECTIONS:
+            self.table[section] = {**self.table.get(section, {}), **self.user_table.get(section, {})}
+        self._compile()
+
+    def _compile(self):
+        self.hyper_categories = self.table["hyper_categories"]
+        self.units = self.table["units"]
+        self.data_types = self.table["data_types"]
+        self.class_ids = {
+            system.lower(): ids for system, ids in self.table["class_ids"].items()
+        }
+        self.class_names = {name.lower(): category for name, category in self.table["class_names"].items()}
+        self.unit_aliases = {unit.lower(): unit for unit in self.units}
+        self.unit_aliases.update({alias.lower(): unit for alias, unit in self.table["unit_aliases"].items()})
+        # Exact subtypes learned at the prompt win over keyword matches.
+        keywords = self.table["data_type_keywords"]
+        self.data_type_exact = {keyword.lower(): data_type for keyword, data_type in keywords.items()}
+        self.data_type_keywords = list(self.data_type_exact.items())
+
+    def hyper_category(self, classes, nodeid=None):
+        """
+        Return (hyper category, matched class) or (None, None) for the
+        (classification system, class) pairs of an EPD, see classes().
+        """
+        for system, class_ in classes:
+            if not system and nodeid == "OEKOBAU.DAT":
+                system = "OEKOBAU.DAT"
+            category = self.class_ids.get(system.lower(), {}).get(str(class_.get("classId")))
+            if category is None:
+                category = self.class_names.get(str(class_.get("value", "")).strip().lower())
+            if category is not None:
+                return category, class_
+        return None, None
+
+    def unit(self, unit):
+        return self.unit_aliases.get(str(unit).strip().lower())
+
+    def data_type(self, subtype):
+        subtype = str(subtype).strip().lower()
+        if subtype in self.data_type_exact:
+            return self.data_type_exact[subtype]
+        for keyword, data_type in self.data_type_keywords:
+            if keyword in subtype:
+                return data_type
+        return None
+
+    def learn(self, section, key, value):
+        """
+        Save an answer given at a prompt, so it's used from now on.
+        """
+        if section not in LEARNED_SECTIONS:
+            raise ValueError(f"Can't learn into {section}.")
+        with _lock:
+            self.user_table.setdefault(section, {})[key] = value
+            self.table[section][key] = value
+            self._compile()
+            self.user_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.user_path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.user_table, f, ensure_ascii=False, indent=4)
+            os.replace(tmp_path, self.user_path)
+
+
+def get_table():
+    global _table
+    with _lock:
+        if _table is None:
+            _table = MappingTable(DEFAULT_TABLE, settings["path"])
+        return _table
+
+
+def review_key(entry):
+    return entry["nodeid"], entry["uuid"], entry.get("version") or ""
+
+
+def _read_queue(path):
+    # One entry per (nodeid, uuid, version): the last one queued, in the
+    # place the EPD was first queued.
+    entries = {}
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    entries[review_key(entry)] = entry
+    return list(entries.values())
+
+
+def _write_queue(path, entries):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for entry in entries:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, path)
+
+
+def queue_for_review(entry):
+    """
+    Add an EPD that couldn't be mapped to the review queue. An EPD that is
+    already queued is replaced, so reruns don't queue it twice.
+    """
+    entry = dict(entry, queued_at=time.strftime("%Y-%m-%dT%H:%M:%S"))
+    path = Path(settings["review_queue"])
+    with _lock:
+        entries = {review_key(queued): queued for queued in _read_queue(path)}
+        entries[review_key(entry)] = entry
+        _write_queue(path, entries.values())
+
+
+def read_review_queue():
+    with _lock:
+        return _read_queue(Path(settings["review_queue"]))
+
+
+def write_review_queue(entries):
+    with _lock:
+        _write_queue(Path(settings["review_queue"]), entries)
@@ -0,0 +1,92 @@
+import json
+import os
+import time
+from pathlib import Path
+
+from appdirs import AppDirs
+
+from epd_search import iter_search
+
+settings = {
+    "path": Path(AppDirs("EPDtoLCAByg").user_data_dir) / "mirror",
+}
+
+# Plain listing of a node's own datastock: no search, no distributed query.
+LIST_PARAMS = {"format": "JSON"}
+
+
+def list_datastock(nodeid, headers=None, page_size=500):
+    """
+    Return {uuid: dataSetVersion} for every process on a node.
+    """
+    return {hit["uuid"]: hit.get("version", "") for hit in iter_search(nodeid, LIST_PARAMS, headers, page_size=page_size)}
+
+
+def write_json(path, data, indent=4):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+    os.replace(tmp_path, path)
+
+
+class MirrorManifest:
+    """
+    The state of a node mirror: one entry per UUID with the mirrored
+    dataSetVersion, a status ("ok", "failed" or "removed"), whether and
+    where it was converted and when it was last synced.
+    """
+
+    save_every = 200
+
+    def __init__(self, path):
+        self.path = Path(path)
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except FileNotFoundError:
+            self.entries = {}
+        self._unsaved = 0
+
+    def plan(self, listing, convert=True):
+        """
+        Compare a datastock listing with the mirror. Returns the UUIDs that
+        are new, the ones that changed (other version, or failed or removed
+        last time), the ones that are no longer listed and, with `convert`,
+        the ones that are up to date but were mirrored without converting.
+        """
+        new, changed, unconverted = [], [], []
+        for uuid, version in listing.items():
+            entry = self.entries.get(uuid)
+            if entry is None:
+                new.append(uuid)
+            elif entry["status"] != "ok" or entry["version"] != version:
+                changed.append(uuid)
+            elif convert and not entry.get("converted", bool(entry.get("output"))):
+                unconverted.append(uuid)
+        removed = [uuid for uuid, entry in self.entries.items() if uuid not in listing and entry["status"] != "removed"]
+        return new, changed, removed, unconverted
+
+    def record(self, uuid, version, status, output=None, converted=False):
+        entry = self.entries.setdefault(uuid, {})
+        entry.update({
+            "version": version,
+            "status": status,
+            "converted": converted,
+            "output": str(output) if output else entry.get("output"),
+            "synced_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        })
+        self._unsaved += 1
+        if self._unsaved >= self.save_every:
+            self.save()
+
+    def tombstone(self, uuid):
+        entry = self.entries[uuid]
+        entry["status"] = "removed"
+        entry["removed_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        self._unsaved += 1
+
+    def save(self):
+        write_json(self.path, self.entries, indent=None)
+        self._unsaved = 0
@@ -0,0 +1,111 @@
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+POLICIES = ("suffix", "overwrite", "skip")
+
+
+def clean_name(name):
+    return re.sub('[^a-zA-Z0-9 \n\.]', '', name).replace(' ', '_')
+
+
+class OutputStore:
+    """
+    Hands out collision-free output paths in a result folder.
+
+    The folder is listed once and the used names are kept in memory, with a
+    counter per base name, so finding the next free "<name>_<i>" is O(1)
+    instead of probing the file system for _1, _2, ... every time.
+
+    Which EPD (UUID and dataSetVersion) was written to each name is kept in
+    a small index file in the folder. When an EPD is written again, the
+    policy decides what happens:
+
+        suffix     always write to a new "<name>_<i>"
+        overwrite  reuse the path of the same UUID and version
+        skip       don't write the same UUID and version again
+
+    The index is saved every `save_every` new outputs or `save_interval`
+    seconds, so a run that is killed loses at most that many owners.
+    """
+
+    index_name = ".outputs.json"
+    save_every = 100
+    save_interval = 5.0
+
+    def __init__(self, folder, policy="suffix"):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy {policy}, use one of {', '.join(POLICIES)}.")
+        self.folder = Path(folder).resolve()
+        self.policy = policy
+        self._lock = threading.Lock()
+        self.folder.mkdir(parents=True, exist_ok=True)
+        with os.scandir(self.folder) as entries:
+            self.used = {entry.name for entry in entries}
+        self.used.discard(self.index_name)
+        self.counters = {}
+        try:
+            with open(self.folder / self.index_name, "r", encoding="utf-8") as f:
+                owners = json.load(f)
+        except (FileNotFoundError, ValueError):
+            owners = {}
+        # Forget entries whose output was deleted since the last run.
+        self.owners = {name: owner for name, owner in owners.items() if name in self.used}
+        self.by_identity = {(owner["uuid"], owner["version"]): name for name, owner in self.owners.items()}
+        self._unsaved = 0
+        self._saved_at = time.monotonic()
+
+    def allocate(self, name, uuid=None, version=None, ext="", clean=True):
+        """
+        Return (path, status) for an output named after `name`. status is
+        "new", "overwrite" (the path holds an earlier write of the same EPD)
+        or "skip" (path is None). Without `clean` the name is used as given,
+        e.g. when the user typed it.
+        """
+        base = clean_name(name) if clean else name
+        path, status = self._allocate(base, uuid, version, ext)
+        if status == "new" and uuid and (
+            self._unsaved >= self.save_every or time.monotonic() - self._saved_at >= self.save_interval
+        ):
+            self.save()
+        return path, status
+
+    def _allocate(self, base, uuid, version, ext):
+        with self._lock:
+            existing = self.by_identity.get((uuid, version)) if uuid else None
+            if existing and self.policy == "skip":
+                return None, "skip"
+            if existing and self.policy == "overwrite":
+                return self.folder / existing, "overwrite"
+            candidate = f"{base}{ext}"
+            if candidate in self.used:
+                i = self.counters.get(base, 1)
+                while f"{base}_{i}{ext}" in self.used:
+                    i += 1
+                self.counters[base] = i + 1
+                candidate = f"{base}_{i}{ext}"
+            self.used.add(candidate)
+            if uuid:
+                self.owners[candidate] = {"uuid": uuid, "version": version}
+                self.by_identity[(uuid, version)] = candidate
+                self._unsaved += 1
+            return self.folder / candidate, "new"
+
+    def save(self):
+        tmp_path = self.folder / f"{self.index_name}.{os.getpid()}.tmp"
+        with self._lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.owners, f, ensure_ascii=False)
+            os.replace(tmp_path, self.folder / self.index_name)
+            self._unsaved = 0
+            self._saved_at = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.save()
+        return False
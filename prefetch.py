@@ -0,0 +1,114 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from log import get_logger
+
+logger = get_logger("prefetch")
+
+settings = {
+    # Results of an overview fetched ahead, 0 turns prefetching off.
+    "top_n": 5,
+    "jobs": 4,
+    # Prefetched datasets kept in memory, across overviews.
+    "max_items": 20,
+}
+
+_prefetcher = None
+_lock = threading.Lock()
+
+
+class Prefetcher:
+    """
+    Fetches the first results of a search overview in the background, so
+    picking one of them doesn't wait for the node.
+
+    fetch(hit) is run for at most `top_n` hits per overview on `jobs`
+    threads; the futures are kept in a bounded LRU store keyed by (nodeid,
+    uuid, version). Nothing beyond the top hits is ever requested, and
+    cancel() drops everything that hasn't started yet.
+    """
+
+    def __init__(self, fetch, top_n=5, jobs=4, max_items=20):
+        self.fetch = fetch
+        self.top_n = top_n
+        self.max_items = max(max_items, top_n)
+        self.store = OrderedDict()
+        self._pool = ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(nodeid, uuid, version=None):
+        return nodeid, uuid, version or ""
+
+    def start(self, hits):
+        with self._lock:
+            for hit in hits[:self.top_n]:
+                key = self.key(hit["nodeid"], hit["uuid"], hit.get("version"))
+                if key in self.store:
+                    self.store.move_to_end(key)
+                    continue
+                self.store[key] = self._pool.submit(self.fetch, hit)
+                while len(self.store) > self.max_items:
+                    _, future = self.store.popitem(last=False)
+                    future.cancel()
+
+    def get(self, nodeid, uuid, version=None):
+        """
+        Return the prefetched result, waiting for it if it's on its way, or
+        None if it wasn't prefetched, was cancelled or failed.
+        """
+        with self._lock:
+            future = self.store.get(self.key(nodeid, uuid, version))
+        if future is None or future.cancelled():
+            return None
+        try:
+            return future.result()
+        except Exception as err:
+            logger.debug("Prefetching %s %s failed: %s", nodeid, uuid, err)
+            return None
+
+    def cancel(self):
+        with self._lock:
+            for future in self.store.values():
+                future.cancel()
+            self.store.clear()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def configure(**kwargs):
+    global _prefetcher
+    unknown = set(kwargs) - set(settings)
+    if unknown:
+        raise TypeError(f"Unknown prefetch settings: {', '.join(sorted(unknown))}")
+    with _lock:
+        settings.update({key: value for key, value in kwargs.items() if value is not None})
+        if _prefetcher is not None:
+            _prefetcher.cancel()
+            _prefetcher = None
+
+
+def get_prefetcher(fetch):
+    """
+    Return the shared prefetcher, or None if prefetching is turned off.
+    """
+    global _prefetcher
+    if not settings["top_n"]:
+        return None
+    with _lock:
+        if _prefetcher is None:
+            _prefetcher = Prefetcher(fetch, settings["top_n"], settings["jobs"], settings["max_items"])
+        return _prefetcher
+
+
+def lookup(nodeid, uuid, version=None):
+    prefetcher = _prefetcher
+    return prefetcher.get(nodeid, uuid, version) if prefetcher is not None else None
+
+
+def cancel():
+    global _prefetcher
+    with _lock:
+        if _prefetcher is not None:
+            _prefetcher.cancel()
+            _prefetcher = None
@@ -0,0 +1,187 @@
+import contextlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+import click
+
+_profile = None
+_null_span = contextlib.nullcontext()
+
+
+class Profile:
+    """
+    What a run spent its time on: spans per phase (and per EPD, through
+    their args), requests and bytes per node and cache hits and misses.
+
+    Spans are kept in memory and written out as a Chrome trace
+    (chrome://tracing or https://ui.perfetto.dev) with the summary under
+    "otherData".
+    """
+
+    def __init__(self, cprofile_path=None):
+        # cProfile and pstats are only imported when profiling, to keep the start-up fast.
+        import cProfile
+
+        self.started = time.perf_counter()
+        self.spans = []
+        self.requests = defaultdict(lambda: [0, 0])
+        self.cache = defaultdict(lambda: [0, 0])
+        self.cprofile = cProfile.Profile() if cprofile_path else None
+        self.cprofile_path = cprofile_path
+        self._hot = False
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def span(self, name, args):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            ended = time.perf_counter()
+            thread = threading.current_thread()
+            with self._lock:
+                self.spans.append((name, started, ended - started, thread.ident, thread.name, args))
+
+    @contextlib.contextmanager
+    def hot_path(self):
+        # cProfile only sees the thread that enabled it: the main thread,
+        # where the conversions run.
+        if self.cprofile is None or self._hot or threading.current_thread() is not threading.main_thread():
+            yield
+            return
+        self._hot = True
+        self.cprofile.enable()
+        try:
+            yield
+        finally:
+            self.cprofile.disable()
+            self._hot = False
+
+    def count_request(self, nodeid, size):
+        with self._lock:
+            counts = self.requests[nodeid]
+            counts[0] += 1
+            counts[1] += size
+
+    def count_cache(self, name, hit):
+        with self._lock:
+            self.cache[name][0 if hit else 1] += 1
+
+    def phases(self):
+        """
+        Return {phase: (count, total seconds, max seconds)}.
+        """
+        phases = {}
+        for name, _, duration, _, _, _ in self.spans:
+            count, total, longest = phases.get(name, (0, 0.0, 0.0))
+            phases[name] = (count + 1, total + duration, max(longest, duration))
+        return phases
+
+    def slowest_epds(self, top=5):
+        # Time per EPD spent in the spans that are not nested in another.
+        per_epd = defaultdict(float)
+        for name, _, duration, _, _, args in self.spans:
+            if name in ("fetch", "handle") and args.get("uuid"):
+                per_epd[(args.get("nodeid"), args["uuid"])] += duration
+        return sorted(per_epd.items(), key=lambda item: item[1], reverse=True)[:top]
+
+    def summary(self):
+        return {
+            "elapsed": time.perf_counter() - self.started,
+            "phases": {name: {"count": count, "total": total, "max": longest} for name, (count, total, longest) in self.phases().items()},
+            "requests": {nodeid: {"requests": count, "bytes": size} for nodeid, (count, size) in self.requests.items()},
+            "cache": {name: {"hits": hits, "misses": misses} for name, (hits, misses) in self.cache.items()},
+        }
+
+    def summary_lines(self):
+        lines = [f"Profile of {time.perf_counter() - self.started:.2f}s (phases overlap when they run on several threads):"]
+        lines.append(f'  {"Phase":<20}{"Count":>8}{"Total s":>10}{"Mean ms":>10}{"Max ms":>10}')
+        for name, (count, total, longest) in sorted(self.phases().items(), key=lambda item: item[1][1], reverse=True):
+            lines.append(f"  {name:<20}{count:>8}{total:>10.3f}{total / count * 1000:>10.1f}{longest * 1000:>10.1f}")
+        if self.requests:
+            lines.append(f'  {"Node":<20}{"Requests":>8}{"KiB":>10}')
+            for nodeid, (count, size) in sorted(self.requests.items()):
+                lines.append(f"  {nodeid:<20}{count:>8}{size / 1024:>10.1f}")
+        if self.cache:
+            lines.append(f'  {"Cache":<20}{"Hits":>8}{"Misses":>10}{"Hit ratio":>10}')
+            for name, (hits, misses) in sorted(self.cache.items()):
+                lines.append(f"  {name:<20}{hits:>8}{misses:>10}{hits / (hits + misses):>10.0%}")
+        slowest = self.slowest_epds()
+        if slowest:
+            lines.append("  Slowest EPDs:")
+            for (nodeid, uuid), duration in slowest:
+                lines.append(f"  {duration * 1000:10.1f} ms  {nodeid} {uuid}")
+        return lines
+
+    def trace(self):
+        pid = os.getpid()
+        events = []
+        threads = {}
+        for name, started, duration, ident, thread_name, args in self.spans:
+            threads.setdefault(ident, thread_name)
+            events.append({
+                "name": name, "cat": "epd" if "uuid" in args else "run", "ph": "X", "pid": pid, "tid": ident,
+                "ts": (started - self.started) * 1e6, "dur": duration * 1e6, "args": args,
+            })
+        for ident, thread_name in threads.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": ident, "args": {"name": thread_name}})
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": self.summary()}
+
+
+def enable(cprofile_path=None):
+    global _profile
+    _profile = Profile(cprofile_path)
+    return _profile
+
+
+def finish(trace_path):
+    """
+    Stop recording, log the summary and write the trace and the cProfile stats.
+    """
+    global _profile
+    profile, _profile = _profile, None
+    if profile is None:
+        return
+    for line in profile.summary_lines():
+        click.echo(line, err=True)
+    with open(trace_path, "w", encoding="utf-8") as f:
+        json.dump(profile.trace(), f, default=str)
+    click.echo(f'Trace was saved to "{trace_path}"', err=True)
+    if profile.cprofile is not None:
+        import io
+        import pstats
+
+        profile.cprofile.dump_stats(profile.cprofile_path)
+        out = io.StringIO()
+        pstats.Stats(profile.cprofile, stream=out).sort_stats("cumulative").print_stats(15)
+        click.echo(out.getvalue(), err=True)
+        click.echo(f'cProfile stats were saved to "{profile.cprofile_path}"', err=True)
+
+
+def span(name, **args):
+    if _profile is None:
+        return _null_span
+    return _profile.span(name, args)
+
+
+def hot_path():
+    if _profile is None:
+        return _null_span
+    return _profile.hot_path()
+
+
+def count_request(nodeid, size):
+    if _profile is not None:
+        _profile.count_request(nodeid, size)
+
+
+def count_cache(name, hit):
+    if _profile is not None:
+        _profile.count_cache(name, hit)
+
+
+def enabled():
+    return _profile is not None
@@ -0,0 +1,116 @@
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+# Responses that mean "slow down" rather than "broken".
+THROTTLE_STATUSES = (429, 503)
+
+
+def retry_after_seconds(value, now=None):
+    """
+    Parse a Retry-After header, either seconds or an HTTP date.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - (now or time.time()))
+    except (TypeError, ValueError):
+        return None
+
+
+class NodeLimiter:
+    """
+    Schedules the requests to one node: a token bucket refilled at `rate`
+    requests per second (up to `burst` at once) and at most `max_in_flight`
+    requests at a time.
+
+    The rate adapts AIMD-style: every successful response adds `increase`
+    requests per second up to `max_rate`, a 429 or 503 halves it (down to
+    `min_rate`) and pauses the node for its Retry-After.
+    """
+
+    def __init__(self, rate=4.0, burst=4, max_in_flight=4, max_rate=20.0, min_rate=0.2, increase=0.1):
+        self.rate = rate
+        self.burst = burst
+        self.max_rate = max(max_rate, rate)
+        self.min_rate = min_rate
+        self.increase = increase
+        self.max_in_flight = max_in_flight
+        self.tokens = float(burst)
+        self.paused_until = 0.0
+        self.in_flight = 0
+        self.waiting = 0
+        self.requests = 0
+        self.throttled = 0
+        self.recent = deque()
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout=None):
+        """
+        Wait for a turn to send a request. Returns False if none came up
+        within `timeout` seconds.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self.waiting += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if now < self.paused_until:
+                        wait = self.paused_until - now
+                    elif self.in_flight >= self.max_in_flight:
+                        wait = None
+                    elif self.tokens >= 1:
+                        self.tokens -= 1
+                        self.in_flight += 1
+                        self.requests += 1
+                        self.recent.append(now)
+                        return True
+                    else:
+                        wait = (1 - self.tokens) / self.rate
+                    if deadline is not None:
+                        if now >= deadline:
+                            return False
+                        wait = deadline - now if wait is None else min(wait, deadline - now)
+                    self._cond.wait(wait)
+            finally:
+                self.waiting -= 1
+
+    def release(self, status=None, retry_after=None):
+        with self._cond:
+            self.in_flight -= 1
+            if status in THROTTLE_STATUSES:
+                self.throttled += 1
+                self.rate = max(self.min_rate, self.rate / 2)
+                self.tokens = min(self.tokens, 0.0)
+                pause = retry_after if retry_after is not None else 1 / self.rate
+                self.paused_until = max(self.paused_until, time.monotonic() + pause)
+            elif status is not None and status < 500:
+                self.rate = min(self.max_rate, self.rate + self.increase)
+            self._cond.notify_all()
+
+    def stats(self, window=10.0):
+        with self._cond:
+            now = time.monotonic()
+            while self.recent and self.recent[0] < now - window:
+                self.recent.popleft()
+            return {
+                "rate_limit": round(self.rate, 2),
+                "requests_per_s": round(len(self.recent) / window, 2),
+                "in_flight": self.in_flight,
+                "queued": self.waiting,
+                "requests": self.requests,
+                "throttled": self.throttled,
+                "paused": max(0.0, round(self.paused_until - now, 1)),
+            }
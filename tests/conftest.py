@@ -0,0 +1,47 @@
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# The modules pick their user folders when imported: point them at a
+# temporary one before any test imports them.
+_user_dirs = tempfile.mkdtemp(prefix="epdtolcabyg-tests-")
+os.environ["XDG_DATA_HOME"] = os.path.join(_user_dirs, "data")
+os.environ["XDG_CACHE_HOME"] = os.path.join(_user_dirs, "cache")
+
+sys.path[:0] = [str(ROOT), str(ROOT / "benchmarks")]
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"api_key": "test", "result_folder": str(tmp_path / "results")}))
+    return path
+
+
+@pytest.fixture
+def fake_node():
+    """
+    Start a FakeNode with the given datasets and options and register it
+    as `nodeid`.
+    """
+    import http_client
+    from fake_node import FakeNode
+
+    nodes = {}
+
+    def start(processes, unit_groups=None, nodeid="FAKE", **kwargs):
+        node = nodes[nodeid] = FakeNode(processes, unit_groups, **kwargs).start()
+        http_client.base_urls[nodeid] = node.url
+        return node
+
+    yield start
+    for nodeid, node in nodes.items():
+        node.stop()
+        http_client.base_urls.pop(nodeid, None)
+    http_client.configure()
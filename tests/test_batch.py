@@ -0,0 +1,85 @@
+import csv
+
+from click.testing import CliRunner
+
+import main
+from batch import read_manifest
+from fake_node import synthetic_node
+from journal import BatchJournal
+
+
+def write_manifest(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
+
+
+def batch(config_file, manifest, *args):
+    return CliRunner().invoke(main.main, ["--config-file", str(config_file), "--no-banner", "batch", str(manifest), *args])
+
+
+def test_read_manifest_keeps_an_optional_version(tmp_path):
+    manifest = write_manifest(tmp_path / "manifest.csv", [
+        {"nodeid": "FAKE", "uuid": " a ", "version": "01.00.000"},
+        {"nodeid": "FAKE", "uuid": "b", "version": ""},
+    ])
+
+    assert read_manifest(manifest) == [
+        {"nodeid": "FAKE", "uuid": "a", "version": "01.00.000"},
+        {"nodeid": "FAKE", "uuid": "b"},
+    ]
+
+
+def test_batch_reuses_the_copy_from_another_node(tmp_path, config_file, fake_node):
+    processes, _ = synthetic_node(3, seed=21)
+    first = fake_node(processes, nodeid="FAKE")
+    second = fake_node(processes, nodeid="FAKE2")
+    rows = []
+    for nodeid in ("FAKE", "FAKE2"):
+        for process_uuid, process in processes.items():
+            version = process["administrativeInformation"]["publicationAndOwnership"]["dataSetVersion"]
+            rows.append({"nodeid": nodeid, "uuid": process_uuid, "version": version})
+    manifest = write_manifest(tmp_path / "manifest.csv", rows)
+
+    result = batch(config_file, manifest, "--jobs", "1")
+
+    assert result.exit_code == 0, result.output
+    assert "Converted 6 of 6 EPDs" in result.output
+    assert first.stats()["requests"].get("processes") == 3
+    assert "processes" not in second.stats()["requests"]
+
+
+def test_batch_converts_identical_datasets_once(tmp_path, config_file, fake_node):
+    processes, _ = synthetic_node(3, seed=22)
+    fake_node(processes, nodeid="FAKE")
+    fake_node(processes, nodeid="FAKE2")
+    rows = [{"nodeid": nodeid, "uuid": process_uuid} for nodeid in ("FAKE", "FAKE2") for process_uuid in processes]
+    manifest = write_manifest(tmp_path / "manifest.csv", rows)
+
+    result = batch(config_file, manifest, "--jobs", "1", "--on-exists", "skip")
+
+    assert result.exit_code == 0, result.output
+    assert "Converted 6 of 6 EPDs" in result.output
+    entries = BatchJournal.read(tmp_path / "manifest.csv.journal")
+    for process_uuid in processes:
+        assert entries[f"FAKE2/{process_uuid}"]["output"] == entries[f"FAKE/{process_uuid}"]["output"]
+    assert len([path for path in (tmp_path / "results").iterdir() if path.is_dir()]) == 3
+
+
+def test_batch_resume_skips_what_is_done(tmp_path, config_file, fake_node):
+    processes, _ = synthetic_node(3, seed=23)
+    node = fake_node(processes)
+    manifest = write_manifest(tmp_path / "manifest.csv", [{"nodeid": "FAKE", "uuid": process_uuid} for process_uuid in processes])
+    assert batch(config_file, manifest).exit_code == 0
+    node.reset_stats()
+
+    again = batch(config_file, manifest)
+    resumed = batch(config_file, manifest, "--resume")
+
+    assert again.exit_code == 2
+    assert "--resume" in again.output
+    assert resumed.exit_code == 0, resumed.output
+    assert "Converted 0 of 0 EPDs" in resumed.output
+    assert node.stats()["requests"] == {}
@@ -0,0 +1,44 @@
+import time
+
+from cache import ProcessCache
+
+
+def test_entries_share_blobs_and_the_newest_version_wins(tmp_path):
+    cache = ProcessCache(tmp_path, ttl=60, max_size=10 ** 6)
+    digest = cache.put("FAKE", "uuid", "01.00.000", b'{"v": 1}', etag='"1"')
+    assert cache.put("FAKE2", "uuid", "01.00.000", b'{"v": 1}') == digest
+    time.sleep(0.01)
+    cache.put("FAKE", "uuid", "02.00.000", b'{"v": 2}')
+
+    assert cache.read(cache.lookup("FAKE", "uuid")) == b'{"v": 2}'
+    entry = cache.lookup("FAKE", "uuid", "01.00.000")
+    assert (entry.etag, cache.read(entry)) == ('"1"', b'{"v": 1}')
+    assert cache.read_digest(digest) == b'{"v": 1}'
+    assert cache.total_size() == 2 * len(b'{"v": 1}')
+
+
+def test_stale_entries_are_fresh_again_after_revalidation(tmp_path):
+    cache = ProcessCache(tmp_path, ttl=0.05, max_size=10 ** 6)
+    cache.put("FAKE", "uuid", "01.00.000", b"{}")
+    time.sleep(0.1)
+    entry = cache.lookup("FAKE", "uuid")
+    assert not cache.is_fresh(entry)
+
+    cache.revalidated(entry)
+
+    assert cache.is_fresh(cache.lookup("FAKE", "uuid"))
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ProcessCache(tmp_path, ttl=60, max_size=35)
+    for i in range(3):
+        cache.put("FAKE", f"uuid-{i}", "01.00.000", b"x" * 10 + str(i).encode())
+        time.sleep(0.01)
+    cache.read(cache.lookup("FAKE", "uuid-0"))
+    time.sleep(0.01)
+
+    cache.put("FAKE", "uuid-3", "01.00.000", b"y" * 11)
+
+    assert cache.total_size() <= 35
+    assert cache.lookup("FAKE", "uuid-0") is not None
+    assert cache.lookup("FAKE", "uuid-1") is None
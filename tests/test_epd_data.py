@@ -0,0 +1,34 @@
+import pytest
+
+from epd_data import EPD, indicator_code, indicator_matrix, pprint_indicators
+from fixtures import synthetic_process
+
+
+def test_pprint_indicators_needs_only_the_lcia_results():
+    process_json = synthetic_process(scenarios=2)
+
+    indicators, lines, modules = pprint_indicators({"LCIAResults": process_json["LCIAResults"]}, module_flag="y")
+
+    assert len(indicators) == 11
+    assert "C1" in modules
+    from_model = pprint_indicators(EPD.from_json(process_json), module_flag="y")
+    assert (list(indicators), lines, modules) == (list(from_model[0]), from_model[1], from_model[2])
+
+
+def test_indicator_matrix_sums_scenarios_and_rolls_up_a1_to_a3():
+    process_json = synthetic_process(scenarios=3, extra_indicators=2, seed=5)
+
+    matrix = indicator_matrix(process_json)
+
+    expected = {}
+    for result in process_json["LCIAResults"]["LCIAResult"]:
+        code = indicator_code(result["referenceToLCIAMethodDataSet"]["shortDescription"][0]["value"])
+        for any_ in result["other"]["anies"]:
+            if "module" in any_:
+                expected[code, any_["module"]] = expected.get((code, any_["module"]), 0.0) + float(any_["value"])
+    assert len(matrix.codes) == 13
+    for (code, module), value in expected.items():
+        assert matrix.column(module)[code] == pytest.approx(value)
+    for code in matrix.codes:
+        assert matrix.column("A1to3")[code] == pytest.approx(expected[code, "A1-A3"])
+    assert matrix.column("B9") == dict.fromkeys(matrix.codes, 0.0)
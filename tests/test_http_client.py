@@ -0,0 +1,28 @@
+import http_client
+from fake_node import synthetic_node
+
+
+def test_throttled_responses_slow_the_node_down(fake_node):
+    processes, _ = synthetic_node(5)
+    node = fake_node(processes, throttle_rate=0.5, retry_after=0)
+    http_client.configure(rate=100, max_rate=100, max_in_flight=4, retries=3, backoff=0)
+
+    for process_uuid in processes:
+        http_client.get("FAKE", node.url + "processes/" + process_uuid)
+
+    throttled = node.stats()["responses"].get(429, 0)
+    stats = http_client.stats()["FAKE"]
+    assert throttled > 0
+    assert stats["throttled"] == throttled
+    assert stats["rate_limit"] < 100
+
+
+def test_retry_after_pauses_the_node(fake_node):
+    processes, _ = synthetic_node(1)
+    node = fake_node(processes, throttle_rate=1.0, retry_after=1)
+    http_client.configure(rate=100, max_rate=100, retries=0)
+
+    response = http_client.get("FAKE", node.url + "processes/" + next(iter(processes)))
+
+    assert response.status_code == 429
+    assert http_client.stats()["FAKE"]["paused"] > 0
@@ -0,0 +1,43 @@
+import mapping
+from epd_data import conversion_fingerprint
+from identity import IdentityIndex
+
+
+def test_conversion_is_reused_for_the_same_digest_and_fingerprint(tmp_path):
+    index = IdentityIndex(tmp_path / "identity.sqlite3")
+    output = tmp_path / "results" / "Concrete"
+    output.mkdir(parents=True)
+    index.record_conversion("digest", "fingerprint", output)
+
+    assert index.conversion("digest", "fingerprint", tmp_path / "results") == output
+    assert index.conversion("digest", "other fingerprint", tmp_path / "results") is None
+    assert index.conversion("other digest", "fingerprint", tmp_path / "results") is None
+
+
+def test_conversion_outside_the_result_folder_or_deleted_is_not_reused(tmp_path):
+    index = IdentityIndex(tmp_path / "identity.sqlite3")
+    output = tmp_path / "old results" / "Concrete"
+    output.mkdir(parents=True)
+    index.record_conversion("digest", "fingerprint", output)
+
+    assert index.conversion("digest", "fingerprint", tmp_path / "results") is None
+    output.rmdir()
+    assert index.conversion("digest", "fingerprint", tmp_path / "old results") is None
+
+
+def test_copies_are_found_across_nodes(tmp_path):
+    index = IdentityIndex(tmp_path / "identity.sqlite3")
+    index.record("FAKE", "uuid", "01.00.000", "digest")
+
+    assert index.copies("uuid", "01.00.000") == [("FAKE", "digest")]
+    assert index.copies("uuid", "02.00.000") == []
+    assert index.digest("FAKE", "uuid", "01.00.000") == "digest"
+
+
+def test_fingerprint_changes_when_an_answer_is_learned(tmp_path, monkeypatch):
+    monkeypatch.setattr(mapping, "_table", mapping.MappingTable(mapping.DEFAULT_TABLE, tmp_path / "mappings.json"))
+    before = conversion_fingerprint()
+
+    assert conversion_fingerprint() == before
+    mapping.get_table().learn("unit_aliases", "sqm", "M2")
+    assert conversion_fingerprint() != before
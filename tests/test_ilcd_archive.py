@@ -0,0 +1,76 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+
+import http_client
+import main
+from fixtures import synthetic_archive, synthetic_process
+from ilcd_archive import ILCDArchive
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"api_key": None, "result_folder": str(tmp_path / "results")}))
+    return path
+
+
+@pytest.fixture
+def no_network(monkeypatch):
+    def get(*args, **kwargs):
+        raise AssertionError("import-archive went online")
+
+    monkeypatch.setattr(http_client, "get", get)
+
+
+def import_archive(config_file, archive):
+    return CliRunner().invoke(main.main, ["--config-file", str(config_file), "--no-banner", "import-archive", str(archive)])
+
+
+def test_import_archive_needs_no_api_key(tmp_path, config_file, no_network):
+    processes = [synthetic_process(seed=i) for i in range(3)]
+    archive = synthetic_archive(tmp_path / "export.zip", processes)
+
+    result = import_archive(config_file, archive)
+
+    assert result.exit_code == 0, result.output
+    assert "Converted 3 of 3 EPDs" in result.output
+    assert len([path for path in (tmp_path / "results").iterdir() if path.is_dir()]) == 3
+
+
+def test_import_archive_fails_without_units_in_the_archive(tmp_path, config_file, no_network):
+    archive = synthetic_archive(tmp_path / "export.zip", [synthetic_process()], with_units=False)
+
+    result = import_archive(config_file, archive)
+
+    assert result.exit_code == 1
+    assert "Converted 0 of 1 EPDs" in result.output
+
+
+def test_process_json_matches_the_json_view(tmp_path):
+    processes = [synthetic_process(scenarios=2, seed=i) for i in range(3)]
+    archive = synthetic_archive(tmp_path / "export.zip", processes, unit="kg")
+
+    with ILCDArchive(archive) as ilcd:
+        assert ilcd.process_uuids() == sorted(process["processInformation"]["dataSetInformation"]["UUID"] for process in processes)
+        for process in processes:
+            from_archive = ilcd.process_json(process["processInformation"]["dataSetInformation"]["UUID"])
+            assert _without_ref_ids(from_archive["LCIAResults"]) == process["LCIAResults"]
+            assert from_archive["modellingAndValidation"] == process["modellingAndValidation"]
+            assert from_archive["administrativeInformation"] == process["administrativeInformation"]
+            information = from_archive["processInformation"]
+            assert information["dataSetInformation"] == process["processInformation"]["dataSetInformation"]
+            assert information["quantitativeReference"] == process["processInformation"]["quantitativeReference"]
+            assert information["time"]["dataSetValidUntil"] == str(process["processInformation"]["time"]["dataSetValidUntil"])
+            flow_property = from_archive["exchanges"]["exchange"][0]["flowProperties"][0]
+            assert (flow_property["meanValue"], flow_property["referenceUnit"]) == (1.0, "kg")
+
+
+def _without_ref_ids(value):
+    # The JSON view of the fixtures has no refObjectIds.
+    if isinstance(value, dict):
+        return {key: _without_ref_ids(item) for key, item in value.items() if key != "refObjectId"}
+    if isinstance(value, list):
+        return [_without_ref_ids(item) for item in value]
+    return value
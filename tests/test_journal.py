@@ -0,0 +1,45 @@
+import pytest
+
+from journal import BatchJournal
+
+ITEMS = [{"nodeid": "FAKE", "uuid": uuid} for uuid in ("a", "b", "c")]
+
+
+def test_resume_skips_done_items_and_retries_failed_ones(tmp_path):
+    path = tmp_path / "run.journal"
+    with BatchJournal(path) as journal:
+        journal.done(ITEMS[0], tmp_path / "a")
+        journal.failed(ITEMS[1], ValueError("broken"))
+
+    with BatchJournal(path, resume=True) as journal:
+        todo, skipped = journal.plan(ITEMS, retry_budget=2)
+        assert todo == ITEMS[1:]
+        assert [(item, entry["output"]) for item, entry in skipped] == [(ITEMS[0], str(tmp_path / "a"))]
+        journal.failed(ITEMS[1], ValueError("still broken"))
+
+    with BatchJournal(path, resume=True) as journal:
+        todo, skipped = journal.plan(ITEMS, retry_budget=2)
+        assert todo == ITEMS[2:]
+        assert journal.entries["FAKE/b"]["failures"] == 2
+        assert journal.entries["FAKE/b"]["attempt"] == 2
+
+
+def test_torn_last_line_is_ignored(tmp_path):
+    path = tmp_path / "run.journal"
+    with BatchJournal(path) as journal:
+        journal.done(ITEMS[0])
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"key": "FAKE/b", "sta')
+
+    assert list(BatchJournal.read(path)) == ["FAKE/a"]
+
+
+def test_journal_of_an_earlier_run_is_not_truncated(tmp_path):
+    path = tmp_path / "run.journal"
+    with BatchJournal(path) as journal:
+        journal.done(ITEMS[0])
+    before = path.read_bytes()
+
+    with pytest.raises(FileExistsError):
+        BatchJournal(path)
+    assert path.read_bytes() == before
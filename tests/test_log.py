@@ -0,0 +1,20 @@
+import logging
+
+import log
+
+
+def test_very_verbose_also_logs_the_http_requests(capsys):
+    requests_logger = logging.getLogger("urllib3.connectionpool")
+
+    log.configure(verbosity=1)
+    requests_logger.debug("GET /resource/processes 200")
+    log.get_logger("test").debug("conversion details")
+    verbose = capsys.readouterr().err
+
+    log.configure(verbosity=2)
+    requests_logger.debug("GET /resource/processes 200")
+    very_verbose = capsys.readouterr().err
+    log.configure()
+
+    assert verbose == "conversion details\n"
+    assert very_verbose == "GET /resource/processes 200\n"
@@ -0,0 +1,34 @@
+import click
+
+import main
+
+
+def incremental_path(monkeypatch, tmp_path, name, answers, dir=False):
+    answers = iter(answers)
+    monkeypatch.setattr(click, "prompt", lambda *args, **kwargs: next(answers))
+    with click.Context(main.main, obj={"result_folder": str(tmp_path)}):
+        return main.get_incremental_path(name, dir=dir)
+
+
+def test_existing_folder_gets_the_next_free_suffix(monkeypatch, tmp_path):
+    for name in ("Concrete", "Concrete_1", "Concrete_3"):
+        (tmp_path / name).mkdir()
+
+    path = incremental_path(monkeypatch, tmp_path, "Concrete", [tmp_path / "Concrete", "y"], dir=True)
+
+    assert path == tmp_path / "Concrete_2"
+    assert not (tmp_path / ".outputs.json").exists()
+
+
+def test_existing_file_keeps_the_typed_name_and_extension(monkeypatch, tmp_path):
+    (tmp_path / "my-epd.json").write_text("{}")
+
+    path = incremental_path(monkeypatch, tmp_path, "Concrete", [tmp_path / "my-epd.json", "y"])
+
+    assert path == tmp_path / "my-epd_1.json"
+
+
+def test_new_path_is_used_as_given(monkeypatch, tmp_path):
+    path = incremental_path(monkeypatch, tmp_path, "Concrete", [tmp_path / "Concrete"], dir=True)
+
+    assert path == tmp_path / "Concrete"
@@ -0,0 +1,38 @@
+import json
+
+import mapping
+from mapping import MappingTable
+
+
+def test_table_matches_class_ids_names_units_and_subtypes(tmp_path):
+    table = MappingTable(mapping.DEFAULT_TABLE, tmp_path / "mappings.json")
+
+    assert table.hyper_category([("OEKOBAU.DAT", {"classId": "1", "value": "?"})])[0] == "Mineralske_byggematerialer"
+    assert table.hyper_category([("", {"classId": "1", "value": "?"})], nodeid="OEKOBAU.DAT")[0] == "Mineralske_byggematerialer"
+    assert table.hyper_category([("Other", {"value": " Insulation materials "})])[0] == "Isoleringsmaterialer"
+    assert table.hyper_category([("Other", {"value": "Unknown"})]) == (None, None)
+    assert (table.unit("m²"), table.unit("kg"), table.unit("furlong")) == ("M2", "KG", None)
+    assert table.data_type("EPD specific dataset") == "Specific"
+
+
+def test_learned_answers_are_used_and_saved(tmp_path):
+    user_path = tmp_path / "mappings.json"
+    table = MappingTable(mapping.DEFAULT_TABLE, user_path)
+
+    table.learn("class_names", "lehmbaustoffe", "Mineralske_byggematerialer")
+
+    assert table.hyper_category([("Other", {"value": "Lehmbaustoffe"})])[0] == "Mineralske_byggematerialer"
+    assert json.loads(user_path.read_text()) == {"class_names": {"lehmbaustoffe": "Mineralske_byggematerialer"}}
+    reloaded = MappingTable(mapping.DEFAULT_TABLE, user_path)
+    assert reloaded.hyper_category([("Other", {"value": "Lehmbaustoffe"})])[0] == "Mineralske_byggematerialer"
+
+
+def test_review_queue_keeps_one_entry_per_epd(tmp_path, monkeypatch):
+    monkeypatch.setitem(mapping.settings, "review_queue", tmp_path / "review_queue.jsonl")
+    mapping.queue_for_review({"nodeid": "FAKE", "uuid": "a", "version": "1", "field": "unit"})
+    mapping.queue_for_review({"nodeid": "FAKE", "uuid": "b", "version": "1", "field": "unit"})
+    mapping.queue_for_review({"nodeid": "FAKE", "uuid": "a", "version": "1", "field": "hyper_category"})
+
+    queued = mapping.read_review_queue()
+
+    assert [(entry["uuid"], entry["field"]) for entry in queued] == [("a", "hyper_category"), ("b", "unit")]
@@ -0,0 +1,46 @@
+import pytest
+
+from output_store import OutputStore
+
+
+def test_suffix_hands_out_a_new_name_every_time(tmp_path):
+    (tmp_path / "Concrete").mkdir()
+    with OutputStore(tmp_path) as store:
+        paths = [store.allocate("Concrete", "uuid", "01.00.000")[0] for _ in range(3)]
+
+    assert [path.name for path in paths] == ["Concrete_1", "Concrete_2", "Concrete_3"]
+
+
+@pytest.mark.parametrize("policy, status", [("skip", "skip"), ("overwrite", "overwrite"), ("suffix", "new")])
+def test_policy_for_an_epd_written_by_an_earlier_run(tmp_path, policy, status):
+    with OutputStore(tmp_path) as store:
+        path, _ = store.allocate("Concrete C30/37", "uuid", "01.00.000")
+    path.mkdir()
+
+    with OutputStore(tmp_path, policy=policy) as store:
+        again, found = store.allocate("Concrete C30/37", "uuid", "01.00.000")
+        other, _ = store.allocate("Concrete C30/37", "uuid", "02.00.000")
+
+    assert found == status
+    assert again == {"skip": None, "overwrite": path, "suffix": tmp_path / "Concrete_C3037_1"}[policy]
+    assert other not in (path, again)
+
+
+def test_owners_of_deleted_outputs_are_forgotten(tmp_path):
+    with OutputStore(tmp_path) as store:
+        path, _ = store.allocate("Concrete", "uuid", "01.00.000")
+    path.mkdir()
+    path.rmdir()
+
+    with OutputStore(tmp_path, policy="skip") as store:
+        assert store.allocate("Concrete", "uuid", "01.00.000") == (tmp_path / "Concrete", "new")
+
+
+def test_index_is_saved_during_the_run(tmp_path, monkeypatch):
+    monkeypatch.setattr(OutputStore, "save_every", 2)
+    store = OutputStore(tmp_path)
+    for i in range(2):
+        store.allocate(f"EPD {i}", f"uuid-{i}", "01.00.000")[0].mkdir()
+
+    assert (tmp_path / OutputStore.index_name).exists()
+    assert OutputStore(tmp_path, policy="skip").allocate("EPD 0", "uuid-0", "01.00.000") == (None, "skip")
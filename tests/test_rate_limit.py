@@ -0,0 +1,54 @@
+from email.utils import formatdate
+
+import pytest
+
+from rate_limit import NodeLimiter, retry_after_seconds
+
+
+def test_throttling_halves_the_rate_and_pauses_for_retry_after():
+    limiter = NodeLimiter(rate=8.0, max_rate=8.0)
+
+    assert limiter.acquire(timeout=0)
+    limiter.release(429, retry_after=30)
+
+    assert limiter.rate == 4.0
+    assert limiter.stats()["throttled"] == 1
+    assert limiter.stats()["paused"] > 29
+    assert not limiter.acquire(timeout=0.05)
+
+
+def test_successes_raise_the_rate_up_to_max_rate():
+    limiter = NodeLimiter(rate=1.0, max_rate=1.25, increase=0.1, burst=10, max_in_flight=10)
+
+    for _ in range(5):
+        assert limiter.acquire(timeout=0)
+        limiter.release(200)
+
+    assert limiter.rate == 1.25
+
+
+def test_server_errors_leave_the_rate_alone():
+    limiter = NodeLimiter(rate=2.0)
+
+    assert limiter.acquire(timeout=0)
+    limiter.release(500)
+
+    assert limiter.rate == 2.0
+
+
+def test_max_in_flight_bounds_concurrent_requests():
+    limiter = NodeLimiter(rate=100.0, burst=10, max_in_flight=2)
+
+    assert limiter.acquire(timeout=0)
+    assert limiter.acquire(timeout=0)
+    assert not limiter.acquire(timeout=0.05)
+    limiter.release(200)
+    assert limiter.acquire(timeout=0)
+
+
+def test_retry_after_seconds():
+    assert retry_after_seconds("3") == 3.0
+    assert retry_after_seconds("-1") == 0.0
+    assert retry_after_seconds(None) is None
+    assert retry_after_seconds("soon") is None
+    assert retry_after_seconds(formatdate(1000.0 + 12, usegmt=True), now=1000.0) == pytest.approx(12.0)
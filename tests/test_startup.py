@@ -0,0 +1,25 @@
+import statistics
+import subprocess
+import sys
+
+from bench_startup import BUDGET_MS, ROOT, startup_seconds
+
+# Only imported by the commands that need them, see bench_startup.py.
+HEAVY_MODULES = ("requests", "urllib3", "numpy", "pandas", "asyncio")
+
+
+def test_help_starts_within_budget():
+    startup_seconds(1)  # Warm up the file system cache and the .pyc files.
+
+    median_ms = statistics.median(startup_seconds(5)) * 1000
+
+    assert median_ms <= BUDGET_MS
+
+
+def test_import_main_leaves_heavy_modules_out():
+    result = subprocess.run(
+        [sys.executable, "-c", f"import sys, main; print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+
+    assert result.stdout.split() == []
@@ -0,0 +1,111 @@
+import json
+import os
+import threading
+from pathlib import Path
+
+from appdirs import AppDirs
+
+import http_client
+import profiling
+
+# Reference units of the ILCD reference flow properties and unit groups that
+# almost every construction EPD refers to, so they never need a request.
+ILCD_UNIT_GROUPS = {
+    # Flow property "Mass" and unit group "Units of mass"
+    "93a60a56-a3c8-10da-a746-0800200c9a66": "kg",
+    "93a60a57-a4c8-11da-a746-0800200c9a66": "kg",
+    # Flow property "Area"
+    "93a60a56-a3c8-19da-a746-0800200c9a66": "m2",
+    # Flow property "Volume" and unit group "Units of volume"
+    "93a60a56-a3c8-22da-a746-0800200c9a66": "m3",
+    "93a60a57-a3c8-22da-a746-0800200c9a66": "m3",
+    # Flow property "Length"
+    "838aaa23-0117-11db-92e3-0800200c9a66": "m",
+    # Flow property "Number of items" and unit group "Units of items"
+    "01846770-4cfe-4a25-8ad9-919d8d378345": "pcs.",
+    "5beb6eb0-a4c8-11da-a746-0800200c9a66": "pcs.",
+}
+
+settings = {
+    "path": Path(AppDirs("EPDtoLCAByg").user_cache_dir) / "unit_groups.json",
+}
+
+_resolver = None
+_lock = threading.Lock()
+
+
+def reference_unit(unit_group):
+    """
+    Return the name of the reference unit of an ILCD unit group dataset.
+    """
+    referenceToReferenceUnit = unit_group["unitGroupInformation"]["quantitativeReference"]["referenceToReferenceUnit"]
+    return unit_group["units"]["unit"][referenceToReferenceUnit]["name"]
+
+
+class UnitGroupResolver:
+    """
+    Resolves unit group UUIDs to their reference unit.
+
+    Answers are memoized in memory and persisted to a small JSON file, so a
+    unit group is downloaded at most once, no matter how many EPDs use it.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.memo = dict(ILCD_UNIT_GROUPS)
+        self._lock = threading.Lock()
+        # One lock per unit group being downloaded, see resolve().
+        self._fetching = {}
+        try:
+            with open(self.path, "r") as f:
+                self.memo.update(json.load(f))
+        except (FileNotFoundError, ValueError):
+            pass
+
+    def resolve(self, nodeid, unit_uri, headers=None, offline=False):
+        unit_group_uuid = unit_uri.rstrip("/").rsplit("/", 1)[-1]
+        if unit_group_uuid in self.memo:
+            profiling.count_cache("unit_groups", True)
+            return self.memo[unit_group_uuid]
+        profiling.count_cache("unit_groups", False)
+        if offline:
+            raise LookupError(f"Unit group {unit_group_uuid} is not known and can't be downloaded offline.")
+        # One download per unit group, even when several workers miss at
+        # once, while misses of other unit groups download in parallel.
+        with self._lock:
+            fetching = self._fetching.setdefault(unit_group_uuid, threading.Lock())
+        with fetching:
+            if unit_group_uuid in self.memo:
+                return self.memo[unit_group_uuid]
+            response = http_client.get(nodeid, unit_uri, params={"format": "JSON"}, headers=headers)
+            response.raise_for_status()
+            unit = reference_unit(json.loads(response.text))
+            with self._lock:
+                self.memo[unit_group_uuid] = unit
+                self._save()
+                del self._fetching[unit_group_uuid]
+        return unit
+
+    def _save(self):
+        learned = {key: value for key, value in self.memo.items() if key not in ILCD_UNIT_GROUPS}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(learned, f, indent=4)
+        os.replace(tmp_path, self.path)
+
+
+def get_resolver():
+    global _resolver
+    with _lock:
+        if _resolver is None:
+            _resolver = UnitGroupResolver(settings["path"])
+        return _resolver
+
+
+def resolve(nodeid, unit_uri, headers=None, offline=False):
+    """
+    Return the reference unit of the unit group at `unit_uri`. With
+    `offline` only known unit groups are resolved, LookupError otherwise.
+    """
+    return get_resolver().resolve(nodeid, unit_uri, headers, offline=offline)